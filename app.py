@@ -1,52 +1,58 @@
 import os
-import sqlite3
 import time
-import requests
-import subprocess
-import sys
-import atexit
+import json
+import base64
+import binascii
+import threading
 import psutil
-from flask import Flask, render_template, request, jsonify
+from flask import Blueprint, Flask, Response, render_template, request, jsonify, stream_with_context
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from dotenv import load_dotenv
-from apscheduler.schedulers.background import BackgroundScheduler
 from pydantic import BaseModel, ValidationError, Field
-from typing import Optional
+from typing import List, Optional
 
 # Yerel modüller
 from core.ai_manager import AIManager
-from core.fetcher import fetch_rss, process_missing_analysis, init_db
+from core.fetcher import (init_db, store_analysis, publish_analysis, render_analysis, parse_ai_json_to_text,
+                          THREAT_RANK, THREAT_RANK_SQL)
+from core.prompts import THREAT_LEVELS
+from core import db, enrich, events, job_queue, rollups, search
+from core.worker import analysis_worker
+from core.scheduler import background_jobs
 from core.logger import setup_logger
-from core.cache import get_cache, set_cache
+from core.cache import LookupFailed, get_cache_stats
+from core.lookups import (lookup_cve, lookup_ip, lookup_whois, lookup_subdomains, lookup_dns, lookup_dns_bulk,
+                          DNS_BULK_MAX)
+from core.http_client import get_pool_stats
 
 logger = setup_logger("App")
 
 # .env dosyasındaki değişkenleri yükle
 load_dotenv()
 
-def auto_install_requirements():
-    """requirements.txt dosyasındaki bağımlılıkları kontrol eder ve eksik olanları otomatik yükler."""
-    try:
-        logger.info("📦 Bağımlılıklar kontrol ediliyor...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-q", "--disable-pip-version-check", "-r", "requirements.txt"])
-    except Exception as e:
-        logger.error(f"❌ Bağımlılık yükleme hatası: {e}")
-
-# Uygulama başlamadan önce bağımlılıkları kontrol et
-auto_install_requirements()
+bp = Blueprint('sentinel', __name__)
 
-app = Flask(__name__)
-
-# Hız Sınırlayıcı (Rate Limiter)
+# Hız Sınırlayıcı (Rate Limiter). Birden fazla web worker'ı ile çalışırken sayaçların süreçler
+# arasında paylaşılması için RATELIMIT_STORAGE_URI ortak bir depoya (ör. redis://...) yönlendirilmelidir;
+# memory:// ile her limit worker başına uygulanır (docker-compose.yml redis ile gelir).
+RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
 limiter = Limiter(
     get_remote_address,
-    app=app,
     default_limits=["500 per day", "100 per hour"],
-    storage_uri="memory://",
+    storage_uri=RATELIMIT_STORAGE_URI,
 )
 
-DB_PATH = 'data/sentinel.db'
+DB_PATH = db.DB_PATH
+NEWS_PAGE_SIZE = 10
+NEWS_PAGE_SIZE_MAX = 50
+STREAM_HEARTBEAT = int(os.getenv('STREAM_HEARTBEAT', 15))          # Canlı akışta sistem sağlığı aralığı (sn)
+STREAM_MAX_DURATION = int(os.getenv('STREAM_MAX_DURATION', 300))   # Bağlantı bu süre sonunda yenilenir (sn)
+STREAM_RETRY_MS = 3000
+# Her açık akış bir gunicorn thread'ini tutar; süreç başına akış sayısı sınırlanarak API istekleri için
+# thread bırakılır (varsayılan: 8 thread'in yarısı). Sınır doluysa istemci yoklama düzenine geçer.
+STREAM_MAX_CLIENTS = int(os.getenv('STREAM_MAX_CLIENTS', 4))
+_stream_slots = threading.BoundedSemaphore(STREAM_MAX_CLIENTS)
 ai_manager = AIManager()
 start_time = time.time()
 
@@ -65,8 +71,16 @@ class IpRequest(BaseModel):
 class DnsRequest(BaseModel):
     domain: str = Field(..., min_length=3)
 
+class DnsBulkRequest(BaseModel):
+    domains: List[str] = Field(..., min_length=1, max_length=DNS_BULK_MAX)
+
+class EnrichBulkRequest(BaseModel):
+    iocs: List[str] = Field(..., min_length=1, max_length=enrich.ENRICH_BULK_MAX)
+    whois: bool = False
+    ai_comment: bool = False
 
-@app.route('/api/system/health', methods=['GET'])
+
+@bp.route('/api/system/health', methods=['GET'])
 def get_system_health():
     """Sunucu CPU ve RAM kullanım bilgilerini döner."""
     # cpu_percent(interval=0.1) ilk çağrıda 0 dönmemesi için kısa bir ölçüm yapar
@@ -76,170 +90,320 @@ def get_system_health():
         "uptime": int(time.time() - start_time)
     })
 
-# Arka Plan Görevleri (Scheduler) Yapılandırması
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(func=fetch_rss, trigger="interval", minutes=15)
-scheduler.add_job(func=process_missing_analysis, trigger="interval", minutes=5)
-scheduler.start()
-
-atexit.register(lambda: scheduler.shutdown())
-
-def get_db_connection():
-    """SQLite veritabanına bağlantı oluşturur ve WAL modunu aktif eder."""
-    conn = sqlite3.connect(DB_PATH, timeout=30)
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.row_factory = sqlite3.Row
-    return conn
+@bp.route('/api/system/pools', methods=['GET'])
+def get_connection_pools():
+    """Paylaşılan HTTP bağlantı havuzu ve AI SDK istemcilerinin yeniden kullanım istatistiklerini döner."""
+    return jsonify({
+        "http": get_pool_stats(),
+        "ai_clients": ai_manager.get_client_stats()
+    })
 
-@app.route('/')
+@bp.route('/api/system/db', methods=['GET'])
+def get_db_status():
+    """En çok süre harcayan SQL sorgularının sayı ve süre istatistiklerini döner."""
+    return jsonify({"queries": db.query_stats(int(request.args.get('limit', 20)))})
+
+@bp.route('/api/system/jobs', methods=['GET'])
+def get_background_jobs():
+    """Arka plan görevlerini hangi sürecin yürüttüğünü (lider kilidi) döner."""
+    return jsonify(background_jobs.status())
+
+@bp.route('/api/system/cache', methods=['GET'])
+def get_cache_status():
+    """Katmanlı önbelleğin isabet/ıska/tahliye sayaçlarını döner."""
+    return jsonify(get_cache_stats())
+
+def _encode_cursor(position):
+    """Sayfalama konumunu istemciye opak (base64) bir imleç olarak verir."""
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+def _decode_cursor(value):
+    """Opak imleci çözer; geçersizse ValueError fırlatır."""
+    position = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+    if not isinstance(position, dict) or not all(isinstance(v, int) for v in position.values()):
+        raise ValueError("Geçersiz imleç")
+    return position
+
+@bp.route('/')
 def index():
     """Ana sayfa dashboard arayüzünü yükler."""
     return render_template('index.html')
 
-@app.route('/api/ai_status', methods=['GET'])
+@bp.route('/api/ai_status', methods=['GET'])
 def get_ai_status():
     """AI servislerinin durumunu ve bekleyen analiz sayısını döner."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM news WHERE ai_analysis IS NULL OR ai_analysis LIKE 'HATA:%'")
-    pending = cursor.fetchone()[0]
-    conn.close()
+    with db.connection(DB_PATH) as conn:
+        pending = job_queue.depth(conn)
     
     status = ai_manager.get_status()
     status['pending_analysis'] = pending
     return jsonify(status)
 
-@app.route('/api/news', methods=['GET'])
+def _system_health():
+    return {
+        "cpu": psutil.cpu_percent(interval=None),
+        "ram": psutil.virtual_memory().percent,
+        "uptime": int(time.time() - start_time)
+    }
+
+@bp.route('/api/stream', methods=['GET'])
+@limiter.exempt
+def event_stream():
+    """
+    Server-Sent Events ile canlı güncellemeler: yeni haberler (news), tamamlanan analizler (analysis),
+    kuyruk derinliği (queue), AI sağlayıcı durumu (ai_status) ve sistem sağlığı (health).
+    Kopan istemciler Last-Event-ID başlığıyla kaçırdıkları olayları alır.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Geçersiz olay id'si"}), 400
+
+    if not _stream_slots.acquire(blocking=False):
+        response = jsonify({"error": "Canlı akış kapasitesi dolu, yoklama kullanın."})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(STREAM_MAX_DURATION)
+        return response
+
+    def generate(last_id):
+        with db.connection(DB_PATH) as conn:
+            if last_id is None:
+                last_id = events.latest_id(conn)
+            status = ai_manager.get_status()
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            yield events.format_sse("ai_status", status)
+            yield events.format_sse("queue", {"pending": job_queue.depth(conn)})
+
+            started = heartbeat_at = time.monotonic()
+            while time.monotonic() - started < STREAM_MAX_DURATION:
+                seen = events.version()
+                for event_id, kind, data in events.read_since(conn, last_id):
+                    last_id = event_id
+                    yield events.format_sse(kind, data, event_id)
+
+                # Soğuma başlangıcı notify() ile, bitişi zamanla değişir; ikisi de burada yakalanır
+                current = ai_manager.get_status()
+                if current != status:
+                    status = current
+                    yield events.format_sse("ai_status", status)
+
+                if time.monotonic() - heartbeat_at >= STREAM_HEARTBEAT:
+                    heartbeat_at = time.monotonic()
+                    yield events.format_sse("health", _system_health())
+                events.wait(seen)
+
+    response = Response(stream_with_context(generate(last_id)), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Yer, akış hiç başlamasa bile sunucu yanıtı kapattığında bırakılır
+    response.call_on_close(_stream_slots.release)
+    return response
+
+@bp.route('/api/ai/providers', methods=['GET'])
+def get_ai_providers():
+    """AI sağlayıcılarının eşzamanlılık limitlerini, anlık yüklerini ve kalan dakikalık kotalarını döner."""
+    return jsonify(ai_manager.get_provider_stats())
+
+@bp.route('/api/news', methods=['GET'])
 def get_news():
-    """Veritabanındaki haberleri sayfalama, arama ve kategori kriterlerine göre getirir."""
+    """
+    Veritabanındaki haberleri arama, kategori ve tehdit seviyesi (threat_level=HIGH,CRITICAL)
+    kriterlerine göre getirir. sort=threat en kritik haberleri önce sıralar.
+    Sayfalama imleç (cursor / before_id) ile yapılır: her sayfa tablo boyutundan bağımsız olarak
+    sadece sayfa kadar satır okur. Eski 'page' parametresi geriye uyumluluk için desteklenir.
+    Toplam sayı aramasız sorgularda sayaç tablosundan gelir; aramada sadece count=1 ile hesaplanır.
+    """
     try:
-        page = int(request.args.get('page', 1))
         search_query = request.args.get('search', '')
         category_filter = request.args.get('category', '')
-        per_page = 10
-        offset = (page - 1) * per_page
-
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Dinamik SQL sorgusu oluştur
-        base_query = "SELECT * FROM news"
-        count_query = "SELECT COUNT(*) FROM news"
-        conditions = []
-        params = []
-
-        if search_query:
-            conditions.append("title LIKE ?")
-            params.append('%' + search_query + '%')
-        
-        if category_filter:
-            conditions.append("category = ?")
-            params.append(category_filter)
-
-        where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
-        
-        # Toplam sayıyı al
-        cursor.execute(count_query + where_clause, params)
-        total_count = cursor.fetchone()[0]
-
-        # Haberleri al
-        cursor.execute(
-            base_query + where_clause + " ORDER BY id DESC LIMIT ? OFFSET ?",
-            params + [per_page, offset]
-        )
-        
-        rows = cursor.fetchall()
-        conn.close()
+        threat_filter = [t.strip().upper() for t in request.args.get('threat_level', '').split(',') if t.strip()]
+        if any(t not in THREAT_LEVELS for t in threat_filter):
+            return jsonify({"error": "Geçersiz tehdit seviyesi", "valid": THREAT_LEVELS}), 400
+        sort_by_threat = request.args.get('sort') == 'threat'
+        per_page = max(1, min(int(request.args.get('per_page', NEWS_PAGE_SIZE)), NEWS_PAGE_SIZE_MAX))
+        cursor_arg = request.args.get('cursor')
+        before_id = request.args.get('before_id', type=int)
+        page = int(request.args.get('page', 1))
+        want_count = request.args.get('count')
+
+        position = _decode_cursor(cursor_arg) if cursor_arg else {}
+        if before_id is not None:
+            position = {"id": before_id}
+
+        with db.connection(DB_PATH) as conn:
+            cursor = conn.cursor()
+
+            # Dinamik SQL sorgusu oluştur
+            select, source, order = "*", "news", "id DESC"
+            conditions = []
+            params = []
+
+            match_query = search.build_match_query(search_query)
+            if match_query:
+                # Arama FTS5 indeksi üzerinden yapılır ve alaka düzeyine (bm25) göre sıralanır
+                select, source, order = search.search_clause()
+                conditions.append("news_fts MATCH ?")
+                params.append(match_query)
+
+            if category_filter:
+                conditions.append("news.category = ?")
+                params.append(category_filter)
+
+            if threat_filter:
+                conditions.append(f"news.threat_level IN ({', '.join('?' * len(threat_filter))})")
+                params.extend(threat_filter)
+
+            # Tehdit sıralaması idx_news_threat_rank indeksindeki ifadeyi kullanır
+            if sort_by_threat and not match_query:
+                order = f"{THREAT_RANK_SQL} DESC, id DESC"
+
+            where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+            # Toplam sayı: aramasız sorgularda O(1) sayaç, aramada ve çoklu filtrede isteğe bağlı
+            total_count = None
+            single_threat = threat_filter[0] if len(threat_filter) == 1 and not category_filter else None
+            if not match_query and not threat_filter and want_count != '0':
+                total_count = rollups.news_count(cursor, category_filter or None)
+            elif single_threat and not match_query and want_count != '0':
+                total_count = rollups.bucket_count(cursor, "threat", single_threat)
+            elif want_count == '1':
+                cursor.execute(f"SELECT COUNT(*) FROM {source}" + where_clause, params)
+                total_count = cursor.fetchone()[0]
+
+            # bm25 sıralamasında anahtar (keyset) olmadığından aramada imleç konumu ofset taşır
+            offset = 0
+            if match_query:
+                offset = position.get("offset", (page - 1) * per_page)
+            elif sort_by_threat and "id" in position:
+                conditions.append(f"({THREAT_RANK_SQL}, news.id) < (?, ?)")
+                params.extend([position.get("rank", 0), position["id"]])
+                where_clause = " WHERE " + " AND ".join(conditions)
+            elif "id" in position:
+                conditions.append("news.id < ?")
+                params.append(position["id"])
+                where_clause = " WHERE " + " AND ".join(conditions)
+            else:
+                offset = (page - 1) * per_page
+
+            # Sonraki sayfa olup olmadığını anlamak için bir fazla satır okunur
+            cursor.execute(
+                f"SELECT {select} FROM {source}" + where_clause + f" ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [per_page + 1, offset]
+            )
+
+            rows = cursor.fetchall()
+
+        has_more = len(rows) > per_page
+        news = [dict(row, ai_analysis=render_analysis(row)) for row in rows[:per_page]]
+        next_cursor = None
+        if has_more:
+            if match_query:
+                position = {"offset": offset + per_page}
+            elif sort_by_threat:
+                position = {"rank": THREAT_RANK.get(news[-1]['threat_level'], 0), "id": news[-1]['id']}
+            else:
+                position = {"id": news[-1]['id']}
+            next_cursor = _encode_cursor(position)
         
         return jsonify({
-            "news": [dict(row) for row in rows],
+            "news": news,
             "total": total_count,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
             "current_page": page,
             "per_page": per_page
         })
+    except (ValueError, binascii.Error):
+        return jsonify({"error": "Geçersiz sayfalama parametresi"}), 400
     except Exception as e:
         logger.error(f"Haber çekme hatası: {e}")
         return jsonify({"error": "Sistem hatası"}), 500
 
-@app.route('/api/stats', methods=['GET'])
+@bp.route('/api/stats', methods=['GET'])
 def get_stats():
-    """Haberlerin kaynaklara göre dağılım istatistiklerini hesaplar."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT source, COUNT(*) as count FROM news GROUP BY source ORDER BY count DESC")
-    sources = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    """Haberlerin kaynaklara göre dağılım istatistiklerini özet tablosundan döner."""
+    with db.connection(DB_PATH) as conn:
+        sources = rollups.source_stats(conn.cursor())
     return jsonify({"sources": sources})
 
-@app.route('/api/intensity', methods=['GET'])
+@bp.route('/api/intensity', methods=['GET'])
 def get_intensity():
     """Son 7 gün içindeki haber giriş yoğunluğunu döner."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT date(COALESCE(created_at, CURRENT_TIMESTAMP)) as date, COUNT(*) as count 
-        FROM news 
-        WHERE created_at >= date('now', '-7 days') OR created_at IS NULL
-        GROUP BY date
-        ORDER BY date ASC
-    """)
-    intensity = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    with db.connection(DB_PATH) as conn:
+        intensity = rollups.intensity_stats(conn.cursor())
     return jsonify({"intensity": intensity})
 
-@app.route('/api/stats/categories', methods=['GET'])
+@bp.route('/api/stats/categories', methods=['GET'])
 def get_category_stats():
     """Haberlerin tehdit kategorilerine göre dağılımını döner (Filtrelenmiş)."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Sadece kısa ve anlamlı kategorileri getir (AI hatalı parse etmişse temizle)
-    cursor.execute("""
-        SELECT category, COUNT(*) as count 
-        FROM news 
-        WHERE category IS NOT NULL 
-        AND length(category) < 25
-        GROUP BY category 
-        ORDER BY count DESC
-    """)
-    stats = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    with db.connection(DB_PATH) as conn:
+        stats = rollups.category_stats(conn.cursor())
     return jsonify({"categories": stats})
 
-@app.route('/api/analyze', methods=['POST'])
+@bp.route('/api/dashboard', methods=['GET'])
+def get_dashboard():
+    """
+    Panelin tüm istatistiklerini (kaynak, kategori, günlük yoğunluk, tehdit seviyesi) tek istekte döner.
+    Yanıt ETag taşır; veri değişmediyse If-None-Match ile gelen istek 304 alır.
+    """
+    with db.connection(DB_PATH) as conn:
+        data, version = rollups.dashboard(conn.cursor())
+
+    response = jsonify(data)
+    response.set_etag(version)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@bp.route('/api/stats/feeds', methods=['GET'])
+def get_feed_stats():
+    """RSS kaynaklarının tarama durumunu (son başarı, 304/atlama, indirilen veri) döner."""
+    with db.connection(DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT source, last_status, last_success_at, last_checked_at, last_error,
+                   bytes_fetched, fetch_count, skip_count, error_count
+            FROM feed_state
+            ORDER BY source
+        """)
+        feeds = [dict(row) for row in cursor.fetchall()]
+    return jsonify({"feeds": feeds})
+
+@bp.route('/api/analyze', methods=['POST'])
 
 def analyze_news_route():
     """Belirli bir haberi manuel olarak analiz eder (Doğrulamalı)."""
     try:
         from core.prompts import ANALYSIS_SYSTEM_PROMPT, generate_news_prompt
-        from core.fetcher import parse_ai_json_to_text
 
         # Pydantic ile veri doğrula
         req_data = AnalyzeRequest(**request.json)
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT ai_analysis FROM news WHERE link = ?", (req_data.link,))
-        existing = cursor.fetchone()
-        
-        if existing and existing[0] and not existing[0].startswith("HATA:"):
-            conn.close()
-            return jsonify({"analysis": existing[0]})
+        with db.connection(DB_PATH) as conn:
+            existing = conn.execute(
+                "SELECT id, ai_analysis, threat_level, category, summary, technical_details, analysis_source "
+                "FROM news WHERE link = ?", (req_data.link,)).fetchone()
+
+        # Yerel ön sınıflandırıcı sonuçları AI özeti içermez; istenince AI ile analiz edilir
+        upgrade_local = bool(existing and existing['threat_level'] and existing['analysis_source'] == 'local')
+        if existing and existing['threat_level'] and not upgrade_local:
+            return jsonify({"analysis": render_analysis(existing)})
 
         prompt = generate_news_prompt(req_data.title, req_data.link)
-        json_result = ai_manager.analyze_json(prompt, system_prompt=ANALYSIS_SYSTEM_PROMPT)
+        # Kullanıcı beklediği için gecikme odaklı (hedged) çağrı
+        json_result = ai_manager.validate_analysis(
+            ai_manager.analyze_json(prompt, system_prompt=ANALYSIS_SYSTEM_PROMPT, hedge=True))
 
         if json_result:
-            analysis_text = parse_ai_json_to_text(json_result)
-            category = json_result.get('category', 'General')
-            
-            cursor.execute("UPDATE news SET ai_analysis = ?, category = ? WHERE link = ?", 
-                           (analysis_text, category, req_data.link))
-            conn.commit()
-            conn.close()
-            return jsonify({"analysis": analysis_text})
-        
-        conn.close()
+            if existing:
+                with db.connection(DB_PATH) as conn:
+                    # Analiz haberin yakın kopyalarına da yazılır
+                    store_analysis(conn.cursor(), {existing['id']: json_result})
+                    job_queue.complete(conn, [existing['id']])
+                    # Yerel sonuç için bildirim zaten gönderildi; yükseltmede tekrar yönlendirilmez
+                    publish_analysis(conn, {existing['id']: json_result}, route=not upgrade_local)
+                    conn.commit()
+            return jsonify({"analysis": parse_ai_json_to_text(json_result)})
+
         return jsonify({"error": "AI analizi başarısız oldu."}), 500
 
     except ValidationError as e:
@@ -248,216 +412,178 @@ def analyze_news_route():
         logger.error(f"Manuel analiz hatası: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/cve', methods=['GET'])
+@bp.route('/api/news/<int:news_id>/duplicates', methods=['GET'])
+def news_duplicates(news_id):
+    """Haberin ait olduğu yakın kopya kümesini (kök haber ve diğer kaynaklardaki kopyaları) döner."""
+    with db.connection(DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(duplicate_of, id) FROM news WHERE id = ?", (news_id,))
+        row = cursor.fetchone()
+        if not row:
+            return jsonify({"error": "Haber bulunamadı."}), 404
+
+        root_id = row[0]
+        cursor.execute("""
+            SELECT id, title, link, source, published FROM news
+            WHERE id = ? OR duplicate_of = ? ORDER BY id
+        """, (root_id, root_id))
+        cluster = [dict(r) for r in cursor.fetchall()]
+    return jsonify({"root_id": root_id, "items": cluster})
+
+@bp.route('/api/cve', methods=['GET'])
 @limiter.limit("10 per minute")
 def analyze_cve_route():
     """CVE ID üzerinden istihbarat toplar ve AI ile teknik yorum ekler (Önbellekli)."""
     try:
         cve_id = request.args.get('id', '').strip().upper()
         CveRequest(id=cve_id)
-
-        # Önbellek Kontrolü
-        cached_data = get_cache(f"cve_{cve_id}")
-        if cached_data: return jsonify(cached_data)
-
-        res = requests.get(f"https://cve.circl.lu/api/cve/{cve_id}", timeout=15)
-        if res.status_code == 200:
-            data = res.json()
-            if not data: return jsonify({"error": "CVE bulunamadı"}), 404
-            
-            summary = data.get('summary', 'Açıklama bulunamadı.')
-            cvss = data.get('cvss', 'Bilinmiyor')
-            
-            context = f"Özet: {summary}" if summary != "Açıklama bulunamadı." else f"{cve_id} özelinde zafiyet yorumu yap."
-            prompt = f"Siber güvenlik uzmanı olarak analiz et:\nCVE: {cve_id}\nCVSS: {cvss}\n{context}"
-            ai_comment = ai_manager.analyze(prompt)
-            
-            result = {
-                "id": cve_id,
-                "summary": summary,
-                "cvss": cvss,
-                "ai_comment": ai_comment,
-                "references": data.get('references', [])[:5]
-            }
-            set_cache(f"cve_{cve_id}", result)
-            return jsonify(result)
-        return jsonify({"error": "Dış servis hatası"}), 502
+        return jsonify(lookup_cve(cve_id, ai_manager))
     except ValidationError:
         return jsonify({"error": "Geçersiz CVE formatı (Örn: CVE-2024-1234)"}), 400
+    except LookupFailed as e:
+        return jsonify({"error": e.message}), e.status
     except Exception as e:
         logger.error(f"CVE sorgu hatası: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/ip', methods=['GET'])
+@bp.route('/api/ip', methods=['GET'])
 @limiter.limit("20 per minute")
 def analyze_ip_route():
     """IP adresi üzerinden konum ve ISP istihbaratı toplar (Önbellekli)."""
     try:
         ip_addr = request.args.get('ip', '').strip()
         IpRequest(ip=ip_addr)
-
-        # Önbellek Kontrolü
-        cached_data = get_cache(f"ip_{ip_addr}")
-        if cached_data: return jsonify(cached_data)
-
-        res = requests.get(f"http://ip-api.com/json/{ip_addr}?fields=status,message,country,city,isp,org,as,query", timeout=10)
-        if res.status_code == 200:
-            data = res.json()
-            if data['status'] == 'fail': return jsonify({"error": "IP bulunamadı"}), 404
-            
-            result = {
-                "ip": data['query'],
-                "location": f"{data.get('city')}, {data.get('country')}",
-                "isp": data.get('isp'),
-                "org": data.get('org'),
-                "as": data.get('as')
-            }
-            set_cache(f"ip_{ip_addr}", result)
-            return jsonify(result)
-
-        return jsonify({"error": "Servis ulaşılamadı"}), 502
+        return jsonify(lookup_ip(ip_addr))
     except ValidationError:
         return jsonify({"error": "Geçersiz IP adresi"}), 400
+    except LookupFailed as e:
+        return jsonify({"error": e.message}), e.status
     except Exception as e:
         logger.error(f"IP sorgu hatası: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/dns', methods=['GET'])
+@bp.route('/api/dns', methods=['GET'])
 def analyze_dns_route():
-    """Verilen domain için tüm kritik DNS kayıtlarını sorgular."""
+    """Verilen domain için tüm kritik DNS kayıtlarını (A, AAAA, CNAME, MX, NS, TXT, SOA, CAA) eşzamanlı sorgular."""
     try:
-        domain = request.args.get('domain', '').strip()
+        domain = request.args.get('domain', '').strip().lower()
         DnsRequest(domain=domain)
-
-        import dns.resolver
-        results = {"domain": domain, "records": {}}
-        record_types = ['A', 'NS', 'CNAME', 'MX', 'TXT']
-        
-        for rtype in record_types:
-            try:
-                answers = dns.resolver.resolve(domain, rtype)
-                results["records"][rtype] = [str(r) for r in answers]
-            except:
-                results["records"][rtype] = []
-
-        if not any(results["records"].values()):
-            return jsonify({"error": "Kayıt bulunamadı"}), 404
-
-        return jsonify(results)
+        return jsonify(lookup_dns(domain))
     except ValidationError:
         return jsonify({"error": "Geçersiz domain adı"}), 400
+    except LookupFailed as e:
+        return jsonify({"error": e.message}), e.status
     except Exception as e:
         logger.error(f"DNS sorgu hatası: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/whois', methods=['GET'])
+@bp.route('/api/dns/bulk', methods=['POST'])
+@limiter.limit("10 per minute")
+def analyze_dns_bulk_route():
+    """Domain listesinin DNS kayıtlarını tek istekte sorgular: {"domains": ["a.com", "b.com"]}."""
+    try:
+        req_data = DnsBulkRequest(**(request.get_json(silent=True) or {}))
+    except ValidationError as e:
+        return jsonify({"error": "Geçersiz veri formatı", "details": e.errors()}), 400
+
+    domains, invalid = [], []
+    for domain in dict.fromkeys(d.strip().lower() for d in req_data.domains):
+        try:
+            DnsRequest(domain=domain)
+            domains.append(domain)
+        except ValidationError:
+            invalid.append({"domain": domain, "error": "Geçersiz domain adı"})
+    try:
+        return jsonify({"results": lookup_dns_bulk(domains) + invalid})
+    except Exception as e:
+        logger.error(f"Toplu DNS sorgu hatası: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/enrich/bulk', methods=['POST'])
+@limiter.limit("5 per minute")
+def enrich_bulk_route():
+    """
+    Karışık IOC listesini (IP, domain, CVE) zenginleştirir: {"iocs": [...], "whois": false, "ai_comment": false}.
+    Sonuçlar tamamlandıkça NDJSON olarak akıtılır; son satır {"summary": {...}} özetidir.
+    """
+    try:
+        req_data = EnrichBulkRequest(**(request.get_json(silent=True) or {}))
+    except ValidationError as e:
+        return jsonify({"error": "Geçersiz veri formatı", "details": e.errors()}), 400
+
+    lines = enrich.enrich_iocs(req_data.iocs, ai_manager, include_whois=req_data.whois,
+                               include_ai=req_data.ai_comment)
+    body = (json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+    return Response(stream_with_context(body), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/api/whois', methods=['GET'])
 @limiter.limit("10 per minute")
 def get_whois():
     """Domain için WHOIS bilgilerini çeker (Gelişmiş hata yönetimi ve önbellek)."""
     domain = request.args.get('domain', '').strip().lower()
     if not domain: return jsonify({"error": "Domain gerekli"}), 400
-    
-    # WHOIS sorgularında kullanıcı talebiyle önbellek kaldırıldı
 
-    import whois
     try:
-        # Bazı sistemlerde whois komutu eksik olabilir, kütüphane bunu yönetir
-        w = whois.whois(domain)
-        
-        if not w or not any(w.values()):
-            return jsonify({"error": "Whois kaydı bulunamadı veya domain geçersiz."}), 404
-
-        # Tarih formatlarını düzelt
-        def format_date(d):
-            if not d: return "Bilinmiyor"
-            if isinstance(d, list): d = d[0]
-            try:
-                return d.strftime('%Y-%m-%d %H:%M:%S') if hasattr(d, 'strftime') else str(d)
-            except:
-                return str(d)
-
-        # Name Server temizleme
-        ns_list = []
-        if w.name_servers:
-            if isinstance(w.name_servers, list):
-                ns_list = [str(ns).lower() for ns in w.name_servers if ns]
-            else:
-                ns_list = [str(w.name_servers).lower()]
-
-        result = {
-            "domain": domain,
-            "registrar": (w.registrar[0] if isinstance(w.registrar, list) else w.registrar) or "Bilinmiyor",
-            "creation_date": format_date(w.get('creation_date')),
-            "expiration_date": format_date(w.get('expiration_date')),
-            "name_servers": sorted(list(set(ns_list))),
-            "status": (w.status[0] if isinstance(w.status, list) else w.status) or "Bilinmiyor"
-        }
-        set_cache(f"whois_{domain}", result)
-        return jsonify(result)
+        return jsonify(lookup_whois(domain))
+    except LookupFailed as e:
+        return jsonify({"error": e.message}), e.status
     except Exception as e:
         logger.error(f"Whois Hatası ({domain}): {e}")
         return jsonify({"error": f"Whois bilgisi alınamadı: {str(e)}"}), 500
 
-@app.route('/api/analyze_all', methods=['POST'])
+@bp.route('/api/analyze_all', methods=['POST'])
 @limiter.limit("2 per hour")
 def trigger_bulk_analysis():
-    """Arka planda bekleyen tüm haberleri analiz eder."""
-    scheduler.add_job(func=process_missing_analysis, trigger="date")
-    return jsonify({"message": "Toplu analiz süreci başlatıldı."})
+    """Bekleyen ve başarısız (dead) tüm analiz işlerini öne alır ve worker'ı hemen uyandırır."""
+    with db.connection(DB_PATH) as conn:
+        requeued = job_queue.requeue_all(conn)
+    analysis_worker.wake()
+    return jsonify({"message": "Toplu analiz süreci başlatıldı.", "queued": requeued})
 
-@app.route('/api/subdomains', methods=['GET'])
+@bp.route('/api/subdomains', methods=['GET'])
 @limiter.limit("10 per minute")
 def get_subdomains():
-    """crt.sh üzerinden pasif subdomain keşfi (Timeout ve Hata Yönetimi)."""
+    """crt.sh üzerinden pasif subdomain keşfi (Timeout, hata yönetimi ve önbellek)."""
     domain = request.args.get('domain', '').strip().lower()
     if not domain: return jsonify({"error": "Domain gerekli"}), 400
-    
-    # Subdomain keşfinde kullanıcı talebiyle önbellek kaldırıldı
 
     try:
-        # crt.sh bazen yavaş olabilir, timeout ekliyoruz
-        url = f"https://crt.sh/?q=%25.{domain}&output=json"
-        res = requests.get(url, timeout=20)
-        
-        if res.status_code == 200:
-            try:
-                data = res.json()
-            except:
-                return jsonify({"error": "crt.sh verisi okunamadı."}), 502
-
-            if not data:
-                return jsonify({"error": f"{domain} için hiçbir sertifika kaydı bulunamadı."}), 404
-
-            # Alt alan adlarını ayıkla ve temizle
-            subs = set()
-            for entry in data:
-                name = entry.get('name_value', '')
-                # Çoklu satır (wildcard vb) olanları ayır
-                for n in name.split('\n'):
-                    n = n.strip().lower()
-                    if n.endswith(domain) and n != domain and '*' not in n:
-                        subs.add(n)
-            
-            if not subs:
-                return jsonify({"error": "Alt alan adı tespit edilemedi (Sadece ana domain kayıtlı olabilir)."}), 404
-
-            result = {
-                "domain": domain, 
-                "subdomains": sorted(list(subs))[:100] # İlk 100 tanesini sınırla
-            }
-            set_cache(f"subs_{domain}", result)
-            return jsonify(result)
-        return jsonify({"error": f"crt.sh servisi hata döndürdü: {res.status_code}"}), 502
-    except requests.exceptions.Timeout:
-        return jsonify({"error": "Sorgu zaman aşımına uğradı (crt.sh çok yavaş). Lütfen birazdan tekrar deneyin."}), 504
+        return jsonify(lookup_subdomains(domain))
+    except LookupFailed as e:
+        return jsonify({"error": e.message}), e.status
     except Exception as e:
         logger.error(f"Subdomain Hatası ({domain}): {e}")
         return jsonify({"error": "Bağlantı hatası veya geçersiz veri."}), 500
 
-if __name__ == '__main__':
+def create_app(background_jobs_enabled=None):
+    """
+    Flask uygulamasını oluşturur. Veritabanı şeması hazırlanır; arka plan görevleri (RSS taraması,
+    önbellek temizliği, analiz worker'ı) SENTINEL_BACKGROUND_JOBS=1 ise (varsayılan) başlatılır.
+    Görevler lider kilidi ile korunur: aynı veritabanını kullanan birden fazla web worker'ı veya
+    ayrı bir worker.py süreci olsa bile görevleri yalnızca bir süreç çalıştırır.
+    """
+    app = Flask(__name__)
+    limiter.init_app(app)
+    if RATELIMIT_STORAGE_URI.startswith('memory://') and int(os.getenv('WEB_CONCURRENCY', 1)) > 1:
+        logger.warning("⚠️ RATELIMIT_STORAGE_URI=memory:// ile birden fazla web worker'ı çalışıyor; hız sınırları "
+                       "worker başına uygulanır. Ortak bir depo (ör. redis://redis:6379) tanımlayın.")
+    app.register_blueprint(bp)
+
     # Veritabanını kontrol et ve gerekirse tabloları/sütunları oluştur
     init_db()
-    
-    logger.info("🚀 SentinelAi Sunucusu Başlatılıyor...")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+
+    if background_jobs_enabled is None:
+        background_jobs_enabled = os.getenv('SENTINEL_BACKGROUND_JOBS', '1') == '1'
+    if background_jobs_enabled:
+        background_jobs.start()
+    return app
+
+# 'python app.py', 'from app import app' ve 'gunicorn app:app' için varsayılan uygulama
+app = create_app()
+
+if __name__ == '__main__':
+    logger.info("🚀 SentinelAi Sunucusu Başlatılıyor (geliştirme sunucusu)...")
+    # Reloader ikinci bir süreç başlattığı için debug modu sadece FLASK_DEBUG=1 ile açılır
+    app.run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
 
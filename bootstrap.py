@@ -0,0 +1,53 @@
+"""
+Bağımlılık kontrolü
+-------------------
+requirements.txt'deki paketlerin kurulu olup olmadığını ağ erişimi olmadan kontrol eder.
+Uygulama açılışında pip çalıştırılmaz; kurulum bu komutla (veya pip install -r) açıkça yapılır.
+
+Kullanım:
+    python bootstrap.py            # Eksik paketleri listeler (eksik varsa çıkış kodu 1)
+    python bootstrap.py --install  # Sadece eksik paketleri pip ile kurar
+"""
+
+import re
+import sys
+import argparse
+import subprocess
+from importlib import metadata
+
+REQUIREMENTS_PATH = "requirements.txt"
+
+def _normalize(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def read_requirements(path=REQUIREMENTS_PATH):
+    """requirements.txt satırlarını (yorumlar ve boş satırlar hariç) döner."""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.split("#", 1)[0].strip() for line in f]
+    return [line for line in lines if line and not line.startswith("-")]
+
+def missing_requirements(requirements):
+    """Kurulu olmayan gereksinimleri döner (sürüm kısıtları pip'e bırakılır, sadece paket adı kontrol edilir)."""
+    installed = {_normalize(dist.metadata["Name"]) for dist in metadata.distributions() if dist.metadata["Name"]}
+    return [req for req in requirements
+            if _normalize(re.split(r"[\s<>=!~;\[]", req, maxsplit=1)[0]) not in installed]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SentinelAi bağımlılık kontrolü")
+    parser.add_argument("--install", action="store_true", help="Eksik paketleri pip ile kur")
+    parser.add_argument("--requirements", default=REQUIREMENTS_PATH)
+    args = parser.parse_args(argv)
+
+    missing = missing_requirements(read_requirements(args.requirements))
+    if not missing:
+        print("✅ Tüm bağımlılıklar kurulu.")
+        return 0
+
+    print(f"📦 Eksik bağımlılıklar: {', '.join(missing)}")
+    if not args.install:
+        print("   Kurmak için: python bootstrap.py --install")
+        return 1
+    return subprocess.call([sys.executable, "-m", "pip", "install", "-q", "--disable-pip-version-check", *missing])
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,169 +2,233 @@
 Bulk Categorization Script
 ---------------------------
 Veritabanındaki tüm haberleri AI ile kategorilendiren tek seferlik script.
-Kullanım: python bulk_categorize.py
+Haberler id'ye göre azalan parçalar (keyset) halinde okunur; her parçanın silme/güncellemeleri tek
+işlemde yazılır ve AI analizi gereken haberler paralel bir worker havuzuna gönderilir. Bu haberlerin
+analiz kuyruğundaki işleri önce sahiplenilir (analiz worker'ı aynı haberleri tekrar analiz etmez); sonuçlar
+işler tamamlanarak ve canlı akış / bildirim yönlendirmesine yayınlanarak kaydedilir. İşlenen son id
+kontrol noktası olarak saklandığından yarıda kalan çalışma kaldığı yerden devam eder.
+
+Kullanım:
+    python bulk_categorize.py              # Kontrol noktası varsa kaldığı yerden devam eder
+    python bulk_categorize.py --dry-run    # Hiçbir şey yazmadan yapılacakları raporlar
+    python bulk_categorize.py --restart    # Kontrol noktasını yok sayıp baştan başlar
 """
 
-import sqlite3
+import os
+import sys
 import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from core import db, job_queue
 from core.ai_manager import AIManager
+from core.classifier import extract_category, is_security_related
+from core.fetcher import store_analysis, publish_analysis
 from core.logger import setup_logger
 
 logger = setup_logger("BulkCategorize")
-DB_PATH = 'data/sentinel.db'
+DB_PATH = db.DB_PATH
+AI_BATCH_SIZE = int(os.getenv('AI_BATCH_SIZE', 8))
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 500))  # Tek seferde okunan haber sayısı
+CHECKPOINT_NAME = "bulk_categorize"
 
 # Geçerli kategori listesi
 VALID_CATEGORIES = ["Malware", "Phishing", "Ransomware", "Vulnerability", "Breach", "DDoS", "APT", "Data Leak", "General"]
 
-def extract_category(analysis_text, title=""):
-    """AI analizinden ve başlıktan kategoriyi çıkarır - geliştirilmiş versiyon."""
-    # Hem analiz hem başlığı birleştir
-    combined_text = f"{title} {analysis_text or ''}".lower()
-    
-    if not combined_text.strip():
-        return "General"
-    
-    # Öncelik sırasına göre kategorileri kontrol et
-    category_keywords = {
-        "Ransomware": ["ransomware", "fidye", "ransom"],
-        "Malware": ["malware", "trojan", "virus", "worm", "rat", "stealer", "backdoor", "spyware", "stalkerware"],
-        "Phishing": ["phishing", "phish", "sosyal mühendislik", "social engineering"],
-        "DDoS": ["ddos", "denial of service", "botnet"],
-        "APT": ["apt", "advanced persistent"],
-        "Vulnerability": ["vulnerability", "zafiyet", "cve-", "zero-day", "zero day", "exploit"],
-        "Breach": ["breach", "data leak", "veri sızıntısı", "ihlal", "leak"],
-        "Data Leak": ["data leak", "veri sızıntısı"]
-    }
-    
-    # Her kategori için anahtar kelimeleri kontrol et
-    for category, keywords in category_keywords.items():
-        for keyword in keywords:
-            if keyword in combined_text:
-                return category
-    
-    return "General"
-
-def is_security_related(title, analysis):
-    """Haberin güvenlikle alakalı olup olmadığını kontrol eder."""
-    combined = f"{title} {analysis or ''}".lower()
-    
-    # Güvenlik anahtar kelimeleri
-    security_keywords = [
-        "cyber", "security", "exploit", "cve", "vulnerability", "malware", 
-        "hack", "breach", "ransomware", "zero-day", "leak", "threat", "attack",
-        "phishing", "ddos", "botnet", "apt", "trojan", "virus", "worm", "backdoor",
-        "spyware", "güvenlik", "zafiyet", "saldırı", "tehdit", "fidye"
-    ]
-    
-    # Alakasız anahtar kelimeler (ürün incelemeleri, teknoloji haberleri vb.)
-    irrelevant_keywords = [
-        "best deal", "sale", "discount", "review", "unboxing", "hands-on",
-        "galaxy s", "iphone", "airpods", "roku", "tv", "soundbar", "air purifier",
-        "presidents' day", "black friday", "cyber monday", "gift guide"
-    ]
-    
-    # Önce alakasız mı kontrol et
-    for keyword in irrelevant_keywords:
-        if keyword in combined:
-            return False
-    
-    # Güvenlik kelimesi var mı kontrol et
-    for keyword in security_keywords:
-        if keyword in combined:
-            return True
-    
-    return False
-
-def categorize_all_news():
-    """Tüm haberleri kategorilendiren ve alakasız olanları silen ana fonksiyon."""
-    logger.info("🚀 Toplu kategorilendirme ve temizlik başlatılıyor...")
-    
-    ai_manager = AIManager()
-    conn = sqlite3.connect(DB_PATH, timeout=30)
-    conn.execute("PRAGMA journal_mode=WAL")
+def init_checkpoint_db(cursor):
+    """Kontrol noktası tablosunu oluşturur."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bulk_checkpoints (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+
+def load_checkpoint(conn, name=CHECKPOINT_NAME):
+    """Tamamlanan en küçük haber id'sini döner; kontrol noktası yoksa None."""
+    row = conn.execute("SELECT last_id FROM bulk_checkpoints WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+def save_checkpoint(cursor, last_id, name=CHECKPOINT_NAME):
+    cursor.execute(
+        "INSERT INTO bulk_checkpoints (name, last_id, updated_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at",
+        (name, last_id, time.time()))
+
+def clear_checkpoint(cursor, name=CHECKPOINT_NAME):
+    cursor.execute("DELETE FROM bulk_checkpoints WHERE name = ?", (name,))
+
+def iter_chunks(conn, before_id=None, chunk_size=BULK_CHUNK_SIZE):
+    """Haberleri id'ye göre azalan sırada, before_id'den küçük olanlardan başlayarak parça parça döner."""
+    while True:
+        where, params = ("WHERE id < ?", [before_id]) if before_id is not None else ("", [])
+        rows = conn.execute(f"""
+            SELECT id, title, link, feed_summary, ai_analysis, category, threat_level, summary, technical_details
+            FROM news {where}
+            ORDER BY id DESC
+            LIMIT ?
+        """, params + [chunk_size]).fetchall()
+        if not rows:
+            return
+        yield rows
+        before_id = rows[-1][0]
+
+def plan_chunk(rows):
+    """
+    Bir parçadaki haberler için yapılacakları belirler.
+    (silinecek id'ler, [(kategori, id)] güncellemeleri, AI analizine gidecek haberler) döner.
+    """
+    deletes, updates, pending_ai = [], [], []
+    for news_id, title, link, feed_summary, ai_analysis, current_category, threat_level, summary, details in rows:
+        # Yapılandırılmış analizi olan haberlerde metin özet ve teknik detaydan oluşur
+        if threat_level:
+            ai_analysis = f"{summary or ''} {details or ''}"
+
+        if not is_security_related(title, ai_analysis):
+            deletes.append(news_id)
+        # Sadece General veya boş kategorili haberler güncellenir
+        elif current_category in [None, '', 'General']:
+            category = extract_category(ai_analysis, title)
+            # Hâlâ General ise ve AI analizi yoksa toplu AI analizine bırakılır
+            if category == "General" and not ai_analysis:
+                pending_ai.append({"id": news_id, "title": title, "link": link or "", "content": feed_summary or ""})
+            else:
+                updates.append((category, news_id))
+    return deletes, updates, pending_ai
+
+def categorize_all_news(dry_run=False, restart=False, chunk_size=BULK_CHUNK_SIZE, ai_manager=None):
+    """
+    Tüm haberleri kategorilendiren ve alakasız olanları silen ana fonksiyon. İstatistikleri döner.
+    dry_run=True ise veritabanına yazılmaz ve AI çağrılmaz; restart=True ise kontrol noktası yok sayılır.
+    """
+    logger.info(f"🚀 Toplu kategorilendirme ve temizlik başlatılıyor...{' (deneme modu)' if dry_run else ''}")
+    started = time.monotonic()
+    stats = {"processed": 0, "updated": 0, "deleted": 0, "analyzed": 0, "errors": 0}
+
+    conn = db.get_connection(DB_PATH)
     cursor = conn.cursor()
-    
-    # Tüm haberleri çek
-    cursor.execute("""
-        SELECT id, title, ai_analysis, category 
-        FROM news 
-        ORDER BY id DESC
-    """)
-    
-    news_items = cursor.fetchall()
-    total = len(news_items)
-    
-    if total == 0:
-        logger.info("✅ İşlenecek haber bulunamadı!")
-        conn.close()
-        return
-    
-    logger.info(f"📊 Toplam {total} haber kontrol edilecek.")
-    
-    processed = 0
-    updated = 0
-    deleted = 0
-    errors = 0
-    
-    for news_id, title, ai_analysis, current_category in news_items:
-        processed += 1
-        
-        try:
-            # Güvenlikle alakalı mı kontrol et
-            if not is_security_related(title, ai_analysis):
-                logger.info(f"[{processed}/{total}] 🗑️ Alakasız haber siliniyor: {title[:60]}...")
-                cursor.execute("DELETE FROM news WHERE id = ?", (news_id,))
-                conn.commit()
-                deleted += 1
-                continue
-            
-            # Kategori kontrolü - sadece General veya boş olanları güncelle
-            if current_category in [None, '', 'General']:
-                category = extract_category(ai_analysis, title)
-                
-                # Eğer hala General ise ve AI analizi yoksa, yeni analiz yap
-                if category == "General" and not ai_analysis:
-                    logger.info(f"[{processed}/{total}] 🧠 Yeni AI analizi yapılıyor: {title[:60]}...")
-                    
-                    prompt = (
-                        f"Bu bir siber güvenlik haberi mi? Kısaca analiz et ve kategori belirt.\n"
-                        f"KATEGORI: [Malware/Phishing/Ransomware/Vulnerability/Breach/DDoS/APT/Data Leak/General]\n"
-                        f"Haber: {title}"
-                    )
-                    
-                    analysis = ai_manager.analyze(prompt)
-                    category = extract_category(analysis, title)
-                    
-                    cursor.execute(
-                        "UPDATE news SET ai_analysis = ?, category = ? WHERE id = ?",
-                        (analysis, category, news_id)
-                    )
-                    
-                    time.sleep(2)  # API rate limit koruması
-                else:
-                    # Sadece kategoriyi güncelle
-                    cursor.execute(
-                        "UPDATE news SET category = ? WHERE id = ?",
-                        (category, news_id)
-                    )
-                
-                conn.commit()
-                updated += 1
-                logger.info(f"✅ [{processed}/{total}] Güncellendi: {category}")
+    init_checkpoint_db(cursor)
+    conn.commit()
+
+    before_id = None if restart else load_checkpoint(conn)
+    if before_id is not None:
+        logger.info(f"⏯️ Kontrol noktasından devam ediliyor (id < {before_id}).")
+
+    pool = None
+    if not dry_run:
+        ai_manager = ai_manager or AIManager()
+        workers = max(1, ai_manager.total_concurrency())
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-ai")
+        max_in_flight = workers * 2
+    in_flight = {}      # future -> (parça kaydı, grup, yeniden deneme mi)
+    chunks = deque()    # [parçanın son id'si, bekleyen AI grubu sayısı]; kontrol noktası sırayla ilerler
+
+    def advance_checkpoint():
+        last_id = None
+        while chunks and chunks[0][1] == 0:
+            last_id = chunks.popleft()[0]
+        if last_id is not None:
+            save_checkpoint(cursor, last_id)
+
+    def collect(futures):
+        """Tamamlanan AI gruplarını yazar; başarısız olanlar bir kez daha denenir."""
+        for future in futures:
+            entry, batch, retried = in_flight.pop(future)
+            try:
+                results, failed = future.result()
+            except Exception as e:
+                logger.error(f"❌ Toplu analiz hatası: {e}")
+                results, failed = {}, [item['id'] for item in batch]
+            if failed and not retried:
+                retry = [item for item in batch if item['id'] in failed]
+                in_flight[pool.submit(ai_manager.analyze_json_batch, retry)] = (entry, retry, True)
+                failed = []
             else:
-                logger.info(f"[{processed}/{total}] ⏭️ Zaten kategorili: {current_category}")
-            
-        except Exception as e:
-            errors += 1
-            logger.error(f"❌ [{processed}/{total}] Hata (ID: {news_id}): {e}")
-            continue
-    
-    conn.close()
-    
+                entry[1] -= 1
+
+            if results:
+                store_analysis(cursor, results)
+                job_queue.complete(conn, list(results))
+                publish_analysis(conn, results)
+            if failed:
+                job_queue.fail(conn, {news_id: "Geçersiz veya eksik AI yanıtı" for news_id in failed})
+            stats["analyzed"] += len(results)
+            stats["errors"] += len(failed)
+        advance_checkpoint()
+        conn.commit()
+
+    try:
+        for rows in iter_chunks(conn, before_id, chunk_size):
+            deletes, updates, pending_ai = plan_chunk(rows)
+            stats["processed"] += len(rows)
+            stats["deleted"] += len(deletes)
+            stats["updated"] += len(updates)
+            entry = [rows[-1][0], 0]
+            chunks.append(entry)
+
+            if dry_run:
+                stats["analyzed"] += len(pending_ai)
+                chunks.clear()
+            else:
+                # Parçanın tüm silme/güncellemeleri tek işlemde yazılır
+                if deletes:
+                    cursor.execute(f"DELETE FROM news WHERE id IN ({','.join('?' * len(deletes))})", deletes)
+                if updates:
+                    cursor.executemany("UPDATE news SET category = ? WHERE id = ?", updates)
+                advance_checkpoint()
+                conn.commit()
+
+                # Başka bir worker'da çalışan veya tamamlanmış işlerin haberleri atlanır
+                claimed = set(job_queue.claim_ids(conn, [item['id'] for item in pending_ai])) if pending_ai else set()
+                pending_ai = [item for item in pending_ai if item['id'] in claimed]
+                for i in range(0, len(pending_ai), AI_BATCH_SIZE):
+                    while len(in_flight) >= max_in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    batch = pending_ai[i:i + AI_BATCH_SIZE]
+                    entry[1] += 1
+                    in_flight[pool.submit(ai_manager.analyze_json_batch, batch)] = (entry, batch, False)
+                collect([f for f in list(in_flight) if f.done()])
+
+            rate = stats["processed"] / max(time.monotonic() - started, 1e-6)
+            logger.info(f"📦 {stats['processed']} haber işlendi (son id: {rows[-1][0]}) | "
+                        f"Silinen: {stats['deleted']} | Güncellenen: {stats['updated']} | "
+                        f"AI bekleyen: {len(in_flight)} grup | {rate:.0f} haber/sn")
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+
+        # Çalışma tamamlandı; bir sonraki çalışma baştan başlar
+        if not dry_run:
+            clear_checkpoint(cursor)
+            conn.commit()
+    finally:
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+        conn.close()
+
+    elapsed = time.monotonic() - started
+    stats["elapsed"] = round(elapsed, 2)
+    stats["rate"] = round(stats["processed"] / max(elapsed, 1e-3), 1)
+    verb = "yapılacaktı" if dry_run else "tamamlandı"
     logger.info("=" * 60)
-    logger.info(f"🎉 İşlem tamamlandı!")
-    logger.info(f"📊 İşlenen: {processed} | Güncellenen: {updated} | Silinen: {deleted} | Hata: {errors}")
+    logger.info(f"🎉 İşlem {verb}!")
+    logger.info(f"📊 İşlenen: {stats['processed']} | Güncellenen: {stats['updated']} | Silinen: {stats['deleted']} | "
+                f"AI analizi: {stats['analyzed']} | Hata: {stats['errors']}")
+    logger.info(f"⏱️ Süre: {stats['elapsed']} sn | Hız: {stats['rate']} haber/sn")
     logger.info("=" * 60)
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SentinelAi toplu kategorilendirme")
+    parser.add_argument("--dry-run", action="store_true", help="Veritabanına yazmadan yapılacakları raporla")
+    parser.add_argument("--restart", action="store_true", help="Kontrol noktasını yok sayıp baştan başla")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="Tek seferde okunan haber sayısı")
+    args = parser.parse_args(argv)
+    categorize_all_news(dry_run=args.dry_run, restart=args.restart, chunk_size=args.chunk_size)
+    return 0
 
 if __name__ == "__main__":
-    categorize_all_news()
+    sys.exit(main())
@@ -1,13 +1,18 @@
 import os
+import sys
 import time
-import requests
+import threading
 import json
 import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
-from google import genai
-from groq import Groq
-from mistralai import Mistral
+from core import events
+from core.cache import get_cache, set_cache
+from core.http_client import get_session
 from core.logger import setup_logger
+from core.prompts import (ANALYSIS_SYSTEM_PROMPT, BATCH_ANALYSIS_SYSTEM_PROMPT, THREAT_LEVELS, VALID_CATEGORIES,
+                          generate_batch_news_prompt, generate_news_prompt)
 
 # Loglama kurulumu
 logger = setup_logger("AIManager")
@@ -15,6 +20,100 @@ logger = setup_logger("AIManager")
 # .env dosyasındaki API anahtarlarını yükle
 load_dotenv()
 
+# Sağlayıcı başına varsayılan limitler (ücretsiz katman kotalarına yakın değerler).
+# Ortam değişkenleriyle ezilebilir: AI_<SAĞLAYICI>_CONCURRENCY, AI_<SAĞLAYICI>_RPM, AI_<SAĞLAYICI>_TPM
+DEFAULT_PROVIDER_LIMITS = {
+    "gemini": {"concurrency": 4, "rpm": 15, "tpm": 1000000},
+    "groq": {"concurrency": 4, "rpm": 30, "tpm": 12000},
+    "mistral": {"concurrency": 2, "rpm": 60, "tpm": 500000},
+    "openrouter": {"concurrency": 4, "rpm": 20, "tpm": 200000},
+    "huggingface": {"concurrency": 2, "rpm": 10, "tpm": 100000}
+}
+
+# Uygun sağlayıcı bulunamadığında bir isteğin slot için en fazla bekleyeceği süre (sn)
+AI_QUEUE_TIMEOUT = float(os.getenv('AI_QUEUE_TIMEOUT', 30))
+
+# Etkileşimli (hedged) çağrılarda ilk sağlayıcının yanıtı için beklenen p95 süresi (sn);
+# bu süre aşılırsa aynı prompt bir sonraki sağlıklı sağlayıcıya da gönderilir.
+AI_HEDGE_BUDGET = float(os.getenv('AI_HEDGE_BUDGET', 4))
+
+# Geçerli analiz yanıtlarının (normalize prompt hash'i ile) önbellekte tutulma süresi (sn)
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 30 * 86400))
+
+def __getattr__(name):
+    """
+    Sağlayıcı SDK'ları (genai, Groq, Mistral) modül özniteliği olarak ilk kullanımda yüklenir.
+    Birlikte ~1sn süren bu importlar uygulama açılışını ve SDK kullanmayan süreçleri yavaşlatmaz.
+    """
+    if name == "genai":
+        from google import genai as sdk
+    elif name == "Groq":
+        from groq import Groq as sdk
+    elif name == "Mistral":
+        from mistralai import Mistral as sdk
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = sdk
+    return sdk
+
+class TokenBucket:
+    """Dakikalık kota (istek veya token) için sürekli dolan basit token bucket."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, amount):
+        """İstenen miktar şu an karşılanabiliyor mu? (Kapasiteden büyük istekler kapasiteye kırpılır, 0 kota = kapalı.)"""
+        if self.capacity <= 0:
+            return False
+        self._refill()
+        return self.tokens >= min(amount, self.capacity)
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+    def wait_time(self, amount):
+        """İstenen miktar için gereken tahmini bekleme süresi (sn)."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate) if self.rate else float('inf')
+
+class ProviderSlot:
+    """Tek bir AI sağlayıcısının eşzamanlılık limiti ile istek/token kotalarını takip eder."""
+
+    def __init__(self, name, concurrency, rpm, tpm):
+        self.name = name
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def try_acquire(self, token_estimate):
+        """Boş slot ve yeterli kota varsa isteği kaydeder ve True döner (kilit altında çağrılmalı)."""
+        if self.in_flight >= self.concurrency:
+            return False
+        if not (self.requests.available(1) and self.tokens.available(token_estimate)):
+            return False
+        self.requests.take(1)
+        self.tokens.take(token_estimate)
+        self.in_flight += 1
+        return True
+
+    def wait_time(self, token_estimate):
+        """Kota nedeniyle beklenmesi gereken süre (eşzamanlılık dolu ise 0 döner, bırakılınca uyandırılır)."""
+        return max(self.requests.wait_time(1), self.tokens.wait_time(token_estimate))
+
+    def load(self):
+        return self.in_flight / self.concurrency
+
 class AIManager:
     """
     SentinelAi'nın beyin motoru: Birden fazla AI servisini (Gemini, Groq, Mistral vb.) 
@@ -22,6 +121,16 @@ class AIManager:
     """
     # Sınıf seviyesinde paylaşımlı durum takibi (Background task ve App arası senkronizasyon için)
     _shared_cooldowns = {}
+    _shared_failures = {}
+    # Sağlayıcı slotları ve bunları koruyan koşul değişkeni (tüm AIManager örnekleri arasında ortak)
+    _slots = {}
+    _slot_condition = threading.Condition()
+    # Hedged isteklerin paralel çalıştığı havuz; kaybeden çağrılar burada tamamlanıp yok sayılır
+    _hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ai-hedge")
+    # Uzun ömürlü SDK istemcileri (servis, anahtar) -> istemci; her çağrıda yeniden oluşturulmaz
+    _clients = {}
+    _client_builds = {}
+    _client_lock = threading.Lock()
 
     def __init__(self):
         """
@@ -40,8 +149,112 @@ class AIManager:
         # Paylaşımlı cooldown sözlüğünü ilk kez oluştur
         if not AIManager._shared_cooldowns:
             AIManager._shared_cooldowns = {service: 0 for service in self.order}
-        
-        self.cooldown_duration = 300  # 5 dakika soğuma süresi
+
+        with AIManager._slot_condition:
+            if not AIManager._slots:
+                AIManager._slots = {service: self._build_slot(service) for service in self.order}
+
+        self.cooldown_duration = 300  # En uzun soğuma süresi (5 dakika)
+        self.base_cooldown = 30       # İlk hatada uygulanan soğuma süresi, ardışık hatalarda ikiye katlanır
+
+    @staticmethod
+    def _build_slot(service):
+        """Sağlayıcı limitlerini varsayılanlardan ve ortam değişkenlerinden okuyarak slot oluşturur."""
+        limits = DEFAULT_PROVIDER_LIMITS[service]
+        def limit(field):
+            return int(os.getenv(f"AI_{service.upper()}_{field.upper()}", limits[field]))
+        return ProviderSlot(service, max(1, limit("concurrency")), limit("rpm"), limit("tpm"))
+
+    def _available_services(self):
+        """Anahtarı olan ve soğumada olmayan sağlayıcılar (öncelik sırasıyla)."""
+        now = time.time()
+        return [s for s in self.order
+                if (self.keys.get(s) or s == "huggingface") and now >= AIManager._shared_cooldowns.get(s, 0)]
+
+    def total_concurrency(self):
+        """Sağlıklı sağlayıcıların toplam eşzamanlılık limiti (toplu işlerde paralellik üst sınırı)."""
+        return sum(AIManager._slots[s].concurrency for s in self._available_services()) or 1
+
+    def _acquire_provider(self, candidates, token_estimate, deadline):
+        """
+        Adaylar arasından boş slotu ve kotası olan, en az yüklü sağlayıcıyı seçer (eşitlikte öncelik sırası).
+        Hiçbiri uygun değilse bir slot boşalana veya kota dolana kadar bekler; süre dolarsa None döner.
+        """
+        with AIManager._slot_condition:
+            while True:
+                ranked = sorted(candidates, key=lambda s: (AIManager._slots[s].load(), candidates.index(s)))
+                for service in ranked:
+                    if AIManager._slots[service].try_acquire(token_estimate):
+                        return service
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                # Kota hiçbir adayda süre dolmadan yenilenmeyecekse boşuna bekleme
+                shortest = min(AIManager._slots[s].wait_time(token_estimate) for s in candidates)
+                if shortest > remaining:
+                    return None
+                # Sadece eşzamanlılık doluysa slot bırakıldığında notify ile uyanılır
+                AIManager._slot_condition.wait(timeout=min(remaining, shortest or 1.0, 1.0))
+
+    def _release_provider(self, service):
+        with AIManager._slot_condition:
+            AIManager._slots[service].in_flight -= 1
+            AIManager._slot_condition.notify_all()
+
+    def _mark_failure(self, service):
+        """Hata alan servisi ardışık hata sayısına göre artan sürelerle soğumaya alır."""
+        failures = AIManager._shared_failures.get(service, 0) + 1
+        AIManager._shared_failures[service] = failures
+        duration = min(self.base_cooldown * (2 ** (failures - 1)), self.cooldown_duration)
+        AIManager._shared_cooldowns[service] = time.time() + duration
+        # Açık canlı akışlar sağlayıcı durumunu yeniden gönderir
+        events.notify()
+
+    @property
+    def session(self):
+        """HTTP tabanlı sağlayıcılar için paylaşılan keep-alive oturumu."""
+        return get_session()
+
+    def _get_client(self, service):
+        """
+        Servisin SDK istemcisini döner; (servis, anahtar) başına bir kez oluşturulup tüm thread'lerde paylaşılır.
+        SDK istemcileri kendi HTTP bağlantı havuzlarını tuttuğu için bağlantılar da yeniden kullanılır.
+        """
+        cache_key = (service, self.keys.get(service))
+        client = AIManager._clients.get(cache_key)
+        if client is not None:
+            return client
+        with AIManager._client_lock:
+            client = AIManager._clients.get(cache_key)
+            if client is None:
+                sdk = sys.modules[__name__]
+                if service == "gemini": client = sdk.genai.Client(api_key=self.keys["gemini"])
+                elif service == "groq": client = sdk.Groq(api_key=self.keys["groq"], timeout=20)
+                elif service == "mistral": client = sdk.Mistral(api_key=self.keys["mistral"], timeout_ms=20000)
+                AIManager._clients[cache_key] = client
+                AIManager._client_builds[service] = AIManager._client_builds.get(service, 0) + 1
+        return client
+
+    def get_client_stats(self):
+        """Hangi SDK istemcilerinin oluşturulduğunu ve kaç kez oluşturulduklarını döner."""
+        return {service: {"builds": AIManager._client_builds.get(service, 0)} for service in ("gemini", "groq", "mistral")}
+
+    def get_provider_stats(self):
+        """Sağlayıcı başına limit, anlık eşzamanlılık ve kalan kota bilgilerini döner."""
+        stats = {}
+        with AIManager._slot_condition:
+            for service, slot in AIManager._slots.items():
+                slot.requests._refill()
+                slot.tokens._refill()
+                stats[service] = {
+                    "concurrency": slot.concurrency,
+                    "in_flight": slot.in_flight,
+                    "rpm_remaining": int(slot.requests.tokens),
+                    "tpm_remaining": int(slot.tokens.tokens),
+                    "consecutive_failures": AIManager._shared_failures.get(service, 0)
+                }
+        return stats
 
     def get_status(self):
         """
@@ -58,17 +271,22 @@ class AIManager:
                 status[service] = "active"
         return status
 
-    def analyze(self, prompt, use_load_balance=False, system_prompt=None):
+    def analyze(self, prompt, use_load_balance=False, system_prompt=None, hedge=False):
         """
         Verilen metni mevcut AI servislerini deneyerek analiz eder.
-        use_load_balance=True ise servisleri sırayla değil, farklı servisleri deneyecek şekilde dağıtır.
+        Her istek, eşzamanlılık limiti ve dakikalık kotası uygun olan en az yüklü sağlayıcıya gider;
+        böylece eşzamanlı çağrılar tüm sağlıklı sağlayıcılara aynı anda dağılır. Hata alan sağlayıcı
+        soğumaya alınır ve istek bir sonraki uygun sağlayıcıyla tekrarlanır.
+        use_load_balance=True ise eşit yükteki sağlayıcılar arasında öncelik sırası kaydırılır.
+        hedge=True (kullanıcıya dönük çağrılar) ise ilk sağlayıcı AI_HEDGE_BUDGET içinde yanıt vermezse
+        aynı prompt bir sonraki sağlayıcıya da gönderilir ve ilk geçerli yanıt kullanılır.
         system_prompt opsiyonel olarak eklenebilir.
         """
-        current_time = time.time()
-        
         full_prompt = prompt
         if system_prompt:
             full_prompt = f"{system_prompt}\n\nUser Input:\n{prompt}"
+        # Kaba token tahmini (~4 karakter = 1 token) + yanıt payı
+        token_estimate = len(full_prompt) // 4 + 500
 
         # Deneme listesini oluştur
         test_order = self.order.copy()
@@ -77,66 +295,241 @@ class AIManager:
             shift = int(time.time() % len(self.order))
             test_order = self.order[shift:] + self.order[:shift]
 
-        for service in test_order:
-            if not self.keys.get(service) and service != "huggingface": continue
-            if current_time < AIManager._shared_cooldowns.get(service, 0): continue
-            
-            try:
-                # Servisler arası çok hızlı geçişi önlemek için kısa mola
-                time.sleep(1.0) 
-                
-                logger.info(f"🤖 AI Deneniyor: {service.upper()}")
-                if service == "gemini": result = self._call_gemini(full_prompt)
-                elif service == "groq": result = self._call_groq(full_prompt)
-                elif service == "mistral": result = self._call_mistral(full_prompt)
-                elif service == "openrouter": result = self._call_openrouter(full_prompt)
-                elif service == "huggingface": result = self._call_huggingface(full_prompt)
-                
-                if result and "HATA:" not in result:
-                    logger.info(f"✅ {service.upper()} başarılı.")
-                    return result # Raw result döndür, imza işini çağıran yere bırakabiliriz veya format json ise dokunma
-                else:
-                    raise Exception(result)
-
-            except Exception as e:
-                logger.warning(f"⚠️ {service.upper()} Hatası: {str(e)}")
-                # Hata alan servisi paylaşımlı durumda engelle
-                AIManager._shared_cooldowns[service] = current_time + self.cooldown_duration
-                continue
+        if hedge:
+            result = self._analyze_hedged(full_prompt, test_order, token_estimate)
+        else:
+            result = self._analyze_sequential(full_prompt, test_order, token_estimate)
+        if result is not None:
+            return result
 
         logger.error("❌ Tüm AI servisleri şu an ulaşılamaz durumda.")
         return "HATA: Tüm AI servisleri şu an ulaşılamaz durumda."
 
-    def analyze_json(self, prompt, system_prompt):
+    def _next_candidates(self, test_order, tried):
+        available = self._available_services()
+        return [s for s in test_order if s in available and s not in tried]
+
+    def _analyze_sequential(self, full_prompt, test_order, token_estimate):
+        """Sağlayıcıları tek tek dener (arka plan toplu işler için ucuz politika)."""
+        deadline = time.monotonic() + AI_QUEUE_TIMEOUT
+        tried = set()
+        while True:
+            candidates = self._next_candidates(test_order, tried)
+            if not candidates:
+                return None
+
+            service = self._acquire_provider(candidates, token_estimate, deadline)
+            if service is None:
+                logger.warning("⏳ Uygun AI sağlayıcı slotu zamanında boşalmadı.")
+                return None
+            tried.add(service)
+
+            result = self._try_service(service, full_prompt)
+            if result is not None:
+                return result
+
+    def _analyze_hedged(self, full_prompt, test_order, token_estimate):
+        """
+        Gecikme odaklı politika: ilk sağlayıcı bütçe içinde yanıt vermezse veya hata verirse
+        bir sonraki sağlayıcı da başlatılır. İlk geçerli yanıt döner, yavaş kalan çağrılar yok sayılır.
+        """
+        deadline = time.monotonic() + AI_QUEUE_TIMEOUT
+        tried = set()
+        pending = {}
+        last_launch = None
+        while True:
+            now = time.monotonic()
+            if not pending or now - last_launch >= AI_HEDGE_BUDGET:
+                candidates = self._next_candidates(test_order, tried)
+                # Zaten bekleyen bir çağrı varsa slot için beklenmez, sadece hemen uygun olan denenir
+                service = self._acquire_provider(candidates, token_estimate, deadline if not pending else now) if candidates else None
+                if service:
+                    tried.add(service)
+                    if pending:
+                        logger.info(f"⏱️ Yanıt {AI_HEDGE_BUDGET}sn içinde gelmedi, {service.upper()} paralel deneniyor.")
+                    pending[AIManager._hedge_pool.submit(self._try_service, service, full_prompt)] = service
+                    last_launch = time.monotonic()
+                elif not pending:
+                    return None
+
+            more_candidates = bool(self._next_candidates(test_order, tried))
+            # Bütçe dolduğu halde slot alınamadıysa döngü boşa dönmesin diye kısa bir alt sınır uygulanır
+            timeout = max(0.05, last_launch + AI_HEDGE_BUDGET - time.monotonic()) if more_candidates else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                result = future.result()
+                if result is not None:
+                    return result
+                # Başarısız olan çağrının yerine bütçeyi beklemeden bir sonrakini başlat
+                last_launch = -AI_HEDGE_BUDGET
+
+    def _try_service(self, service, full_prompt):
+        """
+        Slotu alınmış tek bir sağlayıcıyı çağırır ve slotu bırakır.
+        Başarılıysa ham yanıtı, başarısızsa (sağlayıcıyı soğumaya alarak) None döner.
+        """
+        try:
+            logger.info(f"🤖 AI Deneniyor: {service.upper()}")
+            result = self._call_service(service, full_prompt)
+
+            if result and "HATA:" not in result:
+                if AIManager._shared_failures.get(service):
+                    events.notify()
+                AIManager._shared_failures[service] = 0
+                logger.info(f"✅ {service.upper()} başarılı.")
+                return result # Raw result döndür, imza işini çağıran yere bırakabiliriz veya format json ise dokunma
+            else:
+                raise Exception(result)
+
+        except Exception as e:
+            logger.warning(f"⚠️ {service.upper()} Hatası: {str(e)}")
+            # Hata alan servisi paylaşımlı durumda engelle
+            self._mark_failure(service)
+            return None
+        finally:
+            self._release_provider(service)
+
+    def _call_service(self, service, prompt):
+        """Servis adına göre ilgili sağlayıcı çağrısını yapar."""
+        if service == "gemini": return self._call_gemini(prompt)
+        elif service == "groq": return self._call_groq(prompt)
+        elif service == "mistral": return self._call_mistral(prompt)
+        elif service == "openrouter": return self._call_openrouter(prompt)
+        elif service == "huggingface": return self._call_huggingface(prompt)
+        return f"HATA: Bilinmeyen servis {service}"
+
+    def analyze_json(self, prompt, system_prompt, hedge=False):
         """
         AI çıktısını JSON olarak almaya çalışır ve parse eder.
-        Geriye dict döner veya None döner.
+        Geriye dict döner veya None döner. hedge=True kullanıcıya dönük çağrılar içindir (bkz. analyze).
+        Geçerli analiz yanıtları normalize edilmiş prompt hash'i ile önbelleğe alınır; aynı prompt
+        tekrar geldiğinde AI çağrısı yapılmaz.
         """
-        raw_result = self.analyze(prompt, system_prompt=system_prompt)
+        cache_key = self.response_cache_key(system_prompt, prompt)
+        cached = get_cache(cache_key)
+        if cached:
+            return cached
+
+        raw_result = self.analyze(prompt, system_prompt=system_prompt, hedge=hedge)
         
         if raw_result and "HATA:" in raw_result:
             return None
 
         # JSON temizleme ve parse etme
         try:
-            # Markdown code block temizliği
-            cleaned = re.sub(r"```json\s*|\s*```", "", raw_result, flags=re.IGNORECASE).strip()
-            # Bazen başında/sonunda yazı olabilir, ilk { ve son } arasını al
-            start = cleaned.find('{')
-            end = cleaned.rfind('}')
-            if start != -1 and end != -1:
-                cleaned = cleaned[start:end+1]
-            
-            return json.loads(cleaned)
+            result = self._extract_json(raw_result, '{', '}')
         except json.JSONDecodeError as e:
             logger.error(f"JSON Parse Hatası: {e} | Raw: {raw_result[:100]}...")
             return None
 
+        # Sadece şemaya uyan analizler önbelleğe alınır (hatalı yanıtlar sabitlenmesin)
+        if self.validate_analysis(result):
+            set_cache(cache_key, result, duration=LLM_CACHE_TTL)
+        return result
+
+    @staticmethod
+    def response_cache_key(system_prompt, prompt):
+        """Boşlukları ve büyük/küçük harfi normalize edilmiş prompt'un içerik adresli önbellek anahtarı."""
+        normalized = re.sub(r"\s+", " ", f"{system_prompt or ''}\n{prompt}").strip().lower()
+        return "llm_" + hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def analyze_json_batch(self, items, system_prompt=BATCH_ANALYSIS_SYSTEM_PROMPT):
+        """
+        Birden fazla haberi tek bir prompt ile analiz eder.
+        items: [{"id": ..., "title": ..., "link": ..., "content": ...}] listesi.
+        Geriye (sonuçlar, başarısızlar) döner: sonuçlar {id: doğrulanmış analiz dict},
+        başarısızlar ise yeniden kuyruğa alınması gereken id listesidir.
+        """
+        if not items:
+            return {}, []
+
+        # Önbellekte analizi bulunan haberler AI'a hiç gönderilmez. Anahtar, tekil analyze_json
+        # çağrısının kullandığı prompt ile aynıdır; böylece iki yol aynı önbelleği paylaşır.
+        results = {}
+        cache_keys = {}
+        for item in items:
+            key = self.response_cache_key(
+                ANALYSIS_SYSTEM_PROMPT, generate_news_prompt(item['title'], item.get('link', ''), content=item.get('content') or ''))
+            cached = self.validate_analysis(get_cache(key))
+            if cached:
+                results[item['id']] = cached
+            else:
+                cache_keys[item['id']] = key
+        items = [item for item in items if item['id'] in cache_keys]
+        if not items:
+            return results, []
+
+        ids = [item['id'] for item in items]
+        raw_result = self.analyze(generate_batch_news_prompt(items), system_prompt=system_prompt)
+        if not raw_result or "HATA:" in raw_result:
+            return results, ids
+
+        try:
+            parsed = self._extract_json(raw_result, '[', ']')
+        except json.JSONDecodeError as e:
+            logger.error(f"Toplu JSON Parse Hatası: {e} | Raw: {raw_result[:100]}...")
+            return results, ids
+
+        # Bazı modeller diziyi bir anahtar altında döndürebilir ({"results": [...]})
+        if isinstance(parsed, dict):
+            parsed = next((v for v in parsed.values() if isinstance(v, list)), [parsed])
+
+        # Model id'yi sayı veya metin olarak döndürebilir, string üzerinden eşleştir
+        by_key = {str(i): i for i in ids}
+        for element in parsed if isinstance(parsed, list) else []:
+            if not isinstance(element, dict):
+                continue
+            item_id = by_key.get(str(element.get('id')))
+            analysis = self.validate_analysis(element)
+            if item_id is not None and analysis and item_id not in results:
+                results[item_id] = analysis
+                set_cache(cache_keys[item_id], analysis, duration=LLM_CACHE_TTL)
+
+        failed = [i for i in ids if i not in results]
+        if failed:
+            logger.warning(f"⚠️ Toplu analizde {len(failed)}/{len(ids)} haber geçersiz veya eksik döndü.")
+        return results, failed
+
+    @staticmethod
+    def validate_analysis(data):
+        """
+        Tek bir analiz nesnesini doğrular ve normalize eder.
+        Tehdit seviyesi veya özet geçersizse None döner; bilinmeyen kategori 'General' olur.
+        """
+        if not isinstance(data, dict):
+            return None
+        threat = str(data.get('threat_level', '')).strip().upper()
+        summary = data.get('summary')
+        if threat not in THREAT_LEVELS or not isinstance(summary, str) or not summary.strip():
+            return None
+
+        category = str(data.get('category', '')).strip()
+        category = next((c for c in VALID_CATEGORIES if c.lower() == category.lower()), "General")
+        details = data.get('technical_details') or 'N/A'
+        return {
+            "threat_level": threat,
+            "category": category,
+            "summary": summary.strip(),
+            "technical_details": details if isinstance(details, str) else json.dumps(details, ensure_ascii=False)
+        }
+
+    @staticmethod
+    def _extract_json(raw_result, open_char, close_char):
+        """Markdown kod bloklarını temizleyip ilk açılış ile son kapanış karakteri arasını parse eder."""
+        # Markdown code block temizliği
+        cleaned = re.sub(r"```json\s*|\s*```", "", raw_result, flags=re.IGNORECASE).strip()
+        # Bazen başında/sonunda yazı olabilir, ilk açılış ve son kapanış arasını al
+        start = cleaned.find(open_char)
+        end = cleaned.rfind(close_char)
+        if start != -1 and end != -1:
+            cleaned = cleaned[start:end+1]
+        return json.loads(cleaned)
 
     def _call_gemini(self, prompt):
         """Google Gemini 2.0 API üzerinden analiz yapar."""
         try:
-            client = genai.Client(api_key=self.keys["gemini"])
+            client = self._get_client("gemini")
             # Gemini 2.0 Flash JSON modu destekler ama basit text generation kullanalım şimdilik
             return client.models.generate_content(model="gemini-2.0-flash", contents=prompt).text
         except Exception as e:
@@ -145,7 +538,7 @@ class AIManager:
     def _call_groq(self, prompt):
         """Groq (Llama-3.3) API üzerinden yüksek hızlı analiz yapar."""
         try:
-            client = Groq(api_key=self.keys["groq"])
+            client = self._get_client("groq")
             res = client.chat.completions.create(model="llama-3.3-70b-versatile", messages=[{"role": "user", "content": prompt}])
             return res.choices[0].message.content
         except Exception as e:
@@ -154,7 +547,7 @@ class AIManager:
     def _call_mistral(self, prompt):
         """Mistral AI (Large-Latest) üzerinden analiz yapar."""
         try:
-            client = Mistral(api_key=self.keys["mistral"])
+            client = self._get_client("mistral")
             res = client.chat.complete(model="mistral-large-latest", messages=[{"role": "user", "content": prompt}])
             return res.choices[0].message.content
         except Exception as e:
@@ -165,7 +558,7 @@ class AIManager:
         try:
             headers = {"Authorization": f"Bearer {self.keys['openrouter']}", "Content-Type": "application/json"}
             payload = {"model": "google/gemini-2.0-flash-001", "messages": [{"role": "user", "content": prompt}]}
-            res = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=20)
+            res = self.session.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=20)
             if res.status_code == 200:
                 return res.json()['choices'][0]['message']['content']
             return f"HATA: HTTP {res.status_code}"
@@ -180,7 +573,7 @@ class AIManager:
             headers = {"Content-Type": "application/json"}
             if self.keys['huggingface']: headers["Authorization"] = f"Bearer {self.keys['huggingface']}"
             payload = {"inputs": prompt, "parameters": {"max_new_tokens": 500}}
-            res = requests.post(url, headers=headers, json=payload, timeout=20)
+            res = self.session.post(url, headers=headers, json=payload, timeout=20)
             if res.status_code == 200:
                 data = res.json()
                 if isinstance(data, list) and 'generated_text' in data[0]: return data[0]['generated_text']
@@ -1,6 +1,6 @@
-import requests
 import os
 import json
+from core.http_client import get_session
 
 class SentinelBrain:
     def __init__(self):
@@ -47,7 +47,7 @@ class SentinelBrain:
         }
 
         try:
-            response = requests.post(
+            response = get_session().post(
                 self.api_url, 
                 headers=headers, 
                 data=json.dumps(payload),
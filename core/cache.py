@@ -1,49 +1,283 @@
-import sqlite3
+"""
+Katmanlı önbellek
+-----------------
+Sınırlı boyutlu bir bellek içi LRU/TTL katmanı, kalıcı SQLite (intelligence_cache) katmanının
+önünde çalışır. SQLite bağlantısı süreç boyunca açık tutulur ve tablo bir kez oluşturulur;
+bellekteki isabetlerde JSON çözümleme yapılmaz. Süresi dolan kayıtlar sweep_expired() ile
+(uygulamada zamanlanmış görev olarak) temizlenir. "Bulunamadı" yanıtları set_negative_cache()
+ile daha kısa süreliğine önbelleğe alınır. cached_lookup() aynı anahtar için eşzamanlı dış
+sorguları tek bir uçuşta birleştirir (single-flight) ve süresi dolmak üzere olan kayıtları
+arka planda yeniler (stale-while-revalidate).
+"""
+
+import os
 import time
 import json
+import threading
+from collections import OrderedDict
+from core import db
 from core.logger import setup_logger
 
 logger = setup_logger("Cache")
-DB_PATH = 'data/sentinel.db'
+DB_PATH = db.DB_PATH
+
+CACHE_MEMORY_SIZE = int(os.getenv('CACHE_MEMORY_SIZE', 1024))        # Bellek katmanındaki en fazla anahtar
+NEGATIVE_CACHE_TTL = int(os.getenv('NEGATIVE_CACHE_TTL', 3600))      # "Bulunamadı" yanıtlarının süresi (sn)
+CACHE_SWEEP_INTERVAL = int(os.getenv('CACHE_SWEEP_INTERVAL', 10))    # Süresi dolanları temizleme aralığı (dk)
+# Kaydın ömrünün bu oranı geçildikten sonraki isabetlerde arka planda yenileme başlatılır
+CACHE_REFRESH_AHEAD = float(os.getenv('CACHE_REFRESH_AHEAD', 0.8))
+
+class TieredCache:
+    """Bellek içi LRU katmanı + kalıcı SQLite katmanı. Tüm metotlar thread-safe'dir."""
+
+    def __init__(self, max_entries=CACHE_MEMORY_SIZE):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # key -> (expiry, data)
+        self._lock = threading.RLock()
+        self._conn = None
+        self._db_path = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0,
+                       "evictions": 0, "swept": 0, "negative_hits": 0, "sets": 0,
+                       "coalesced": 0, "refreshes": 0}
+
+    def _connection(self):
+        # DB_PATH değişirse (ör. testlerde) yeni veritabanına geçilir ve bellek katmanı boşaltılır
+        if self._conn is None or self._db_path != DB_PATH:
+            if self._conn is not None:
+                self._conn.dispose()
+            # Önbellek tüm thread'lerin kilit altında paylaştığı tek bir bağlantı kullanır
+            self._conn = db.connect(DB_PATH, check_same_thread=False)
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS intelligence_cache (
+                    key TEXT PRIMARY KEY,
+                    data TEXT,
+                    expiry INTEGER
+                )
+            ''')
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expiry ON intelligence_cache(expiry)")
+            self._conn.commit()
+            self._db_path = DB_PATH
+            self._memory.clear()
+        return self._conn
+
+    def _remember(self, key, expiry, data):
+        self._memory[key] = (expiry, data)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key):
+        """
+        Önce bellek, sonra SQLite katmanına bakar; süresi dolmuşsa None döner.
+        Dönen nesne önbellekle paylaşılır, çağıran tarafından değiştirilmemelidir.
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_entry(self, key):
+        """get() gibi çalışır ancak (veri, son_geçerlilik_zamanı) ikilisi döner."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now < entry[0]:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return self._hit(entry[1]), entry[0]
+                del self._memory[key]
+
+            row = conn.execute("SELECT data, expiry FROM intelligence_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            data_str, expiry = row
+            if now >= expiry:
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                logger.info(f"⌛ Önbellek süresi dolmuş: {key}")
+                return None
+
+            data = json.loads(data_str)
+            self._remember(key, expiry, data)
+            self._stats["disk_hits"] += 1
+            logger.info(f"✅ Önbellek isabeti: {key}")
+            return self._hit(data), expiry
+
+    def _hit(self, data):
+        if is_negative(data):
+            self._stats["negative_hits"] += 1
+        return data
+
+    def set(self, key, data, duration):
+        expiry = int(time.time()) + duration
+        with self._lock:
+            conn = self._connection()
+            conn.execute("INSERT OR REPLACE INTO intelligence_cache (key, data, expiry) VALUES (?, ?, ?)",
+                         (key, json.dumps(data), expiry))
+            conn.commit()
+            self._remember(key, expiry, data)
+            self._stats["sets"] += 1
+
+    def delete(self, key):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM intelligence_cache WHERE key = ?", (key,))
+            conn.commit()
+            self._memory.pop(key, None)
+
+    def sweep(self):
+        """Süresi dolmuş kayıtları her iki katmandan siler ve silinen satır sayısını döner."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            removed = conn.execute("DELETE FROM intelligence_cache WHERE expiry <= ?", (int(now),)).rowcount
+            conn.commit()
+            for key in [k for k, (expiry, _) in self._memory.items() if expiry <= now]:
+                del self._memory[key]
+            self._stats["swept"] += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_capacity"] = self.max_entries
+            if self._conn is not None:
+                stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM intelligence_cache").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0
+        return stats
+
+    def count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.dispose()
+                self._conn = None
+            self._memory.clear()
+
+class LookupFailed(Exception):
+    """Dış sorgunun kullanıcıya dönülecek hatası. status=404 olanlar negatif önbelleğe alınır."""
+
+    def __init__(self, message, status=502):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Aynı anahtar için eşzamanlı çağrıları birleştirir: fn bir kez çalışır, bekleyenler sonucunu paylaşır."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            _cache.count("coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+_cache = TieredCache()
+_flights = SingleFlight()
 
 def init_cache_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS intelligence_cache (
-            key TEXT PRIMARY KEY,
-            data TEXT,
-            expiry INTEGER
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    """Önbellek tablosunu oluşturur (bağlantı açıkken tekrar çalışmaz)."""
+    with _cache._lock:
+        _cache._connection()
 
 def set_cache(key, data, duration=86400):
     """Veriyi belirtilen süre boyunca (varsayılan 24 saat) önbelleğe alır."""
-    init_cache_db()
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    expiry = int(time.time()) + duration
-    cursor.execute("INSERT OR REPLACE INTO intelligence_cache (key, data, expiry) VALUES (?, ?, ?)", 
-                   (key, json.dumps(data), expiry))
-    conn.commit()
-    conn.close()
+    _cache.set(key, data, duration)
 
 def get_cache(key):
     """Önbellekten veri çeker, süresi dolmuşsa None döner."""
-    init_cache_db()
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT data, expiry FROM intelligence_cache WHERE key = ?", (key,))
-    row = cursor.fetchone()
-    conn.close()
-    
-    if row:
-        data_str, expiry = row
-        if time.time() < expiry:
-            logger.info(f"✅ Önbellek isabeti: {key}")
-            return json.loads(data_str)
-        else:
-            logger.info(f"⌛ Önbellek süresi dolmuş: {key}")
-    return None
+    return _cache.get(key)
+
+def set_negative_cache(key, error, duration=NEGATIVE_CACHE_TTL):
+    """'Bulunamadı' yanıtını kısa süreliğine önbelleğe alır; dış servis tekrar sorgulanmaz."""
+    _cache.set(key, {"error": error, "negative": True}, duration)
+
+def is_negative(data):
+    """Önbellek kaydının negatif ('bulunamadı') bir yanıt olup olmadığını döner."""
+    return isinstance(data, dict) and data.get("negative") is True
+
+def delete_cache(key):
+    _cache.delete(key)
+
+def sweep_expired():
+    """Süresi dolmuş önbellek kayıtlarını temizler (zamanlanmış görev)."""
+    removed = _cache.sweep()
+    if removed:
+        logger.info(f"🧹 {removed} süresi dolmuş önbellek kaydı silindi.")
+    return removed
+
+def cached_lookup(key, fetch, ttl):
+    """
+    Önbellekli dış sorgu. Iskada fetch() aynı anahtar için tek bir uçuşta çalıştırılır ve sonucu
+    ttl saniye saklanır; 404 durumlu LookupFailed negatif önbelleğe alınır. Ömrünün
+    CACHE_REFRESH_AHEAD oranını geçmiş isabetler hemen dönülür ve kayıt arka planda yenilenir.
+    """
+    def load():
+        try:
+            result = fetch()
+        except LookupFailed as e:
+            if e.status == 404:
+                set_negative_cache(key, e.message)
+            raise
+        set_cache(key, result, duration=ttl)
+        return result
+
+    entry = _cache.get_entry(key)
+    if entry is None:
+        return _flights.do(key, load)
+
+    data, expiry = entry
+    if is_negative(data):
+        raise LookupFailed(data['error'], 404)
+    if expiry - time.time() < ttl * (1 - CACHE_REFRESH_AHEAD) and not _flights.in_flight(key):
+        _cache.count("refreshes")
+        threading.Thread(target=_refresh, args=(key, load), name=f"refresh-{key}", daemon=True).start()
+    return data
+
+def _refresh(key, load):
+    try:
+        _flights.do(key, load)
+    except Exception as e:
+        logger.warning(f"⚠️ Arka plan önbellek yenilemesi başarısız ({key}): {e}")
+
+def get_cache_stats():
+    """İsabet/ıska/tahliye sayaçlarını ve katman doluluklarını döner."""
+    return _cache.stats()
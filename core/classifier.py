@@ -0,0 +1,216 @@
+"""
+Anahtar kelime sınıflandırıcı
+-----------------------------
+Güvenlik filtresi, alakasız haber tespiti, acil bildirim ve kategori anahtar kelimelerinin tamamı
+tek bir düzenli ifadeye derlenir. Kelimeler ortak önekleri paylaşan bir ağaç (trie) olarak yazıldığından
+metin tek geçişte taranır ve her konumda yalnızca o harfle başlayan kelimeler denenir.
+
+- Metin ve kelimeler Türkçe büyük/küçük harf katlamasıyla karşılaştırılır ("VAKIFBANK" = "Vakıfbank").
+- Kelimeler sözcük başında eşleşir ("hack" -> "hackers", ama "rat" -> "pirate" değil);
+  3 harf ve daha kısa kelimeler ("apt", "rat", "tv", "cve") yalnızca tam sözcük olarak eşleşir.
+- Bir kelimenin içinde kalan kelimeler de raporlanır: "data leak" hem "data leak" hem "leak" bulur.
+
+Karşılaştırmalı ölçüm: python -m core.classifier
+"""
+
+import re
+import time
+from collections import defaultdict
+
+# RSS taramasında haberin alınması için gereken anahtar kelimeler
+FEED_KEYWORDS = ["cyber", "security", "exploit", "cve", "vulnerability", "malware", "hack", "breach", "ransomware",
+                 "zero-day", "leak", "threat", "attack"]
+
+# Toplu temizlikte haberin güvenlikle alakalı sayılması için anahtar kelimeler
+SECURITY_KEYWORDS = FEED_KEYWORDS + ["phishing", "ddos", "botnet", "apt", "trojan", "virus", "worm", "backdoor",
+                                     "spyware", "güvenlik", "zafiyet", "saldırı", "tehdit", "fidye"]
+
+# Alakasız haberler (ürün incelemeleri, kampanyalar vb.); güvenlik kelimelerinden önce gelir
+IRRELEVANT_KEYWORDS = ["best deal", "sale", "discount", "review", "unboxing", "hands-on",
+                       "galaxy s", "iphone", "airpods", "roku", "tv", "soundbar", "air purifier",
+                       "presidents' day", "black friday", "cyber monday", "gift guide"]
+
+# Önemli anahtar kelimeler (Telegram bildirimlerini tetikler)
+URGENT_KEYWORDS = ["Vakıfbank", "f5 waf", "crowdstrike", "paloalto", "twistlock", "guardicore", "vulnerability",
+                   "exploit", "cve"]
+
+# Öncelik sırasına göre kategori anahtar kelimeleri
+CATEGORY_KEYWORDS = {
+    "Ransomware": ["ransomware", "fidye", "ransom"],
+    "Malware": ["malware", "trojan", "virus", "worm", "rat", "stealer", "backdoor", "spyware", "stalkerware"],
+    "Phishing": ["phishing", "phish", "sosyal mühendislik", "social engineering"],
+    "DDoS": ["ddos", "denial of service", "botnet"],
+    "APT": ["apt", "advanced persistent"],
+    "Vulnerability": ["vulnerability", "zafiyet", "cve-", "zero-day", "zero day", "exploit"],
+    "Breach": ["breach", "data leak", "veri sızıntısı", "ihlal", "leak"],
+    "Data Leak": ["data leak", "veri sızıntısı"]
+}
+
+WHOLE_WORD_MAX_LEN = 3
+_END = ""
+
+def fold(text):
+    """Türkçe noktalı/noktasız i farkını kaldırıp küçük harfe çevirir ("İ", "I", "ı" -> "i")."""
+    # casefold "İ" harfini "i" + birleşik nokta (U+0307) yapar; nokta ve "ı" ayrıca katlanır
+    return (text or "").casefold().replace("\u0307", "").replace("ı", "i")
+
+def _whole_word(keyword):
+    return len(keyword) <= WHOLE_WORD_MAX_LEN
+
+def _trie_pattern(keywords):
+    """Kelimeleri ortak önekleri birleştirilmiş bir alternation'a çevirir; uzun eşleşme önce denenir."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        # Aynı kelime hem tam sözcük hem önek olarak istenirse sınırsız hali geçerlidir
+        node[_END] = node.get(_END, True) and _whole_word(keyword)
+
+    def build(node):
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != _END]
+        if _END in node:
+            alternatives.append(r"(?!\w)" if node[_END] else "")
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return "(?:" + "|".join(alternatives) + ")"
+
+    return build(trie)
+
+def _contains(keyword, other):
+    """other, keyword içinde bir sözcük başında geçiyor mu (kısa kelimelerde sözcük sonu da aranır)?"""
+    for start in range(len(keyword) - len(other) + 1):
+        end = start + len(other)
+        if (keyword.startswith(other, start)
+                and (start == 0 or not re.match(r"\w", keyword[start - 1]))
+                and (not _whole_word(other) or (end < len(keyword) and not re.match(r"\w", keyword[end]))
+                     or (end == len(keyword) and _whole_word(keyword)))):
+            return True
+    return False
+
+class KeywordClassifier:
+    """Etiketli anahtar kelime kümelerini tek düzenli ifadeye derler ve metni tek geçişte tarar."""
+
+    def __init__(self, keyword_sets):
+        direct = defaultdict(set)
+        for label, keywords in keyword_sets.items():
+            for keyword in keywords:
+                direct[fold(keyword)].add(label)
+
+        # Bir konumda yalnızca en uzun kelime yakalanır; onun içinde kalan kelimeler ("cyber monday" -> "cyber",
+        # "cve-" -> "cve") burada önceden hesaplanır.
+        self._hits = {
+            keyword: [(label, other) for other in direct if _contains(keyword, other) for label in direct[other]]
+            for keyword in direct
+        }
+        # İçindeki bir sözcükten başlayan daha uzun bir kelime olabilen eşleşmeler ("galaxy s" -> "security")
+        self._straddling = {
+            keyword for keyword in direct for start in range(1, len(keyword))
+            if not re.match(r"\w", keyword[start - 1])
+            and any(other.startswith(keyword[start:]) and len(other) > len(keyword) - start for other in direct)
+        }
+        self.pattern = re.compile(r"\b" + _trie_pattern(direct))
+
+    def scan(self, text):
+        """Metindeki tüm eşleşmeleri tek geçişte bulur: {etiket: {kelime, ...}}."""
+        text = fold(text)
+        found = self.pattern.findall(text)
+        # Bir eşleşmenin içinden başlayıp dışına taşan kelimeler ("galaxy security") örtüşmeyen taramada
+        # kaçar; bu nadir durumda her eşleşmenin bir sonraki konumundan yeniden aranır
+        if not self._straddling.isdisjoint(found):
+            found = self._overlapping(text)
+
+        matches = defaultdict(set)
+        for keyword in found:
+            for label, hit in self._hits[keyword]:
+                matches[label].add(hit)
+        return matches
+
+    def _overlapping(self, text):
+        found = []
+        match = self.pattern.search(text)
+        while match:
+            found.append(match.group())
+            match = self.pattern.search(text, match.start() + 1)
+        return found
+
+_classifier = KeywordClassifier({
+    "feed": FEED_KEYWORDS,
+    "security": SECURITY_KEYWORDS,
+    "irrelevant": IRRELEVANT_KEYWORDS,
+    "urgent": URGENT_KEYWORDS,
+    **{f"category:{category}": keywords for category, keywords in CATEGORY_KEYWORDS.items()},
+})
+
+def scan(text):
+    """Varsayılan kelime kümeleriyle metni tarar (etiketler: feed, security, irrelevant, urgent, category:<ad>)."""
+    return _classifier.scan(text)
+
+def is_feed_relevant(text):
+    """RSS girdisinin kaydedilecek kadar güvenlikle ilgili olup olmadığını döner."""
+    return "feed" in scan(text)
+
+def is_urgent(text):
+    """Başlığın acil bildirim gerektiren bir anahtar kelime içerip içermediğini döner."""
+    return "urgent" in scan(text)
+
+def is_security_related(title, analysis):
+    """Haberin güvenlikle alakalı olup olmadığını kontrol eder (alakasız kelimeler önceliklidir)."""
+    matches = scan(f"{title} {analysis or ''}")
+    return "irrelevant" not in matches and "security" in matches
+
+def extract_category(analysis_text, title=""):
+    """AI analizinden ve başlıktan, öncelik sırasına göre ilk eşleşen kategoriyi döner."""
+    matches = scan(f"{title} {analysis_text or ''}")
+    return next((category for category in CATEGORY_KEYWORDS if f"category:{category}" in matches), "General")
+
+def _legacy_is_security_related(title, analysis):
+    combined = f"{title} {analysis or ''}".lower()
+    if any(keyword in combined for keyword in IRRELEVANT_KEYWORDS):
+        return False
+    return any(keyword in combined for keyword in SECURITY_KEYWORDS)
+
+def _legacy_extract_category(analysis_text, title=""):
+    combined = f"{title} {analysis_text or ''}".lower()
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if any(keyword in combined for keyword in keywords):
+            return category
+    return "General"
+
+def benchmark(texts, rounds=20):
+    """
+    Eski alt dize döngüleri ile derlenmiş sınıflandırıcıyı aynı metinler üzerinde karşılaştırır.
+    Her metin için güvenlik filtresi + alaka + acil + kategori kontrolü yapılır; süreler ms cinsindendir.
+    """
+    def legacy(text):
+        lowered = text.lower()
+        return (any(kw in lowered for kw in FEED_KEYWORDS), _legacy_is_security_related(text, ""),
+                any(kw.lower() in lowered for kw in URGENT_KEYWORDS), _legacy_extract_category(text))
+
+    def compiled(text):
+        matches = scan(text)
+        return ("feed" in matches, "irrelevant" not in matches and "security" in matches, "urgent" in matches,
+                next((c for c in CATEGORY_KEYWORDS if f"category:{c}" in matches), "General"))
+
+    timings = {}
+    for name, fn in (("legacy", legacy), ("compiled", compiled)):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                fn(text)
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+    timings["speedup"] = round(timings["legacy"] / max(timings["compiled"], 1e-9), 2)
+    return timings
+
+SAMPLE_TEXTS = [
+    "Critical vulnerability in Citrix NetScaler actively exploited, CVE-2023-4966 patch released",
+    "LockBit ransomware gang claims attack on hospital network, data leak site updated",
+    "Best deal: Galaxy S24 drops to lowest price ever ahead of Black Friday",
+    "VAKIFBANK müşterilerini hedefleyen oltalama saldırısı: sosyal mühendislik ile hesaplar ele geçirildi",
+    "New Android banking trojan spreads through fake Play Store apps and steals SMS codes",
+    "Microsoft releases quarterly earnings report with strong cloud growth",
+] * 50
+
+if __name__ == "__main__":
+    result = benchmark(SAMPLE_TEXTS)
+    print(f"Eski döngüler: {result['legacy']} ms | Derlenmiş: {result['compiled']} ms | Hızlanma: {result['speedup']}x")
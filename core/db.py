@@ -0,0 +1,166 @@
+"""
+Veri erişim katmanı
+-------------------
+Tüm modüller SQLite bağlantılarını buradan alır. Her thread (ve veritabanı yolu) için tek bir
+bağlantı açılır ve yeniden kullanılır; performans ayarları (WAL, synchronous=NORMAL, mmap,
+önbellek, busy_timeout) bağlantı açılırken bir kez uygulanır. Bağlantılar kalıcı olduğundan
+sqlite3'ün hazır ifade (prepared statement) önbelleği sık sorgular için istekler arasında
+korunur. Her sorgunun süresi ölçülür; istatistikler query_stats() ile okunabilir.
+
+Kullanım:
+    with db.connection(DB_PATH) as conn:
+        ...        # çıkışta bağlantı thread'e bırakılır; hata olursa yarım kalan işlem geri alınır
+
+    conn = db.get_connection(DB_PATH)
+    try:
+        ...
+    finally:
+        conn.close()   # bağlantıyı kapatmaz, thread'e geri bırakır
+"""
+
+import os
+import re
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from core.logger import setup_logger
+
+logger = setup_logger("DB")
+
+DB_PATH = os.getenv('SENTINEL_DB_PATH', 'data/sentinel.db')
+
+DB_BUSY_TIMEOUT = int(os.getenv('DB_BUSY_TIMEOUT', 30000))          # ms
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 16384))        # Bağlantı başına sayfa önbelleği
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', 128 * 1024 * 1024))    # Bellek eşlemeli okuma (byte)
+DB_STATEMENT_CACHE = int(os.getenv('DB_STATEMENT_CACHE', 256))      # Bağlantı başına hazır ifade sayısı
+SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 200))
+
+_local = threading.local()
+_stats = {}
+_stats_lock = threading.Lock()
+_SQL_SPACE = re.compile(r"\s+")
+
+def _record(sql, elapsed):
+    key = _SQL_SPACE.sub(" ", sql).strip()[:160]
+    with _stats_lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        entry["count"] += 1
+        entry["total_ms"] += elapsed
+        if elapsed > entry["max_ms"]:
+            entry["max_ms"] = elapsed
+    if elapsed >= SLOW_QUERY_MS:
+        logger.warning(f"🐢 Yavaş sorgu ({elapsed:.0f}ms): {key}")
+
+class TimedCursor(sqlite3.Cursor):
+    """Her sorgunun süresini ölçen imleç."""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record(sql, (time.perf_counter() - started) * 1000)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record(sql, (time.perf_counter() - started) * 1000)
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Thread'e ait, yeniden kullanılan bağlantı. close() bağlantıyı kapatmaz: son kullanıcı
+    bıraktığında yarım kalmış bir işlem varsa geri alınır. Gerçekten kapatmak için dispose().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.users = 0
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # Connection.execute kısayolları da zamanlanan imleç üzerinden çalışır
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        self.users = max(0, self.users - 1)
+        if self.users == 0 and self.in_transaction:
+            self.rollback()
+
+    def dispose(self):
+        super().close()
+
+def connect(path=None, check_same_thread=True):
+    """Ayarları uygulanmış yeni bir bağlantı açar (havuz dışı kullanım için)."""
+    path = path or DB_PATH
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT / 1000, factory=PooledConnection,
+                           cached_statements=DB_STATEMENT_CACHE, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT}")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+def get_connection(path=None):
+    """Bu thread'in verilen veritabanı için açık bağlantısını döner (yoksa açar)."""
+    path = path or DB_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = connect(path)
+    conn.users += 1
+    return conn
+
+@contextmanager
+def connection(path=None):
+    """
+    Bu thread'in bağlantısını bir with bloğu için verir. Blok nasıl biterse bitsin bağlantı bırakılır;
+    hata ile çıkılırsa yarım kalan işlem hemen geri alınır, böylece yazma kilidi açık kalmaz.
+    """
+    conn = get_connection(path)
+    try:
+        yield conn
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def close_thread_connections():
+    """Bu thread'in tüm bağlantılarını gerçekten kapatır (uzun ömürlü worker'lar kapanırken)."""
+    for conn in getattr(_local, "connections", {}).values():
+        conn.dispose()
+    _local.connections = {}
+
+def query_stats(limit=20):
+    """En çok toplam süre harcayan sorguları (sayı, toplam/ortalama/en fazla ms) döner."""
+    with _stats_lock:
+        rows = [dict(sql=sql, **entry) for sql, entry in _stats.items()]
+    for row in rows:
+        row["avg_ms"] = round(row["total_ms"] / row["count"], 3)
+        row["total_ms"] = round(row["total_ms"], 3)
+        row["max_ms"] = round(row["max_ms"], 3)
+    rows.sort(key=lambda r: r["total_ms"], reverse=True)
+    return rows[:limit]
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,98 @@
+"""
+Yakın kopya (near-duplicate) haber tespiti
+------------------------------------------
+Aynı olay farklı kaynaklarda farklı başlıklarla yayınlanır. Başlık + özetin başından kaba kök
+bulma (stemming) uygulanmış kelime kümesi (shingle) parmak izi çıkarılır ve son kümelerle
+IDF ağırlıklı Jaccard benzerliği ile karşılaştırılır. Eşiği geçen haberler aynı kümeye
+(duplicate_of) bağlanır ve ikinci kez AI analizine gönderilmez.
+"""
+
+import os
+import re
+import math
+
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', 0.6))
+DEDUP_WINDOW = int(os.getenv('DEDUP_WINDOW', 1000))  # Karşılaştırılacak en son küme sayısı
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9çğıöşü]+(?:-[a-z0-9]+)*")
+HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
+CVE_PATTERN = re.compile(r"^cve-\d{4}-\d+$")
+STEM_LENGTH = 5
+SUMMARY_CHARS = 300
+STOPWORDS = {
+    "the", "and", "for", "with", "from", "that", "this", "are", "was", "has", "have", "its", "into",
+    "over", "new", "after", "about", "how", "what", "why", "your", "you", "via", "than", "more",
+    "says", "said", "bir", "ve", "ile", "için", "bu"
+}
+
+def fingerprint(title, summary=""):
+    """Başlık ve özetin başından normalize edilmiş kelime kümesini boşlukla ayrılmış metin olarak döner."""
+    text = f"{title or ''} {HTML_TAG_PATTERN.sub(' ', summary or '')[:SUMMARY_CHARS]}".lower()
+    tokens = set()
+    for token in TOKEN_PATTERN.findall(text):
+        if len(token) <= 2 or token in STOPWORDS:
+            continue
+        # CVE numaraları kesin eşleşme için olduğu gibi, diğer kelimeler kaba köküyle saklanır
+        tokens.add(token if CVE_PATTERN.match(token) else token[:STEM_LENGTH])
+    return " ".join(sorted(tokens)) or None
+
+def _token_set(value):
+    return set(value.split()) if value else set()
+
+def _cves(tokens):
+    return {t for t in tokens if t.startswith("cve-")}
+
+def similarity(a, b, weight=None):
+    """
+    İki parmak izi kümesinin ağırlıklı Jaccard benzerliği (0-1).
+    Farklı CVE numaraları içeren haberler hiçbir zaman aynı kabul edilmez.
+    """
+    if not a or not b:
+        return 0.0
+    cves_a, cves_b = _cves(a), _cves(b)
+    if cves_a and cves_b and not cves_a & cves_b:
+        return 0.0
+    weight = weight or (lambda t: 1.0)
+    union = sum(weight(t) for t in a | b)
+    return sum(weight(t) for t in a & b) / union if union else 0.0
+
+class DuplicateIndex:
+    """
+    Son haber kümelerinin parmak izlerini tutar ve yeni haberler için en benzer kümeyi bulur.
+    Kelime ağırlıkları indeksteki belge frekansından (IDF) hesaplanır; böylece 'critical',
+    'exploited' gibi yaygın kelimeler tek başına eşleşme yaratmaz. Bir tarama döngüsü
+    boyunca kullanılır; yeni kök haberler add() ile eklenerek aynı döngüdeki kopyalar da yakalanır.
+    """
+
+    def __init__(self, candidates=(), threshold=DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.entries = []
+        self.document_frequency = {}
+        for key, value in candidates:
+            self.add(key, value)
+
+    def add(self, key, value):
+        tokens = _token_set(value)
+        if not tokens:
+            return
+        self.entries.append((key, tokens))
+        for token in tokens:
+            self.document_frequency[token] = self.document_frequency.get(token, 0) + 1
+
+    def _weight(self, token):
+        total = len(self.entries) + 1
+        return math.log((total + 1) / (self.document_frequency.get(token, 0) + 1)) + 1
+
+    def find(self, value):
+        """En benzer kümenin anahtarını döner; hiçbiri eşiği geçmiyorsa None döner."""
+        tokens = _token_set(value)
+        if not tokens:
+            return None
+        best, best_score = None, self.threshold
+        for key, other in self.entries:
+            if not tokens & other:
+                continue
+            score = similarity(tokens, other, self._weight)
+            if score >= best_score:
+                best, best_score = key, score
+        return best
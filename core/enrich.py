@@ -0,0 +1,157 @@
+"""
+Toplu IOC zenginleştirme
+------------------------
+Karışık bir IOC listesini (IP, domain, CVE) türlerine ayırır, tekrarları eler ve önce önbellekte
+bulunanları döner. Kalanlar dış servislere paralel gönderilir: IP'ler ip-api.com /batch ile
+100'erli gruplar halinde, CVE ve domain sorguları ise servis başına eşzamanlılık sınırıyla.
+CVE'ler için AI yorumu (LLM çağrısı) ve domainler için WHOIS yalnızca istenirse eklenir.
+Sonuçlar tamamlandıkça satır satır üretilir (uç nokta bunları NDJSON olarak akıtır).
+"""
+
+import os
+import re
+import time
+import threading
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from core import lookups
+from core.cache import get_cache, is_negative, LookupFailed
+from core.logger import setup_logger
+
+logger = setup_logger("Enrich")
+
+ENRICH_BULK_MAX = int(os.getenv('ENRICH_BULK_MAX', 500))   # İstek başına en fazla IOC
+ENRICH_WORKERS = int(os.getenv('ENRICH_WORKERS', 8))       # İstek başına paralel sorgu sayısı
+
+# Dış servis başına eşzamanlı çağrı sınırı; tüm istekler arasında ortaktır
+UPSTREAM_LIMITS = {
+    "ip-api": int(os.getenv('ENRICH_IPAPI_CONCURRENCY', 2)),
+    "cve": int(os.getenv('ENRICH_CVE_CONCURRENCY', 4)),
+    "dns": int(os.getenv('ENRICH_DNS_CONCURRENCY', 4)),
+    "whois": int(os.getenv('ENRICH_WHOIS_CONCURRENCY', 2)),
+}
+_upstreams = {name: threading.BoundedSemaphore(limit) for name, limit in UPSTREAM_LIMITS.items()}
+
+CVE_PATTERN = re.compile(r"^CVE-\d{4}-\d+$", re.IGNORECASE)
+DOMAIN_PATTERN = re.compile(r"^(?=.{3,253}$)(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z][a-z0-9-]{0,62}$")
+
+def classify(ioc):
+    """IOC'nin türünü ve normalize edilmiş değerini döner: ('ip' | 'cve' | 'domain' | None, değer)."""
+    value = str(ioc).strip()
+    try:
+        return "ip", str(ipaddress.ip_address(value))
+    except ValueError:
+        pass
+    if CVE_PATTERN.match(value):
+        return "cve", value.upper()
+    domain = value.lower().rstrip(".")
+    if DOMAIN_PATTERN.match(domain):
+        return "domain", domain
+    return None, value
+
+def _limited(upstream, fn, *args):
+    with _upstreams[upstream]:
+        return fn(*args)
+
+def _result(ioc, kind, data, source):
+    return {"ioc": ioc, "type": kind, "source": source, "data": data}
+
+def _error(ioc, kind, message, status):
+    return {"ioc": ioc, "type": kind, "error": message, "status": status}
+
+def _enrich_domain(domain, include_whois):
+    dns_result = _limited("dns", lookups.lookup_dns_bulk, [domain])[0]
+    result = {"dns": {"records": dns_result["records"], "ttl": dns_result["ttl"], "errors": dns_result["errors"]}}
+    if include_whois:
+        try:
+            result["whois"] = _limited("whois", lookups.lookup_whois, domain)
+        except LookupFailed as e:
+            result["whois"] = {"error": e.message}
+    return result
+
+def enrich_iocs(iocs, ai_manager, include_whois=False, include_ai=False):
+    """
+    IOC listesini zenginleştirir ve her IOC için bir satır (sözlük) üretir; en son özet satırı gelir.
+    include_ai=False iken CVE'ler için LLM çağrılmaz, yalnızca CVE detayları döner.
+    Başarılı satırlar {"ioc", "type", "source": "cache" | "upstream", "data"}, hatalılar
+    {"ioc", "type", "error", "status"} biçimindedir. Üretim yarıda bırakılırsa bekleyen sorgular iptal edilir.
+    """
+    started = time.monotonic()
+    summary = {"total": 0, "cached": 0, "fetched": 0, "failed": 0, "invalid": 0}
+
+    def emit(line):
+        if "error" in line:
+            summary["invalid" if line["type"] is None else "failed"] += 1
+        else:
+            summary["cached" if line["source"] == "cache" else "fetched"] += 1
+        return line
+
+    # 1) Türlere ayır, tekrarları ele ve önbellekte olanları hemen dön
+    pending_ips, tasks = [], []
+    for kind, value in dict.fromkeys(classify(ioc) for ioc in iocs):
+        summary["total"] += 1
+        if kind is None:
+            yield emit(_error(value, None, "Tanınmayan IOC (IP, domain veya CVE bekleniyor)", 400))
+            continue
+
+        cached = get_cache(f"{kind}_{value}") if kind in ("ip", "cve") else None
+        if kind == "cve" and cached is not None and not is_negative(cached):
+            if include_ai:
+                comment = get_cache(f"cve_ai_{value}")
+                cached = None if comment is None else {**cached, "ai_comment": comment}
+            else:
+                cached = {k: v for k, v in cached.items() if k != "ai_comment"}
+        if is_negative(cached):
+            yield emit(_error(value, kind, cached["error"], 404))
+        elif cached is not None:
+            yield emit(_result(value, kind, cached, "cache"))
+        elif kind == "ip":
+            pending_ips.append(value)
+        elif kind == "cve":
+            if include_ai:
+                tasks.append((kind, value, "cve", lookups.lookup_cve, (value, ai_manager)))
+            else:
+                tasks.append((kind, value, "cve", lookups.lookup_cve_details, (value,)))
+        else:
+            tasks.append((kind, value, None, _enrich_domain, (value, include_whois)))
+
+    # 2) Kalanları dış servislere paralel gönder, tamamlandıkça dön
+    if pending_ips or tasks:
+        pool = ThreadPoolExecutor(max_workers=ENRICH_WORKERS, thread_name_prefix="enrich")
+        try:
+            futures = {}
+            for i in range(0, len(pending_ips), lookups.IP_BATCH_SIZE):
+                chunk = pending_ips[i:i + lookups.IP_BATCH_SIZE]
+                futures[pool.submit(_limited, "ip-api", lookups.lookup_ip_batch, chunk)] = ("ip", chunk)
+            for kind, value, upstream, fn, args in tasks:
+                future = pool.submit(_limited, upstream, fn, *args) if upstream else pool.submit(fn, *args)
+                futures[future] = (kind, value)
+
+            for future in as_completed(futures):
+                kind, value = futures[future]
+                try:
+                    result = future.result()
+                except LookupFailed as e:
+                    for ioc in (value if kind == "ip" else [value]):
+                        yield emit(_error(ioc, kind, e.message, e.status))
+                    continue
+                except Exception as e:
+                    logger.error(f"Zenginleştirme hatası ({kind}): {e}")
+                    for ioc in (value if kind == "ip" else [value]):
+                        yield emit(_error(ioc, kind, str(e), 502))
+                    continue
+
+                if kind != "ip":
+                    yield emit(_result(value, kind, result, "upstream"))
+                    continue
+                for ip in value:
+                    data = result.get(ip, LookupFailed("Servis yanıtında bulunamadı", 502))
+                    if isinstance(data, LookupFailed):
+                        yield emit(_error(ip, kind, data.message, data.status))
+                    else:
+                        yield emit(_result(ip, kind, data, "upstream"))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    summary["elapsed_ms"] = int((time.monotonic() - started) * 1000)
+    yield {"summary": summary}
@@ -0,0 +1,81 @@
+"""
+Canlı olay akışı (Server-Sent Events)
+-------------------------------------
+Tarayıcıların /api/ai_status ve /api/news'i periyodik olarak yoklaması yerine, fetcher ve analiz
+worker'ı önemli değişiklikleri (yeni haberler, tamamlanan analizler, kuyruk derinliği) 'events'
+tablosuna yazar. /api/stream her istemci için bu tabloyu son gördüğü olay id'sinden itibaren okur.
+
+Aynı süreçteki yayıncılar notify() ile bekleyen akışları anında uyandırır; başka bir süreçte
+(ör. ayrı worker) yazılan olaylar en geç POLL_INTERVAL içinde okunur. Olay id'leri tekrar
+kullanılmadığından (AUTOINCREMENT) kopan istemciler Last-Event-ID ile kaldığı yerden devam eder.
+"""
+
+import os
+import json
+import time
+import threading
+from core.logger import setup_logger
+
+logger = setup_logger("Events")
+
+EVENT_RETENTION = int(os.getenv('EVENT_RETENTION', 1000))          # Tabloda tutulan son olay sayısı
+POLL_INTERVAL = float(os.getenv('EVENT_POLL_INTERVAL', 0.5))       # Süreçler arası olay kontrol aralığı (sn)
+READ_LIMIT = 100
+
+# Süreç içi uyandırma sinyali: her notify() sürümü bir artırır
+_condition = threading.Condition()
+_version = 0
+
+def init_events_db(cursor):
+    """Olay tablosunu oluşturur."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            data TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+
+def publish(conn, kind, data):
+    """
+    Olayı tabloya yazar, eski olayları budar ve bekleyen akışları uyandırır. Commit çağırana aittir;
+    olay, haberin kendisiyle aynı işlemde (transaction) kaydedilir.
+    """
+    cursor = conn.execute("INSERT INTO events (kind, data, created_at) VALUES (?, ?, ?)",
+                          (kind, json.dumps(data, ensure_ascii=False), time.time()))
+    conn.execute("DELETE FROM events WHERE id <= ?", (cursor.lastrowid - EVENT_RETENTION,))
+    notify()
+
+def notify():
+    """Bu süreçte bekleyen akışları uyandırır (DB'ye yazılmayan durum değişiklikleri için de kullanılır)."""
+    global _version
+    with _condition:
+        _version += 1
+        _condition.notify_all()
+
+def version():
+    return _version
+
+def wait(seen_version, timeout=POLL_INTERVAL):
+    """Yeni bir notify() gelene veya süre dolana kadar bekler; güncel sürümü döner."""
+    with _condition:
+        _condition.wait_for(lambda: _version != seen_version, timeout)
+        return _version
+
+def latest_id(conn):
+    row = conn.execute("SELECT MAX(id) FROM events").fetchone()
+    return row[0] or 0
+
+def read_since(conn, last_id, limit=READ_LIMIT):
+    """last_id'den sonraki olayları [(id, kind, data)] olarak döner."""
+    rows = conn.execute("SELECT id, kind, data FROM events WHERE id > ? ORDER BY id LIMIT ?",
+                        (last_id, limit)).fetchall()
+    return [(r[0], r[1], json.loads(r[2])) for r in rows]
+
+def format_sse(kind, data, event_id=None):
+    """Bir olayı text/event-stream biçimine çevirir."""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {kind}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
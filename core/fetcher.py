@@ -1,78 +1,187 @@
 import feedparser
-import sqlite3
 import json
 import os
+import re
 import time
-import requests
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from core import classifier, db, events, job_queue, leader, outbox, preclassifier, rollups, routing, search
 from core.ai_manager import AIManager
+from core.dedup import DEDUP_WINDOW, DuplicateIndex, fingerprint
+from core.http_client import get_session
 from core.logger import setup_logger
-from core.prompts import ANALYSIS_SYSTEM_PROMPT, generate_news_prompt
+from core.prompts import THREAT_LEVELS
 
 # Loglama kurulumu
 logger = setup_logger("Fetcher")
 
-DB_PATH = 'data/sentinel.db'
+DB_PATH = db.DB_PATH
+SOURCES_PATH = 'sources.json'
 
-# Önemli anahtar kelimeler (Telegram bildirimlerini tetikler)
-KEYWORDS = ["Vakıfbank", "f5 waf", "crowdstrike", "paloalto", "twistlock", "guardicore", "vulnerability", "exploit", "cve"]
+# Eşzamanlı tarama ayarları: aynı anda indirilecek kaynak sayısı ve kaynak başına süre sınırı (sn)
+FETCH_WORKERS = int(os.getenv('FETCH_WORKERS', 8))
+FETCH_TIMEOUT = int(os.getenv('FETCH_TIMEOUT', 20))
+FETCH_USER_AGENT = "SentinelAi/1.0 (+RSS Fetcher)"
 
-def send_telegram_message(message):
-    """Belirlenen mesajı Telegram'a gönderir."""
-    token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('TELEGRAM_CHAT_ID')
-    if not token or not chat_id:
-        return
-    
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {
-        "chat_id": chat_id,
-        "text": message,
-        "parse_mode": "Markdown"
-    }
-    try:
-        requests.post(url, json=payload, timeout=10)
-    except Exception as e:
-        logger.error(f"❌ Telegram Hatası: {e}")
+# Analiz ayarları: tek prompt'a sığdırılacak haber sayısı ve çalıştırma başına işlenecek haber sayısı
+AI_BATCH_SIZE = int(os.getenv('AI_BATCH_SIZE', 8))
+ANALYSIS_LIMIT = int(os.getenv('ANALYSIS_LIMIT', 50))
 
 def init_db():
     """Veritabanı yapısını kontrol eder ve tabloyu oluşturur/günceller."""
-    if not os.path.exists('data'):
-        os.makedirs('data')
-    conn = sqlite3.connect(DB_PATH, timeout=30)
-    conn.execute("PRAGMA journal_mode=WAL")
-    cursor = conn.cursor()
-    
-    # Ana tabloyu oluştur (yoksa)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS news (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT,
-            link TEXT UNIQUE,
-            published TEXT,
-            source TEXT,
-            ai_analysis TEXT,
-            category TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-    # Migration: 'category' sütunu var mı kontrol et, yoksa ekle
-    cursor.execute("PRAGMA table_info(news)")
-    columns = [column[1] for column in cursor.fetchall()]
-    if 'category' not in columns:
-        logger.info("🛠️ Veritabanı şeması güncelleniyor: 'category' sütunu ekleniyor...")
-        cursor.execute("ALTER TABLE news ADD COLUMN category TEXT")
-        
-    # İndeksler (Performans için)
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_published ON news(published)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_category ON news(category)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_source ON news(source)")
-
-    conn.commit()
-    conn.close()
+    with db.connection(DB_PATH) as conn:
+        cursor = conn.cursor()
+        # Birden fazla süreç (web worker'ları, worker.py) aynı anda başlarken şema geçişleri sırayla yapılır
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+
+        # Ana tabloyu oluştur (yoksa)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS news (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT,
+                link TEXT UNIQUE,
+                published TEXT,
+                source TEXT,
+                ai_analysis TEXT,
+                category TEXT,
+                threat_level TEXT,
+                summary TEXT,
+                technical_details TEXT,
+                analysis_source TEXT,
+                feed_summary TEXT,
+                fingerprint TEXT,
+                duplicate_of INTEGER,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Migration: 'category' sütunu var mı kontrol et, yoksa ekle
+        cursor.execute("PRAGMA table_info(news)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if 'category' not in columns:
+            logger.info("🛠️ Veritabanı şeması güncelleniyor: 'category' sütunu ekleniyor...")
+            cursor.execute("ALTER TABLE news ADD COLUMN category TEXT")
+        # Migration: RSS özetini sakla (analiz artık tarama sonrasında ayrı yapılıyor)
+        if 'feed_summary' not in columns:
+            logger.info("🛠️ Veritabanı şeması güncelleniyor: 'feed_summary' sütunu ekleniyor...")
+            cursor.execute("ALTER TABLE news ADD COLUMN feed_summary TEXT")
+        # Migration: yakın kopya kümeleri (aynı olayın farklı kaynaklardaki haberleri)
+        if 'fingerprint' not in columns:
+            logger.info("🛠️ Veritabanı şeması güncelleniyor: 'fingerprint' ve 'duplicate_of' sütunları ekleniyor...")
+            cursor.execute("ALTER TABLE news ADD COLUMN fingerprint TEXT")
+            cursor.execute("ALTER TABLE news ADD COLUMN duplicate_of INTEGER")
+        # Migration: AI analizi yapılandırılmış sütunlarda tutulur (görüntü metni istek anında üretilir)
+        if 'threat_level' not in columns:
+            logger.info("🛠️ Veritabanı şeması güncelleniyor: yapılandırılmış analiz sütunları ekleniyor...")
+            for column in ("threat_level", "summary", "technical_details"):
+                cursor.execute(f"ALTER TABLE news ADD COLUMN {column} TEXT")
+            _backfill_structured_analysis(cursor)
+        # Migration: analizin kaynağı ('llm' veya yerel ön sınıflandırıcı için 'local'); boş değer 'llm' sayılır
+        if 'analysis_source' not in columns:
+            cursor.execute("ALTER TABLE news ADD COLUMN analysis_source TEXT")
+
+        # Kaynak bazlı tarama durumu (koşullu HTTP istekleri ve kaynak istatistikleri için)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feed_state (
+                source TEXT PRIMARY KEY,
+                url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                last_entry_hash TEXT,
+                last_success_at DATETIME,
+                last_checked_at DATETIME,
+                last_status INTEGER,
+                last_error TEXT,
+                bytes_fetched INTEGER DEFAULT 0,
+                fetch_count INTEGER DEFAULT 0,
+                skip_count INTEGER DEFAULT 0,
+                error_count INTEGER DEFAULT 0
+            )
+        ''')
+
+        # İndeksler (Performans için)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_published ON news(published)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_category ON news(category)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_source ON news(source)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_duplicate_of ON news(duplicate_of)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_threat ON news(threat_level, id)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_news_threat_rank ON news({THREAT_RANK_SQL}, id)")
+
+        # Analiz iş kuyruğu
+        job_queue.init_queue_db(cursor)
+        # Canlı akış olayları
+        events.init_events_db(cursor)
+        # Telegram bildirim kuyruğu
+        outbox.init_outbox_db(cursor)
+        # Arka plan görevleri için lider kilidi
+        leader.init_leader_db(cursor)
+
+        # Tam metin arama indeksi (FTS5)
+        search.init_search_db(cursor)
+
+        # Tetikleyicilerle güncellenen sayaçlar (sayfalama toplamları için)
+        rollups.init_rollups_db(cursor)
+
+        conn.commit()
+
+# Eski biçimde saklanmış analiz metni (parse_ai_json_to_text çıktısı)
+ANALYSIS_TEXT_PATTERN = re.compile(
+    r"TEHDIT SEVIYESI: \[(?P<threat_level>[^\]]*)\]\s*📂 KATEGORI: \[(?P<category>[^\]]*)\]\s*"
+    r"📝 Özet: (?P<summary>.*?)\s*⚙️ Teknik Detay: (?P<technical_details>.*)\Z", re.DOTALL)
+
+# Tehdit seviyesine göre sıralama (en kritik en büyük); ifade idx_news_threat_rank indeksinde de kullanılır
+THREAT_RANK = {level: len(THREAT_LEVELS) - i for i, level in enumerate(THREAT_LEVELS)}
+THREAT_RANK_SQL = ("CASE threat_level "
+                   + " ".join(f"WHEN '{level}' THEN {rank}" for level, rank in THREAT_RANK.items())
+                   + " ELSE 0 END")
+
+def parse_analysis_text(text):
+    """Eski biçimli analiz metnini alanlarına ayırır; tanınmayan metinler için None döner."""
+    match = ANALYSIS_TEXT_PATTERN.search(text or "")
+    if not match or match.group('threat_level').strip().upper() not in THREAT_LEVELS:
+        return None
+    fields = {k: v.strip() for k, v in match.groupdict().items()}
+    fields['threat_level'] = fields['threat_level'].upper()
+    return fields
+
+def _backfill_structured_analysis(cursor):
+    """
+    Mevcut analiz metinlerini yapılandırılmış sütunlara aktarır. Aktarılan satırların metni silinir
+    (artık istek anında üretilir); tanınmayan eski metinler olduğu gibi bırakılır. Arama indeksi ve
+    özet tabloları yeni sütunlarla yeniden oluşturulsun diye kaldırılır.
+    """
+    cursor.execute("SELECT id, ai_analysis FROM news WHERE ai_analysis LIKE '%TEHDIT SEVIYESI: [%'")
+    rows = []
+    for news_id, text in cursor.fetchall():
+        fields = parse_analysis_text(text)
+        if fields:
+            rows.append((fields['threat_level'], fields['category'] or 'General', fields['summary'],
+                         fields['technical_details'], news_id))
+    cursor.executemany(
+        "UPDATE news SET threat_level = ?, category = ?, summary = ?, technical_details = ?, ai_analysis = NULL WHERE id = ?",
+        rows
+    )
+    logger.info(f"🛠️ {len(rows)} analiz metni yapılandırılmış sütunlara aktarıldı.")
+    search.drop_search_db(cursor)
+    rollups.drop_rollups_db(cursor)
+
+def render_analysis(row):
+    """Haber satırının analiz metnini yapılandırılmış sütunlardan üretir (eski kayıtlarda saklı metni döner)."""
+    if row['threat_level'] and 'analysis_source' in row.keys() and row['analysis_source'] == 'local':
+        return render_local_analysis(dict(row))
+    if row['threat_level']:
+        return parse_ai_json_to_text(dict(row))
+    return row['ai_analysis']
+
+def render_local_analysis(data):
+    """Yerel ön sınıflandırıcı sonucunun görüntü metni; AI analizi gibi gösterilmez."""
+    return (f"🧮 YEREL SINIFLANDIRMA: [{data.get('threat_level')}]\n📂 KATEGORI: [{data.get('category')}]\n\n"
+            f"ℹ️ {data.get('technical_details') or ''}\nAI özeti yok; ayrıntılı analiz için haberi yeniden analiz edin.")
 
 def parse_ai_json_to_text(json_data):
-    """JSON analiz sonucunu veritabanı formatına (string) çevirir."""
+    """JSON analiz sonucunu görüntü metnine çevirir."""
     if not json_data:
         return "Analiz yapılamadı."
     
@@ -84,128 +193,399 @@ def parse_ai_json_to_text(json_data):
     # Frontend formatına uygun string oluştur
     return f"❌ TEHDIT SEVIYESI: [{threat}]\n📂 KATEGORI: [{cat}]\n\n📝 Özet: {summary}\n\n⚙️ Teknik Detay: {details}"
 
-def process_missing_analysis():
-    """Analizi henüz yapılmamış haberleri tespit eder ve tamamlar."""
+def store_analysis(cursor, results, source="llm"):
+    """
+    Doğrulanmış analizleri ({news_id: analiz}) yapılandırılmış sütunlara kaydeder. Analiz, haberin
+    yakın kopyalarına (duplicate_of = news_id) da aynı sorguyla yazılır; kopyalar ayrıca AI'a gönderilmez.
+    source analizin kaynağıdır ('llm' veya 'local'); ön sınıflandırıcı yalnızca 'llm' etiketleriyle eğitilir.
+    """
+    cursor.executemany('''
+        UPDATE news SET threat_level = ?, category = ?, summary = ?, technical_details = ?, analysis_source = ?,
+                        ai_analysis = NULL
+        WHERE id = ? OR duplicate_of = ?
+    ''', [(r['threat_level'], r['category'], r['summary'], r['technical_details'], source, news_id, news_id)
+          for news_id, r in results.items()])
+
+def publish_analysis(conn, results, source="llm", route=True):
+    """
+    Tamamlanan analizleri canlı akışa bildirir ve (route=True ise) yönlendirme kurallarına göre bildirim
+    kuyruğuna ekler. source store_analysis ile aynıdır. Commit çağırana aittir.
+    """
+    events.publish(conn, "analysis", {"items": [
+        {"id": news_id, "threat_level": r['threat_level'], "category": r['category']} for news_id, r in results.items()
+    ]})
+    if route:
+        _route_analysis(conn, results, source)
+
+def _route_analysis(conn, results, source="llm"):
+    """Analizi tamamlanan haberleri yönlendirme kurallarıyla eşleştirip her kanal için bildirim kuyruğuna ekler."""
+    rules = routing.get_rules()
+    if not rules or not results:
+        return
+    placeholders = ",".join("?" * len(results))
+    rows = conn.execute(f"SELECT id, title, link, source FROM news WHERE id IN ({placeholders})", list(results)).fetchall()
+
+    by_channel = {}
+    for news_id, title, link, feed_source in rows:
+        r = results[news_id]
+        message = {"news_id": news_id, "title": title, "source": feed_source, "link": link,
+                   "threat_level": r['threat_level'], "category": r['category'], "summary": r['summary'],
+                   "analysis_source": source, "urgent": r['threat_level'] == "CRITICAL" or classifier.is_urgent(title)}
+        for channel in rules.match(message):
+            by_channel.setdefault(channel, []).append(message)
+    for channel, messages in by_channel.items():
+        outbox.enqueue(conn, messages, channel=channel)
+
+def process_missing_analysis(drain=False, stop=None):
+    """
+    Analiz kuyruğundaki (analysis_jobs) zamanı gelmiş işleri çeker ve toplu (batch) AI çağrılarıyla tamamlar.
+    Yerel ön sınıflandırıcının yüksek güvenle etiketlediği haberler AI'a gönderilmeden kaydedilir. Kalanlar
+    AI_BATCH_SIZE'lık gruplar halinde tek prompt ile ve sağlayıcılara paralel gönderilir; başarısız olanlar geri çekilme
+    süresiyle yeniden planlanır. drain=True ise zamanı gelmiş iş kalmayana kadar devam eder; stop (threading.Event)
+    verilirse her turdan önce kontrol edilir ve ayarlandıysa yeni iş alınmadan çıkılır.
+    """
     init_db()
     ai_manager = AIManager()
-    conn = sqlite3.connect(DB_PATH, timeout=30)
-    conn.execute("PRAGMA journal_mode=WAL")
+    conn = db.get_connection(DB_PATH)
     cursor = conn.cursor()
-    
-    cursor.execute("SELECT id, title, link FROM news WHERE ai_analysis IS NULL OR ai_analysis LIKE 'HATA:%' LIMIT 10")
-    missing_news = cursor.fetchall()
-    
-    if not missing_news:
+
+    try:
+        while True:
+            if stop is not None and stop.is_set():
+                return
+            job_ids = job_queue.claim(conn, ANALYSIS_LIMIT)
+            if not job_ids:
+                return
+
+            placeholders = ",".join("?" * len(job_ids))
+            cursor.execute(f"SELECT id, title, link, feed_summary FROM news WHERE id IN ({placeholders})", job_ids)
+            items = [{"id": r[0], "title": r[1], "link": r[2], "content": r[3] or ''} for r in cursor.fetchall()]
+
+            # Bu arada silinmiş haberlerin işlerini kapat
+            found = {item['id'] for item in items}
+            job_queue.complete(conn, [i for i in job_ids if i not in found])
+
+            local = preclassifier.classify_items(items)
+            if local:
+                store_analysis(cursor, local, source="local")
+                job_queue.complete(conn, list(local.keys()))
+                publish_analysis(conn, local, source="local")
+                events.publish(conn, "queue", {"pending": job_queue.depth(conn)})
+                items = [item for item in items if item['id'] not in local]
+                logger.info(f"🧮 {len(local)} haber yerel sınıflandırıcıyla etiketlendi (AI çağrısı yapılmadı).")
+            conn.commit()
+            if not items:
+                if drain:
+                    continue
+                return
+
+            logger.info(f"🧠 {len(items)} haber toplu analiz ediliyor...")
+            batches = [items[i:i + AI_BATCH_SIZE] for i in range(0, len(items), AI_BATCH_SIZE)]
+            # Gruplar tüm sağlıklı sağlayıcılara aynı anda dağıtılır; kota/eşzamanlılığı AIManager yönetir
+            workers = max(1, min(len(batches), ai_manager.total_concurrency()))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis") as pool:
+                futures = {pool.submit(ai_manager.analyze_json_batch, batch): batch for batch in batches}
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    try:
+                        results, failed = future.result()
+                        errors = {news_id: "Geçersiz veya eksik AI yanıtı" for news_id in failed}
+                    except Exception as e:
+                        results, errors = {}, {item['id']: str(e) for item in batch}
+
+                    if results:
+                        store_analysis(cursor, results)
+                        job_queue.complete(conn, list(results.keys()))
+                        publish_analysis(conn, results)
+                        logger.info(f"✅ {len(results)} haber güncellendi.")
+                    if errors:
+                        job_queue.fail(conn, errors)
+                        logger.warning(f"⚠️ {len(errors)} haber analiz edilemedi, yeniden planlandı.")
+                    events.publish(conn, "queue", {"pending": job_queue.depth(conn)})
+                    conn.commit()
+
+            if not drain:
+                return
+    finally:
         conn.close()
+
+# İlk <item>/<entry> bloğunu ham gövdeden parse etmeden yakalar
+TOP_ENTRY_PATTERN = re.compile(rb"<(item|entry)[\s>].*?</\1>", re.DOTALL | re.IGNORECASE)
+
+def _top_entry_hash(body):
+    """Beslemedeki en üst girdinin özetini (hash) döner; girdi bulunamazsa tüm gövdeyi kullanır."""
+    match = TOP_ENTRY_PATTERN.search(body)
+    return hashlib.sha1(match.group(0) if match else body).hexdigest()
+
+def _download_feed(source, state=None):
+    """
+    Tek bir RSS kaynağını indirir ve parse eder (worker thread içinde çalışır).
+    Önceki taramadan kalan ETag / Last-Modified ile koşullu istek gönderir; 304 veya
+    değişmemiş en üst girdi durumunda parse adımı tamamen atlanır ('feed' None döner).
+    Yavaş akan bir sunucu tüm döngüyü bekletmesin diye kaynak başına toplam süre sınırı uygulanır.
+    """
+    state = state or {}
+    deadline = time.monotonic() + FETCH_TIMEOUT
+    headers = {"User-Agent": FETCH_USER_AGENT}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
+
+    with get_session().get(source['url'], headers=headers, timeout=FETCH_TIMEOUT, stream=True) as res:
+        if res.status_code == 304:
+            return {"status": 304, "feed": None, "bytes": 0, "etag": state.get('etag'),
+                    "last_modified": state.get('last_modified'), "entry_hash": state.get('last_entry_hash')}
+        res.raise_for_status()
+        chunks = []
+        for chunk in res.iter_content(chunk_size=65536):
+            chunks.append(chunk)
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{FETCH_TIMEOUT}sn içinde indirilemedi")
+        etag = res.headers.get('ETag')
+        last_modified = res.headers.get('Last-Modified')
+
+    body = b"".join(chunks)
+    entry_hash = _top_entry_hash(body)
+    result = {"status": res.status_code, "feed": None, "bytes": len(body),
+              "etag": etag, "last_modified": last_modified, "entry_hash": entry_hash}
+    if entry_hash != state.get('last_entry_hash'):
+        result["feed"] = feedparser.parse(body)
+    return result
+
+def _load_feed_states(cursor):
+    """feed_state tablosundaki tüm kaynak durumlarını {kaynak_adı: dict} olarak döner."""
+    cursor.execute("SELECT source, etag, last_modified, last_entry_hash, bytes_fetched, fetch_count, skip_count, error_count, last_success_at FROM feed_state")
+    keys = ["source", "etag", "last_modified", "last_entry_hash", "bytes_fetched", "fetch_count", "skip_count", "error_count", "last_success_at"]
+    return {row[0]: dict(zip(keys, row)) for row in cursor.fetchall()}
+
+def _next_feed_state(source, state, result=None, error=None):
+    """Tarama sonucuna göre kaynağın yeni durum satırını (feed_state) hesaplar."""
+    state = state or {}
+    now = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+    row = {
+        "source": source['name'],
+        "url": source['url'],
+        "etag": state.get('etag'),
+        "last_modified": state.get('last_modified'),
+        "last_entry_hash": state.get('last_entry_hash'),
+        "last_success_at": state.get('last_success_at'),
+        "last_checked_at": now,
+        "last_status": 0,
+        "last_error": None,
+        "bytes_fetched": state.get('bytes_fetched') or 0,
+        "fetch_count": state.get('fetch_count') or 0,
+        "skip_count": state.get('skip_count') or 0,
+        "error_count": state.get('error_count') or 0
+    }
+    if error is not None:
+        row["last_status"] = getattr(getattr(error, 'response', None), 'status_code', None) or 0
+        row["last_error"] = str(error)[:500]
+        row["error_count"] += 1
+        return row
+
+    row.update({
+        "etag": result.get('etag'),
+        "last_modified": result.get('last_modified'),
+        "last_entry_hash": result.get('entry_hash'),
+        "last_success_at": now,
+        "last_status": result['status']
+    })
+    row["bytes_fetched"] += result.get('bytes', 0)
+    row["fetch_count"] += 1
+    if result.get('feed') is None:
+        row["skip_count"] += 1
+    return row
+
+def _save_feed_states(cursor, rows):
+    """Kaynak durumlarını tek seferde kaydeder."""
+    if not rows:
         return
+    columns = list(rows[0].keys())
+    cursor.executemany(
+        f"INSERT OR REPLACE INTO feed_state ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        [tuple(r[c] for c in columns) for r in rows]
+    )
 
-    logger.info(f"🧠 {len(missing_news)} eksik haber analiz ediliyor...")
-    
-    # Kuyruk yoğunluğu kontrolü: 20'den fazla haber varsa Load Balance aktif et
-    use_lb = len(missing_news) > 20
-    if use_lb:
-        logger.info("⚖️ Kuyruk yoğunluğu ( >20 ) nedeniyle Load Balance aktif edildi.")
-
-    for row in missing_news:
-        news_id, title, link = row
-        prompt = generate_news_prompt(title, link)
-        
-        # JSON Analizi
-        json_result = ai_manager.analyze_json(prompt, system_prompt=ANALYSIS_SYSTEM_PROMPT)
-        
-        if json_result:
-            analysis_text = parse_ai_json_to_text(json_result)
-            category = json_result.get('category', 'General')
-            
-            cursor.execute("UPDATE news SET ai_analysis = ?, category = ? WHERE id = ?", (analysis_text, category, news_id))
-            conn.commit()
-            logger.info(f"✅ Haber güncellendi: {title[:30]}...")
-            time.sleep(2) 
+def _collect_entries(source, feed):
+    """Parse edilmiş beslemeden güvenlikle ilgili girdileri kayda hazır hale getirir."""
+    items = []
+    for entry in feed.entries:
+        title = entry.get('title')
+        link = entry.get('link')
+        if not title or not link:
+            continue
+
+        summary = entry.get('summary', '')
+        if not classifier.is_feed_relevant(title + " " + summary):
+            continue
+
+        items.append({
+            "title": title,
+            "link": link,
+            "published": entry.get('published', 'Bilinmiyor'),
+            "source": source['name'],
+            "summary": summary
+        })
+    return items
+
+def _filter_new_items(cursor, items):
+    """Aynı döngüdeki tekrarları ve veritabanında zaten olan linkleri eler."""
+    unique = {}
+    for item in items:
+        unique.setdefault(item['link'], item)
+
+    links = list(unique.keys())
+    existing = set()
+    # SQLite değişken limitine takılmamak için parçalar halinde sorgula
+    for i in range(0, len(links), 500):
+        chunk = links[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(f"SELECT link FROM news WHERE link IN ({placeholders})", chunk)
+        existing.update(row[0] for row in cursor.fetchall())
+
+    return [item for link, item in unique.items() if link not in existing]
+
+def _ids_for_links(cursor, links):
+    """Verilen linklere ait haber id'lerini {link: id} olarak döner."""
+    ids = {}
+    for i in range(0, len(links), 500):
+        chunk = links[i:i + 500]
+        cursor.execute(f"SELECT link, id FROM news WHERE link IN ({','.join('?' * len(chunk))})", chunk)
+        ids.update(cursor.fetchall())
+    return ids
+
+def _load_duplicate_index(cursor):
+    """Son DEDUP_WINDOW küme kökünün parmak izleriyle yakın kopya indeksini oluşturur."""
+    cursor.execute('''
+        SELECT id, fingerprint FROM news
+        WHERE duplicate_of IS NULL AND fingerprint IS NOT NULL
+        ORDER BY id DESC LIMIT ?
+    ''', (DEDUP_WINDOW,))
+    return DuplicateIndex(cursor.fetchall())
+
+def _store_new_items(conn, items):
+    """
+    Yeni haberleri yakın kopya kümelerine ayırarak kaydeder ve küme köklerini döner.
+    Kökler analiz kuyruğuna alınır; kopyalar köke bağlanır (duplicate_of) ve kökün mevcut
+    analizini devralır. Aynı taramadaki kopyalar da birbirine bağlanır.
+    """
+    cursor = conn.cursor()
+    index = _load_duplicate_index(cursor)
+    roots, duplicates = [], []
+    for item in items:
+        item['fingerprint'] = fingerprint(item['title'], item['summary'])
+        match = index.find(item['fingerprint'])
+        if match is None:
+            roots.append(item)
+            # Bu taramadaki kökler henüz id almadığı için linkleriyle indekslenir
+            index.add(item['link'], item['fingerprint'])
         else:
-            # Hata durumunda
-            logger.warning(f"⚠️ Analiz başarısız (ID: {news_id})")
-            time.sleep(1)
-            
-    conn.close()
+            item['duplicate_of'] = match
+            duplicates.append(item)
+
+    cursor.executemany(
+        "INSERT OR IGNORE INTO news (title, link, published, source, ai_analysis, category, feed_summary, fingerprint) VALUES (?, ?, ?, ?, NULL, 'General', ?, ?)",
+        [(i['title'], i['link'], i['published'], i['source'], i['summary'], i['fingerprint']) for i in roots]
+    )
+    root_ids = _ids_for_links(cursor, [i['link'] for i in roots])
+    job_queue.enqueue(conn, list(root_ids.values()))
+    for item in roots:
+        item['id'] = root_ids.get(item['link'])
+
+    if duplicates:
+        cursor.executemany('''
+            INSERT OR IGNORE INTO news (title, link, published, source, ai_analysis, category, threat_level, summary,
+                                        technical_details, feed_summary, fingerprint, duplicate_of)
+            SELECT ?, ?, ?, ?, ai_analysis, category, threat_level, summary, technical_details, ?, ?, id
+            FROM news WHERE id = ?
+        ''', [(i['title'], i['link'], i['published'], i['source'], i['summary'], i['fingerprint'],
+               root_ids.get(i['duplicate_of']) if isinstance(i['duplicate_of'], str) else i['duplicate_of'])
+              for i in duplicates])
+        logger.info(f"🔗 {len(duplicates)} haber mevcut bir habere yakın kopya olarak bağlandı (AI çağrısı yapılmayacak).")
+    return roots
+
+def _notify_new_items(conn, items):
+    """
+    Yeni kaydedilen haberlerin Telegram bildirimlerini, haberlerle aynı işlemde bildirim kuyruğuna ekler.
+    Gönderimi arka plandaki bildirim dağıtıcısı (core.notifier) yapar. Commit çağırana aittir.
+    Yönlendirme kuralları tanımlıysa bildirimler analizden sonra kurallara göre gönderilir (_route_analysis).
+    """
+    if not items or not os.getenv('TELEGRAM_BOT_TOKEN') or not os.getenv('TELEGRAM_CHAT_ID') or routing.get_rules():
+        return
+    outbox.enqueue(conn, [{"news_id": i.get('id'), "title": i['title'], "source": i['source'], "link": i['link'],
+                           "urgent": classifier.is_urgent(i['title'])} for i in items])
 
 def fetch_rss():
-    """Tüm RSS kaynaklarını tarar ve yeni haberleri kaydeder."""
+    """
+    Tüm RSS kaynaklarını sınırlı bir worker havuzuyla paralel tarar ve yeni haberleri tek seferde kaydeder.
+    AI analizi tarama yolundan çıkarılmıştır: yeni haberler analizsiz eklenir ve analiz kuyruğuna alınır.
+    Geriye eklenen haber sayısını döner.
+    """
     init_db()
-    ai_manager = AIManager()
-    
+    started = time.monotonic()
+
     try:
-        with open('sources.json', 'r') as f:
-            sources = json.load(f)
+        with open(SOURCES_PATH, 'r') as f:
+            sources = [s for s in json.load(f)['sources'] if s.get('active', True)]
+        if not sources:
+            return 0
 
-        conn = sqlite3.connect(DB_PATH, timeout=30)
-        conn.execute("PRAGMA journal_mode=WAL")
+        conn = db.get_connection(DB_PATH)
         cursor = conn.cursor()
-
-        for source in sources['sources']:
-            if not source.get('active', True): continue
-            logger.info(f"📡 Tarama başlatıldı: {source['name']}")
+        try:
+            states = _load_feed_states(cursor)
+            collected = []
+            state_rows = []
+            pool = ThreadPoolExecutor(max_workers=max(1, min(FETCH_WORKERS, len(sources))), thread_name_prefix="rss")
             try:
-                feed = feedparser.parse(source['url'])
-                
-                for entry in feed.entries:
-                    title = entry.title
-                    link = entry.link
-                    
-                    cursor.execute("SELECT id FROM news WHERE link = ?", (link,))
-                    if cursor.fetchone(): continue
-
-                    # Güvenlik odaklı filtreleme
-                    security_keywords = ["cyber", "security", "exploit", "cve", "vulnerability", "malware", "hack", "breach", "ransomware", "zero-day", "leak", "threat", "attack"]
-                    content_text = (title + " " + entry.get('summary', '')).lower()
-                    is_security_related = any(kw in content_text for kw in security_keywords)
-                    
-                    if not is_security_related:
+                futures = {}
+                for source in sources:
+                    logger.info(f"📡 Tarama başlatıldı: {source['name']}")
+                    futures[pool.submit(_download_feed, source, states.get(source['name']))] = source
+
+                for future in as_completed(futures):
+                    source = futures[future]
+                    previous = states.get(source['name'])
+                    try:
+                        result = future.result()
+                    except Exception as feed_err:
+                        logger.error(f"⚠️ RSS Okuma Hatası ({source['name']}): {feed_err}")
+                        state_rows.append(_next_feed_state(source, previous, error=feed_err))
                         continue
 
-                    logger.info(f"💡 Yeni güvenlik haberi bulundu: {title[:70]}...")
-                    
-                    # Anlık analiz (JSON)
-                    prompt = generate_news_prompt(title, link, content=entry.get('summary', ''))
-                    json_result = ai_manager.analyze_json(prompt, system_prompt=ANALYSIS_SYSTEM_PROMPT)
-                    
-                    analysis_text = "Analiz Bekleniyor..."
-                    category = "General"
-                    
-                    if json_result:
-                        analysis_text = parse_ai_json_to_text(json_result)
-                        category = json_result.get('category', 'General')
+                    if result['feed'] is None:
+                        reason = "304" if result['status'] == 304 else "en üst girdi aynı"
+                        logger.info(f"⏭️ Değişiklik yok ({reason}): {source['name']}")
                     else:
-                        # Fallback: Eğer AI anlık yanıt vermezse, sonradan process_missing_analysis tamamlar
-                        analysis_text = None 
+                        collected.extend(_collect_entries(source, result['feed']))
+                    state_rows.append(_next_feed_state(source, previous, result))
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
 
-                    try:
-                        cursor.execute(
-                            "INSERT INTO news (title, link, published, source, ai_analysis, category) VALUES (?, ?, ?, ?, ?, ?)",
-                            (title, link, entry.get('published', 'Bilinmiyor'), source['name'], analysis_text, category)
-                        )
-                        conn.commit()
-                        
-                        # Telegram Bildirimi
-                        is_urgent = any(kw.lower() in title.lower() for kw in KEYWORDS)
-                        header = "🚨 *KRİTİK HABER*" if is_urgent else "📰 *YENİ HABER*"
-                        telegram_analysis = json_result.get('summary', 'Detaylar için siteye göz atın.') if json_result else "Analiz ediliyor..."
-                        
-                        telegram_msg = f"{header}\n\n*Başlık:* {title}\n*Kaynak:* {source['name']}\n\n*AI:* {telegram_analysis}\n\n[Habere Git]({link})"
-                        send_telegram_message(telegram_msg)
-
-                        time.sleep(2) 
+            new_items = _filter_new_items(cursor, collected)
+            roots = _store_new_items(conn, new_items) if new_items else []
+            _save_feed_states(cursor, state_rows)
+            if new_items:
+                events.publish(conn, "news", {"count": len(new_items), "items": [
+                    {"id": i['id'], "title": i['title'], "source": i['source']} for i in roots if i.get('id')
+                ]})
+                events.publish(conn, "queue", {"pending": job_queue.depth(conn)})
+                # Aynı olayın kopyaları için tekrar bildirim gönderilmez
+                _notify_new_items(conn, roots)
+            conn.commit()
+        finally:
+            conn.close()
 
-                    except Exception as e:
-                        logger.error(f"❌ Kayıt Hatası: {e}")
-            except Exception as feed_err:
-                logger.error(f"⚠️ RSS Okuma Hatası ({source['name']}): {feed_err}")
-                continue
-        
-        conn.close()
-        logger.info("✨ Tarama ve analiz süreci tamamlandı.")
+        for item in new_items:
+            logger.info(f"💡 Yeni güvenlik haberi bulundu: {item['title'][:70]}...")
+        logger.info(f"✨ Tarama tamamlandı: {len(sources)} kaynak, {len(new_items)} yeni haber ({time.monotonic() - started:.1f}sn). Analiz kuyruğa alındı.")
+        return len(new_items)
     except Exception as e:
         logger.error(f"Genel RSS Döngü Hatası: {e}")
+        return 0
 
 if __name__ == "__main__":
     init_db()
     fetch_rss()
+    process_missing_analysis()
@@ -0,0 +1,77 @@
+"""
+Paylaşımlı HTTP istemcisi
+-------------------------
+RSS taraması, AI sağlayıcıları, Telegram ve Flask API uç noktalarının kullandığı tek bir
+keep-alive destekli requests.Session sağlar. Böylece her istek için TLS el sıkışması ve
+bağlantı kurulumu tekrarlanmaz; havuz istatistikleri get_pool_stats() ile izlenebilir.
+"""
+
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Havuzda tutulacak farklı host sayısı ve host başına en fazla açık bağlantı
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 32))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 16))
+HTTP_USER_AGENT = "SentinelAi/1.0"
+
+_session = None
+_session_lock = threading.Lock()
+
+def _build_session():
+    session = requests.Session()
+    # Sadece idempotent isteklerde (GET vb.) geçici sunucu hataları için tek bir yeniden deneme
+    retry = Retry(total=1, backoff_factor=0.3, status_forcelist=(502, 503, 504), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                          max_retries=retry, pool_block=False)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": HTTP_USER_AGENT})
+    return session
+
+def get_session():
+    """Süreç genelinde paylaşılan requests.Session nesnesini döner (ilk çağrıda oluşturulur)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def get_pool_stats():
+    """
+    Host bazında bağlantı havuzu istatistiklerini döner.
+    'requests' / 'connections' oranı bağlantıların ne kadar yeniden kullanıldığını gösterir.
+    """
+    if _session is None:
+        return {"hosts": [], "total_requests": 0, "total_connections": 0}
+
+    hosts = []
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "requests": pool.num_requests,
+                "connections": pool.num_connections,
+                # Kuyruk boş yerleri None ile doldurur; sadece gerçek (boşta bekleyen) bağlantılar sayılır
+                "idle": sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0
+            })
+
+    total_requests = sum(h["requests"] for h in hosts)
+    total_connections = sum(h["connections"] for h in hosts)
+    return {
+        "hosts": hosts,
+        "total_requests": total_requests,
+        "total_connections": total_connections,
+        "reuse_ratio": round(total_requests / total_connections, 2) if total_connections else 0
+    }
@@ -0,0 +1,187 @@
+"""
+Analiz iş kuyruğu (analysis_jobs)
+---------------------------------
+Analiz bekleyen haberler 'news' tablosu taranarak değil, indeksli bir iş tablosu üzerinden bulunur.
+Her işin durumu (pending / running / done / dead), deneme sayısı, bir sonraki deneme zamanı
+ve son hatası saklanır. Başarısız işler üstel geri çekilme (exponential backoff) ile yeniden
+denenir, MAX_ATTEMPTS aşıldığında 'dead' durumuna düşer.
+"""
+
+import os
+import time
+import threading
+from core.logger import setup_logger
+
+logger = setup_logger("JobQueue")
+
+MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 6))
+BACKOFF_BASE = int(os.getenv('JOB_BACKOFF_BASE', 60))       # İlk yeniden deneme gecikmesi (sn)
+BACKOFF_MAX = int(os.getenv('JOB_BACKOFF_MAX', 6 * 3600))   # En fazla bekleme (sn)
+LEASE_DURATION = 600  # 'running' durumunda takılı kalan işler bu süre sonunda geri alınır (sn)
+
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 10
+
+# Kuyruğa yeni iş eklendiğinde worker'ı uyandırmak için süreç içi sinyal
+job_available = threading.Event()
+
+def init_queue_db(cursor):
+    """İş tablosunu ve kuyruktan çekme indeksini oluşturur; ilk kurulumda mevcut bekleyenleri aktarır."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='analysis_jobs'")
+    is_new = cursor.fetchone() is None
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_jobs (
+            news_id INTEGER PRIMARY KEY,
+            state TEXT NOT NULL DEFAULT 'pending',
+            priority INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            locked_until REAL,
+            last_error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dequeue ON analysis_jobs(state, priority DESC, next_attempt_at)")
+
+    if is_new:
+        # Tek seferlik geçiş: eski yöntemle bekleyen haberleri kuyruğa aktar
+        cursor.execute('''
+            INSERT OR IGNORE INTO analysis_jobs (news_id)
+            SELECT id FROM news WHERE threat_level IS NULL AND (ai_analysis IS NULL OR ai_analysis LIKE 'HATA:%')
+        ''')
+        if cursor.rowcount > 0:
+            logger.info(f"🛠️ {cursor.rowcount} bekleyen haber analiz kuyruğuna aktarıldı.")
+
+def enqueue(conn, news_ids, priority=PRIORITY_NORMAL):
+    """Haberleri analiz kuyruğuna ekler (çalışmakta olan işlere dokunmaz). Commit çağırana aittir."""
+    now = time.time()
+    conn.executemany('''
+        INSERT INTO analysis_jobs (news_id, priority, next_attempt_at) VALUES (?, ?, ?)
+        ON CONFLICT(news_id) DO UPDATE SET
+            state = 'pending', attempts = 0, last_error = NULL,
+            priority = MAX(priority, excluded.priority),
+            next_attempt_at = excluded.next_attempt_at,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE state != 'running'
+    ''', [(news_id, priority, now) for news_id in news_ids])
+    job_available.set()
+
+def requeue_all(conn, priority=PRIORITY_HIGH):
+    """Bekleyen ve 'dead' durumundaki tüm işleri hemen çalıştırılacak şekilde öne alır."""
+    cursor = conn.execute('''
+        UPDATE analysis_jobs
+        SET state = 'pending', next_attempt_at = ?, priority = MAX(priority, ?),
+            attempts = CASE WHEN state = 'dead' THEN 0 ELSE attempts END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE state IN ('pending', 'dead')
+    ''', (time.time(), priority))
+    conn.commit()
+    job_available.set()
+    return cursor.rowcount
+
+def claim(conn, limit):
+    """
+    Zamanı gelmiş en yüksek öncelikli işleri atomik olarak 'running' durumuna alır ve id'lerini döner.
+    Süresi dolmuş kilitler (çöken worker) önce kuyruğa geri bırakılır.
+    """
+    now = time.time()
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("UPDATE analysis_jobs SET state = 'pending' WHERE state = 'running' AND locked_until < ?", (now,))
+        rows = conn.execute('''
+            SELECT news_id FROM analysis_jobs
+            WHERE state = 'pending' AND next_attempt_at <= ?
+            ORDER BY priority DESC, next_attempt_at
+            LIMIT ?
+        ''', (now, limit)).fetchall()
+        ids = [r[0] for r in rows]
+        conn.executemany(
+            "UPDATE analysis_jobs SET state = 'running', locked_until = ?, updated_at = CURRENT_TIMESTAMP WHERE news_id = ?",
+            [(now + LEASE_DURATION, news_id) for news_id in ids]
+        )
+        conn.commit()
+        return ids
+    except Exception:
+        conn.rollback()
+        raise
+
+def claim_ids(conn, news_ids):
+    """
+    Belirli haberlerin işlerini (kuyrukta yoksa ekleyerek) atomik olarak 'running' durumuna alır ve alınan
+    id'leri döner. Başka bir worker'da çalışan veya tamamlanmış işler atlanır; böylece aynı haber iki kez
+    analiz edilmez.
+    """
+    now = time.time()
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany("INSERT OR IGNORE INTO analysis_jobs (news_id, next_attempt_at) VALUES (?, ?)",
+                         [(news_id, now) for news_id in news_ids])
+        claimed = []
+        for news_id in news_ids:
+            cursor = conn.execute('''
+                UPDATE analysis_jobs SET state = 'running', locked_until = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE news_id = ? AND (state IN ('pending', 'dead') OR (state = 'running' AND locked_until < ?))
+            ''', (now + LEASE_DURATION, news_id, now))
+            if cursor.rowcount:
+                claimed.append(news_id)
+        conn.commit()
+        return claimed
+    except Exception:
+        conn.rollback()
+        raise
+
+def complete(conn, news_ids):
+    """İşleri başarıyla tamamlandı olarak işaretler. Commit çağırana aittir."""
+    conn.executemany(
+        "UPDATE analysis_jobs SET state = 'done', locked_until = NULL, last_error = NULL, updated_at = CURRENT_TIMESTAMP WHERE news_id = ?",
+        [(news_id,) for news_id in news_ids]
+    )
+
+def backoff_delay(attempts):
+    """n. başarısız denemeden sonra beklenecek süreyi (sn) döner: BASE * 2^(n-1), en fazla BACKOFF_MAX."""
+    return min(BACKOFF_BASE * (2 ** max(attempts - 1, 0)), BACKOFF_MAX)
+
+def fail(conn, errors):
+    """
+    Başarısız işleri geri çekilme süresiyle yeniden planlar; deneme sınırını aşanları 'dead' yapar.
+    errors: {news_id: hata_mesajı}. Commit çağırana aittir.
+    """
+    now = time.time()
+    for news_id, error in errors.items():
+        row = conn.execute("SELECT attempts FROM analysis_jobs WHERE news_id = ?", (news_id,)).fetchone()
+        attempts = (row[0] if row else 0) + 1
+        if attempts >= MAX_ATTEMPTS:
+            state, next_attempt = 'dead', now
+            logger.warning(f"💀 Analiz işi {attempts} denemeden sonra bırakıldı (ID: {news_id}): {error}")
+        else:
+            state, next_attempt = 'pending', now + backoff_delay(attempts)
+        conn.execute('''
+            UPDATE analysis_jobs
+            SET state = ?, attempts = ?, next_attempt_at = ?, locked_until = NULL,
+                last_error = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE news_id = ?
+        ''', (state, attempts, next_attempt, str(error)[:500], news_id))
+
+def counts(conn):
+    """Kuyruktaki işlerin duruma göre sayılarını döner (indeks üzerinden)."""
+    result = {"pending": 0, "running": 0, "done": 0, "dead": 0}
+    for state, count in conn.execute("SELECT state, COUNT(*) FROM analysis_jobs GROUP BY state").fetchall():
+        result[state] = count
+    return result
+
+def depth(conn):
+    """Bekleyen ve çalışan iş sayısı (tamamlanmış işleri saymadan, indeks aralığı üzerinden)."""
+    return conn.execute("SELECT COUNT(*) FROM analysis_jobs WHERE state IN ('pending', 'running')").fetchone()[0]
+
+def next_due_in(conn):
+    """Bir sonraki bekleyen işin zamanı gelene kadar kalan süreyi (sn) döner; bekleyen iş yoksa None."""
+    row = conn.execute("SELECT MIN(next_attempt_at) FROM analysis_jobs WHERE state = 'pending'").fetchone()
+    if not row or row[0] is None:
+        return None
+    return max(0.0, row[0] - time.time())
@@ -0,0 +1,62 @@
+"""
+Lider kilidi (SQLite)
+---------------------
+Aynı veritabanını kullanan birden fazla süreçten (gunicorn worker'ları, ayrı worker.py) yalnızca
+birinin zamanlanmış görevleri çalıştırmasını sağlar. Kilit, 'leader_locks' tablosunda süreli bir
+satırdır (lease): sahibi süresi dolmadan yeniler; sahibi çökerse süre dolunca başka bir süreç alır.
+"""
+
+import os
+import time
+import uuid
+import socket
+
+LEADER_LEASE = int(os.getenv('LEADER_LEASE', 60))  # Kilidin yenilenmezse düşeceği süre (sn)
+
+def new_owner_id():
+    """Bu süreci tekil olarak tanımlayan sahip kimliği (host:pid:rastgele)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def init_leader_db(cursor):
+    """Kilit tablosunu oluşturur."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS leader_locks (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+
+def acquire(conn, name, owner, lease=None):
+    """
+    Kilidi alır veya (zaten sahibiyse) süresini uzatır. Kilit başka bir süreçteyse ve süresi
+    dolmamışsa False döner. İşlem BEGIN IMMEDIATE ile atomiktir.
+    """
+    now = time.time()
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute('''
+            INSERT INTO leader_locks (name, owner, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE leader_locks.owner = excluded.owner OR leader_locks.expires_at < ?
+        ''', (name, owner, now + (lease or LEADER_LEASE), now))
+        row = conn.execute("SELECT owner FROM leader_locks WHERE name = ?", (name,)).fetchone()
+        conn.commit()
+        return row is not None and row[0] == owner
+    except Exception:
+        conn.rollback()
+        raise
+
+def release(conn, name, owner):
+    """Kilidi (sadece sahibiyse) bırakır; diğer süreçler beklemeden devralabilir."""
+    conn.execute("DELETE FROM leader_locks WHERE name = ? AND owner = ?", (name, owner))
+    conn.commit()
+
+def holder(conn, name):
+    """Kilidin geçerli sahibini ve kalan süresini döner; kilit boşsa None."""
+    row = conn.execute("SELECT owner, expires_at FROM leader_locks WHERE name = ?", (name,)).fetchone()
+    if not row or row[1] < time.time():
+        return None
+    return {"owner": row[0], "expires_in": round(row[1] - time.time(), 1)}
@@ -0,0 +1,282 @@
+"""
+İstihbarat sorguları (CVE, IP, WHOIS, subdomain, DNS)
+-----------------------------------------------------
+Her sorgu cached_lookup() üzerinden yapılır: sonuçlar kendi TTL'leri ile önbelleğe alınır,
+aynı anahtar için eşzamanlı istekler tek bir dış sorguyu paylaşır ve süresi dolmak üzere
+olan kayıtlar arka planda yenilenir. Kullanıcıya dönülecek hatalar LookupFailed ile bildirilir.
+
+DNS sorguları bunun istisnasıdır: kayıt türleri thread havuzunda eşzamanlı çözülür ve sonuçlar
+paylaşılan resolver'ın önbelleğinde kaydın kendi TTL'i kadar tutulur. Tekil sorgular ile toplu
+sorgular ayrı havuzlarda çalışır; böylece tek domainlik bir sorgu toplu işlerin arkasında beklemez.
+"""
+
+import os
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from core.cache import cached_lookup, set_cache, set_negative_cache, LookupFailed
+from core.http_client import get_session
+
+CVE_CACHE_TTL = int(os.getenv('CVE_CACHE_TTL', 86400))
+IP_CACHE_TTL = int(os.getenv('IP_CACHE_TTL', 86400))
+IP_BATCH_SIZE = 100  # ip-api.com /batch çağrısı başına en fazla IP
+IP_API_FIELDS = "status,message,country,city,isp,org,as,query"
+WHOIS_CACHE_TTL = int(os.getenv('WHOIS_CACHE_TTL', 6 * 3600))
+SUBDOMAIN_CACHE_TTL = int(os.getenv('SUBDOMAIN_CACHE_TTL', 12 * 3600))
+
+DNS_RECORD_TYPES = ("A", "AAAA", "CNAME", "MX", "NS", "TXT", "SOA", "CAA")
+DNS_TIMEOUT = float(os.getenv('DNS_TIMEOUT', 2))        # Tek bir sunucu denemesi için bekleme (sn)
+DNS_LIFETIME = float(os.getenv('DNS_LIFETIME', 4))      # Bir kayıt sorgusunun toplam süresi (sn)
+DNS_CACHE_SIZE = int(os.getenv('DNS_CACHE_SIZE', 10000))
+DNS_WORKERS = int(os.getenv('DNS_WORKERS', 16))                  # Tekil sorgular (/api/dns)
+DNS_BULK_WORKERS = int(os.getenv('DNS_BULK_WORKERS', 32))        # Toplu DNS ve IOC zenginleştirme
+DNS_BULK_DEADLINE = float(os.getenv('DNS_BULK_DEADLINE', 10))    # Toplu sorgunun toplam süresi (sn)
+DNS_BULK_MAX = int(os.getenv('DNS_BULK_MAX', 25))
+
+_resolver = None
+_resolver_lock = threading.Lock()
+_dns_pool = ThreadPoolExecutor(max_workers=DNS_WORKERS, thread_name_prefix="dns")
+_dns_bulk_pool = ThreadPoolExecutor(max_workers=DNS_BULK_WORKERS, thread_name_prefix="dns-bulk")
+
+def lookup_cve_details(cve_id):
+    """CVE detaylarını AI yorumu olmadan döner (CVE ID büyük harfe çevrilmiş olmalı)."""
+    def fetch():
+        res = get_session().get(f"https://cve.circl.lu/api/cve/{cve_id}", timeout=15)
+        if res.status_code != 200:
+            raise LookupFailed("Dış servis hatası", 502)
+        data = res.json()
+        if not data:
+            raise LookupFailed("CVE bulunamadı", 404)
+
+        return {
+            "id": cve_id,
+            "summary": data.get('summary', 'Açıklama bulunamadı.'),
+            "cvss": data.get('cvss', 'Bilinmiyor'),
+            "references": data.get('references', [])[:5]
+        }
+    return cached_lookup(f"cve_{cve_id}", fetch, CVE_CACHE_TTL)
+
+def lookup_cve(cve_id, ai_manager):
+    """CVE detaylarını ve AI yorumunu döner; yorum detaylardan ayrı önbelleğe alınır."""
+    details = lookup_cve_details(cve_id)
+
+    def comment():
+        summary, cvss = details['summary'], details['cvss']
+        context = f"Özet: {summary}" if summary != "Açıklama bulunamadı." else f"{cve_id} özelinde zafiyet yorumu yap."
+        prompt = f"Siber güvenlik uzmanı olarak analiz et:\nCVE: {cve_id}\nCVSS: {cvss}\n{context}"
+        result = ai_manager.analyze(prompt, hedge=True)
+        if not result or result.startswith("HATA:"):
+            raise LookupFailed(result or "AI yorumu alınamadı", 503)
+        return result
+    try:
+        ai_comment = cached_lookup(f"cve_ai_{cve_id}", comment, CVE_CACHE_TTL)
+    except LookupFailed as e:
+        # Sağlayıcı hatası önbelleğe alınmaz; bir sonraki istek yorumu yeniden dener
+        ai_comment = e.message
+    return {**details, "ai_comment": ai_comment}
+
+def _ip_result(data):
+    return {
+        "ip": data['query'],
+        "location": f"{data.get('city')}, {data.get('country')}",
+        "isp": data.get('isp'),
+        "org": data.get('org'),
+        "as": data.get('as')
+    }
+
+def lookup_ip(ip_addr):
+    """IP adresinin konum ve ISP bilgilerini döner."""
+    def fetch():
+        res = get_session().get(f"http://ip-api.com/json/{ip_addr}?fields={IP_API_FIELDS}", timeout=10)
+        if res.status_code != 200:
+            raise LookupFailed("Servis ulaşılamadı", 502)
+        data = res.json()
+        if data['status'] == 'fail':
+            raise LookupFailed("IP bulunamadı", 404)
+        return _ip_result(data)
+    return cached_lookup(f"ip_{ip_addr}", fetch, IP_CACHE_TTL)
+
+def lookup_ip_batch(ips):
+    """
+    En fazla IP_BATCH_SIZE IP'yi ip-api.com /batch ile tek çağrıda sorgular (önbellek kontrolü çağırana aittir).
+    {ip: sonuç veya LookupFailed} döner; sonuçlar lookup_ip ile aynı anahtarlarla önbelleğe yazılır.
+    Servisin tamamı hata verirse LookupFailed fırlatır.
+    """
+    res = get_session().post(f"http://ip-api.com/batch?fields={IP_API_FIELDS}", json=list(ips), timeout=15)
+    if res.status_code == 429:
+        raise LookupFailed("ip-api.com istek sınırı aşıldı", 429)
+    if res.status_code != 200:
+        raise LookupFailed("Servis ulaşılamadı", 502)
+
+    results = {}
+    for ip, data in zip(ips, res.json()):
+        if data.get('status') == 'fail':
+            set_negative_cache(f"ip_{ip}", "IP bulunamadı")
+            results[ip] = LookupFailed("IP bulunamadı", 404)
+        else:
+            results[ip] = _ip_result(data)
+            set_cache(f"ip_{ip}", results[ip], duration=IP_CACHE_TTL)
+    return results
+
+def _format_date(d):
+    if not d: return "Bilinmiyor"
+    if isinstance(d, list): d = d[0]
+    try:
+        return d.strftime('%Y-%m-%d %H:%M:%S') if hasattr(d, 'strftime') else str(d)
+    except:
+        return str(d)
+
+def lookup_whois(domain):
+    """Domain için WHOIS özetini döner (domain küçük harfe çevrilmiş olmalı)."""
+    def fetch():
+        import whois
+        # Bazı sistemlerde whois komutu eksik olabilir, kütüphane bunu yönetir
+        w = whois.whois(domain)
+
+        if not w or not any(w.values()):
+            raise LookupFailed("Whois kaydı bulunamadı veya domain geçersiz.", 404)
+
+        # Name Server temizleme
+        ns_list = []
+        if w.name_servers:
+            if isinstance(w.name_servers, list):
+                ns_list = [str(ns).lower() for ns in w.name_servers if ns]
+            else:
+                ns_list = [str(w.name_servers).lower()]
+
+        return {
+            "domain": domain,
+            "registrar": (w.registrar[0] if isinstance(w.registrar, list) else w.registrar) or "Bilinmiyor",
+            "creation_date": _format_date(w.get('creation_date')),
+            "expiration_date": _format_date(w.get('expiration_date')),
+            "name_servers": sorted(list(set(ns_list))),
+            "status": (w.status[0] if isinstance(w.status, list) else w.status) or "Bilinmiyor"
+        }
+    return cached_lookup(f"whois_{domain}", fetch, WHOIS_CACHE_TTL)
+
+def lookup_subdomains(domain):
+    """crt.sh sertifika kayıtlarından pasif subdomain listesini döner (ilk 100)."""
+    def fetch():
+        # crt.sh bazen yavaş olabilir, timeout ekliyoruz
+        url = f"https://crt.sh/?q=%25.{domain}&output=json"
+        try:
+            res = get_session().get(url, timeout=20)
+        except requests.exceptions.Timeout:
+            raise LookupFailed("Sorgu zaman aşımına uğradı (crt.sh çok yavaş). Lütfen birazdan tekrar deneyin.", 504)
+        if res.status_code != 200:
+            raise LookupFailed(f"crt.sh servisi hata döndürdü: {res.status_code}", 502)
+
+        try:
+            data = res.json()
+        except ValueError:
+            raise LookupFailed("crt.sh verisi okunamadı.", 502)
+
+        if not data:
+            raise LookupFailed(f"{domain} için hiçbir sertifika kaydı bulunamadı.", 404)
+
+        # Alt alan adlarını ayıkla ve temizle
+        subs = set()
+        for entry in data:
+            name = entry.get('name_value', '')
+            # Çoklu satır (wildcard vb) olanları ayır
+            for n in name.split('\n'):
+                n = n.strip().lower()
+                if n.endswith(domain) and n != domain and '*' not in n:
+                    subs.add(n)
+
+        if not subs:
+            raise LookupFailed("Alt alan adı tespit edilemedi (Sadece ana domain kayıtlı olabilir).", 404)
+
+        return {
+            "domain": domain,
+            "subdomains": sorted(list(subs))[:100]  # İlk 100 tanesini sınırla
+        }
+    return cached_lookup(f"subs_{domain}", fetch, SUBDOMAIN_CACHE_TTL)
+
+def build_resolver(nameservers=None, port=53):
+    """Kısa zaman aşımlı ve TTL'e uyan önbellekli bir resolver oluşturur (nameservers yoksa sistem ayarları)."""
+    import dns.resolver
+    if nameservers:
+        resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = list(nameservers)
+        resolver.port = port
+    else:
+        resolver = dns.resolver.Resolver()
+    resolver.timeout = DNS_TIMEOUT
+    resolver.lifetime = DNS_LIFETIME
+    resolver.cache = dns.resolver.LRUCache(DNS_CACHE_SIZE)
+    return resolver
+
+def get_resolver():
+    """Tüm isteklerin paylaştığı resolver (DNS_NAMESERVERS / DNS_PORT ile yönlendirilebilir)."""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                servers = [s.strip() for s in os.getenv('DNS_NAMESERVERS', '').split(',') if s.strip()]
+                _resolver = build_resolver(servers, int(os.getenv('DNS_PORT', 53)))
+    return _resolver
+
+def _resolve_record(resolver, domain, rtype):
+    """Tek bir kayıt türünü çözer; (kayıtlar, ttl, hata) döner."""
+    import dns.exception
+    import dns.resolver
+    try:
+        answer = resolver.resolve(domain, rtype, raise_on_no_answer=False)
+    except dns.resolver.NXDOMAIN:
+        return [], None, "NXDOMAIN"
+    except dns.exception.Timeout:
+        return [], None, "timeout"
+    except dns.resolver.NoNameservers:
+        return [], None, "SERVFAIL"
+    except dns.exception.DNSException as e:
+        return [], None, e.__class__.__name__
+    if answer.rrset is None:
+        return [], None, None
+    return sorted(r.to_text() for r in answer.rrset), answer.rrset.ttl, None
+
+def _resolve_domains(domains, pool, deadline=None):
+    """
+    Domainlerin tüm kayıt türlerini (DNS_RECORD_TYPES) verilen havuzda aynı anda sorgular. Yavaş bir sunucu
+    en fazla DNS_LIFETIME kadar bekletir; deadline (sn) dolduğunda bitmeyen sorgular iptal edilip 'timeout'
+    sayılır. Her domain için {domain, records, ttl, errors} döner.
+    """
+    resolver = get_resolver()
+    futures = {(domain, rtype): pool.submit(_resolve_record, resolver, domain, rtype)
+               for domain in domains for rtype in DNS_RECORD_TYPES}
+    ends_at = None if deadline is None else time.monotonic() + deadline
+    results = []
+    for domain in domains:
+        entry = {"domain": domain, "records": {}, "ttl": {}, "errors": {}}
+        for rtype in DNS_RECORD_TYPES:
+            future = futures[(domain, rtype)]
+            try:
+                timeout = None if ends_at is None else max(0.0, ends_at - time.monotonic())
+                records, ttl, error = future.result(timeout=timeout)
+            except FutureTimeout:
+                future.cancel()
+                records, ttl, error = [], None, "timeout"
+            entry["records"][rtype] = records
+            if ttl is not None:
+                entry["ttl"][rtype] = ttl
+            if error:
+                entry["errors"][rtype] = error
+        results.append(entry)
+    return results
+
+def lookup_dns_bulk(domains):
+    """
+    Domain listesinin DNS kayıtlarını toplu sorgu havuzunda çözer. İsteğin tamamı DNS_BULK_DEADLINE ile
+    sınırlıdır; süre dolduğunda yanıtlanmamış kayıtlar errors içinde 'timeout' olarak döner.
+    """
+    return _resolve_domains(domains, _dns_bulk_pool, DNS_BULK_DEADLINE)
+
+def lookup_dns(domain):
+    """Tek bir domainin DNS kayıtlarını döner; hiç kayıt yoksa LookupFailed (404 veya zaman aşımında 504)."""
+    result = _resolve_domains([domain], _dns_pool)[0]
+    if not any(result["records"].values()):
+        if result["errors"] and all(e == "timeout" for e in result["errors"].values()):
+            raise LookupFailed("DNS sunucusu zamanında yanıt vermedi.", 504)
+        raise LookupFailed("Kayıt bulunamadı", 404)
+    return result
@@ -0,0 +1,269 @@
+"""
+Bildirim dağıtıcısı
+-------------------
+Bildirim kuyruğunu (notification_outbox) arka planda boşaltan tek bir thread. Aynı sohbete giden ve zamanı
+gelmiş bildirimler tek bir özet mesajda birleştirilir; böylece 30 yeni haber Telegram'ın flood sınırına
+takılmadan birkaç mesajla gider. 429 yanıtındaki retry_after süresi boyunca o sohbete gönderim durdurulur
+(diğer sohbetler, webhook ve dosya kanalları etkilenmez); ağ ve sunucu hataları üstel geri çekilmeyle yeniden denenir. İstekler paylaşılan HTTP oturumu üzerinden yapılır.
+
+Yönlendirme kurallarıyla (core.routing) kuyruğa alınan bildirimler kanal türüne göre Telegram'a, bir webhook'a
+(JSON POST) veya yerel bir dosyaya (NDJSON) iletilir.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+import requests
+from core import db, fetcher, outbox, routing
+from core.http_client import get_session
+from core.logger import setup_logger
+
+logger = setup_logger("Notifier")
+
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+NOTIFY_TIMEOUT = float(os.getenv('NOTIFY_TIMEOUT', 10))
+NOTIFY_SEND_INTERVAL = float(os.getenv('NOTIFY_SEND_INTERVAL', 1.0))  # Ardışık mesajlar arası bekleme (sn)
+DIGEST_MAX_ITEMS = int(os.getenv('NOTIFY_DIGEST_MAX_ITEMS', 20))      # Bir özet mesajdaki en fazla haber
+MESSAGE_MAX_CHARS = 4000   # Telegram sınırı 4096 karakter
+DISPATCH_BATCH = 500       # Tek turda kuyruktan okunan bildirim sayısı
+IDLE_POLL = 60             # Bekleyen bildirim yokken kontrol aralığı (sn)
+
+MARKDOWN_SPECIAL = re.compile(r"([_*`\[])")
+
+def escape_markdown(text):
+    """Telegram Markdown'ında biçimlendirme karakterlerini kaçışlar."""
+    return MARKDOWN_SPECIAL.sub(r"\\\1", text or "")
+
+# Bildirimde gösterilmeyen kuyruk alanları
+INTERNAL_FIELDS = ("id", "chat_id", "channel", "attempts")
+
+def render_single(item):
+    header = "🚨 *KRİTİK HABER*" if item.get('urgent') else "📰 *YENİ HABER*"
+    # Analizden sonra yönlendirilen bildirimler tehdit seviyesi ve özeti taşır; yerel ön sınıflandırıcı
+    # sonuçlarında AI özeti yoktur
+    if item.get('analysis_source') == 'local':
+        analysis = f"*Yerel sınıflandırma:* [{item['threat_level']}] {escape_markdown(item.get('category'))}"
+    elif item.get('threat_level'):
+        analysis = f"*AI:* [{item['threat_level']}] {escape_markdown(item.get('summary'))}"
+    else:
+        analysis = "*AI:* Analiz ediliyor..."
+    return (f"{header}\n\n*Başlık:* {escape_markdown(item['title'])}\n*Kaynak:* {escape_markdown(item['source'])}\n\n"
+            f"{analysis}\n\n[Habere Git]({item['link']})")
+
+def _digest_line(item):
+    title = escape_markdown(item['title']).replace("]", ")")
+    level = f"`{item['threat_level']}` " if item.get('threat_level') else ""
+    return f"{'🚨' if item.get('urgent') else '•'} {level}[{title}]({item['link']}) — _{escape_markdown(item['source'])}_"
+
+def render_digest(items):
+    urgent = sum(1 for i in items if i.get('urgent'))
+    header = f"🚨 *{len(items)} YENİ HABER ({urgent} KRİTİK)*" if urgent else f"📰 *{len(items)} YENİ HABER*"
+    return header + "\n\n" + "\n".join(_digest_line(i) for i in items)
+
+def render(items):
+    """Tek bildirim için ayrıntılı mesajı, birden fazlası için özet mesajı üretir."""
+    return render_single(items[0]) if len(items) == 1 else render_digest(items)
+
+def digest_chunks(items):
+    """Bildirimleri (kritikler önce) mesaj başına DIGEST_MAX_ITEMS ve MESSAGE_MAX_CHARS sınırına göre böler."""
+    chunk, size = [], 0
+    for item in sorted(items, key=lambda i: not i.get('urgent')):
+        line = len(_digest_line(item)) + 1
+        if chunk and (len(chunk) >= DIGEST_MAX_ITEMS or size + line > MESSAGE_MAX_CHARS - 100):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(item)
+        size += line
+    if chunk:
+        yield chunk
+
+def send_message(chat_id, text, parse_mode="Markdown"):
+    """
+    Telegram'a mesaj gönderir. (durum, değer) döner: ("ok", None), ("retry_after", saniye),
+    ("permanent", hata) yeniden denenmeyecek istemci hataları için, ("error", hata) geçici hatalar için.
+    """
+    url = f"{TELEGRAM_API_URL}/bot{os.getenv('TELEGRAM_BOT_TOKEN')}/sendMessage"
+    payload = {"chat_id": chat_id, "text": text, "disable_web_page_preview": True}
+    if parse_mode:
+        payload["parse_mode"] = parse_mode
+    try:
+        res = get_session().post(url, json=payload, timeout=NOTIFY_TIMEOUT)
+    except requests.RequestException as e:
+        return "error", str(e)
+
+    if res.status_code == 200:
+        return "ok", None
+    try:
+        body = res.json()
+    except ValueError:
+        body = {}
+    if res.status_code == 429:
+        return "retry_after", float((body.get("parameters") or {}).get("retry_after", 5))
+    description = body.get("description") or f"HTTP {res.status_code}"
+    return ("permanent" if 400 <= res.status_code < 500 else "error"), description
+
+def post_webhook(target, items):
+    """Bildirimleri tek istekte {"items": [...]} olarak webhook'a gönderir; send_message ile aynı (durum, değer) döner."""
+    payload = {"items": [{k: v for k, v in item.items() if k not in INTERNAL_FIELDS} for item in items]}
+    try:
+        res = get_session().post(target['url'], json=payload, headers=target.get('headers'), timeout=NOTIFY_TIMEOUT)
+    except requests.RequestException as e:
+        return "error", str(e)
+    if 200 <= res.status_code < 300:
+        return "ok", None
+    permanent = 400 <= res.status_code < 500 and res.status_code not in (408, 429)
+    return ("permanent" if permanent else "error"), f"HTTP {res.status_code}"
+
+def append_file(target, items):
+    """Bildirimleri dosyaya satır başına bir JSON olarak ekler."""
+    try:
+        directory = os.path.dirname(target['path'])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(target['path'], 'a', encoding='utf-8') as f:
+            for item in items:
+                f.write(json.dumps({k: v for k, v in item.items() if k not in INTERNAL_FIELDS}, ensure_ascii=False) + "\n")
+    except OSError as e:
+        return "error", str(e)
+    return "ok", None
+
+def _send_telegram(chat_id, items):
+    if not os.getenv('TELEGRAM_BOT_TOKEN'):
+        return "permanent", "TELEGRAM_BOT_TOKEN tanımlı değil"
+    text = render(items)
+    status, value = send_message(chat_id, text)
+    # Biçimlendirme hatasında mesaj düz metin olarak bir kez daha denenir
+    if status == "permanent" and "parse" in str(value).lower():
+        status, value = send_message(chat_id, text, parse_mode=None)
+    return status, value
+
+def _targets(items):
+    """Bildirimleri hedefe göre gruplar: [(kanal adı, kanal tanımı, sohbet, bildirimler)]."""
+    groups = {}
+    for item in items:
+        groups.setdefault((item['channel'], item['chat_id']), []).append(item)
+    for (channel, chat_id), group in groups.items():
+        target = routing.channel_config(channel) if channel else {"type": "telegram"}
+        if target and target['type'] == "telegram":
+            chat_id = target.get('chat_id') or chat_id or os.getenv('TELEGRAM_CHAT_ID')
+        yield channel, target, chat_id, group
+
+# Telegram'ın 429 ile beklettiği sohbetler: {chat_id: bekleme bitişi}
+_paused_until = {}
+
+def paused_for(chat_id):
+    """Telegram'ın sohbet için istediği bekleme süresinden kalan saniye."""
+    return max(0.0, _paused_until.get(str(chat_id), 0.0) - time.time())
+
+def dispatch_pending(conn):
+    """
+    Zamanı gelmiş bildirimleri hedef başına özetleyerek gönderir ve gönderilen mesaj sayısını döner.
+    Telegram'ın 429 yanıtında yalnızca o sohbetin bildirimleri retry_after kadar ertelenir.
+    """
+    sent = 0
+    last_send = None
+    for channel, target, chat_id, items in _targets(outbox.due(conn, DISPATCH_BATCH)):
+        if target is None:
+            outbox.fail(conn, [i['id'] for i in items], f"Tanımsız kanal: {channel}", permanent=True)
+            conn.commit()
+            continue
+        if target['type'] == "telegram" and paused_for(chat_id):
+            # Bekleme sürerken gelen bildirimler de bekleme sonuna ertelenir
+            outbox.defer(conn, [i['id'] for i in items], _paused_until[str(chat_id)])
+            conn.commit()
+            continue
+        # Webhook ve dosya hedeflerine grup tek seferde, Telegram'a özet mesajlar halinde gönderilir
+        chunks = list(digest_chunks(items)) if target['type'] == "telegram" else [items]
+        for position, chunk in enumerate(chunks):
+            if target['type'] == "telegram":
+                if last_send is not None:
+                    time.sleep(max(0.0, NOTIFY_SEND_INTERVAL - (time.monotonic() - last_send)))
+                status, value = _send_telegram(chat_id, chunk)
+                last_send = time.monotonic()
+            elif target['type'] == "webhook":
+                status, value = post_webhook(target, chunk)
+            else:
+                status, value = append_file(target, chunk)
+
+            ids = [i['id'] for i in chunk]
+            if status == "ok":
+                outbox.mark_sent(conn, ids)
+                sent += 1
+            elif status == "retry_after":
+                until = _paused_until[str(chat_id)] = time.time() + value
+                outbox.defer(conn, [i['id'] for rest in chunks[position:] for i in rest], until)
+                conn.commit()
+                logger.warning(f"⏳ Telegram hız sınırı ({chat_id}): {value:.0f}sn sonra devam edilecek.")
+                break
+            else:
+                outbox.fail(conn, ids, value, permanent=status == "permanent")
+                logger.error(f"❌ Bildirim Hatası ({channel or 'telegram'}): {value}")
+            conn.commit()
+
+    outbox.prune(conn)
+    conn.commit()
+    if sent:
+        logger.info(f"📨 {sent} bildirim mesajı gönderildi.")
+    return sent
+
+class NotificationDispatcher:
+    """Bildirim kuyruğunu sürekli boşaltan arka plan thread'i."""
+
+    def __init__(self):
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Dağıtıcı thread'ini başlatır (zaten çalışıyorsa bir şey yapmaz)."""
+        if self._thread and self._thread.is_alive():
+            if not self._stop.is_set():
+                return
+            # Önceki durdurma henüz tamamlanmadı (stop() zaman aşımı); eski thread'in bitmesi beklenir
+            self._thread.join()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._thread.start()
+        logger.info("📨 Bildirim dağıtıcısı başlatıldı.")
+
+    def stop(self):
+        """Dağıtıcıyı durdurur ve mevcut turun bitmesini kısa süre bekler."""
+        self._stop.set()
+        outbox.notification_available.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def wake(self):
+        outbox.notification_available.set()
+
+    def _seconds_until_next(self):
+        conn = db.get_connection(fetcher.DB_PATH)
+        try:
+            due = outbox.next_due_in(conn)
+        finally:
+            conn.close()
+        due = IDLE_POLL if due is None else min(due, IDLE_POLL)
+        return max(due, 0.05)
+
+    def _run(self):
+        # Önceki çalışmadan kalan bildirimler için hemen bir tur yapılır
+        timeout = 0
+        while not self._stop.is_set():
+            outbox.notification_available.wait(timeout)
+            outbox.notification_available.clear()
+            if self._stop.is_set():
+                break
+            try:
+                conn = db.get_connection(fetcher.DB_PATH)
+                try:
+                    dispatch_pending(conn)
+                finally:
+                    conn.close()
+                timeout = self._seconds_until_next()
+            except Exception as e:
+                logger.error(f"❌ Bildirim dağıtıcısı hatası: {e}")
+                timeout = IDLE_POLL
+        db.close_thread_connections()
+
+notification_dispatcher = NotificationDispatcher()
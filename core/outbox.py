@@ -0,0 +1,133 @@
+"""
+Bildirim kuyruğu (notification_outbox)
+--------------------------------------
+Gönderilecek Telegram bildirimleri, haberlerle aynı işlemde bu tabloya yazılır (transactional outbox);
+gönderimi arka plandaki bildirim dağıtıcısı (core.notifier) yapar. Böylece Telegram kesintisi RSS
+taramasını yavaşlatmaz ve süreç yeniden başlasa bile bildirimler kaybolmaz.
+
+Kayıtlar bir kanala (core.routing'deki kanal adı) yazılır; kanalı boş olanlar TELEGRAM_CHAT_ID sohbetine gider.
+Her kaydın durumu (pending / sent / dead), deneme sayısı, bir sonraki deneme zamanı ve son hatası saklanır.
+Yeni kayıtlar NOTIFY_DIGEST_WINDOW kadar bekletilir; bu sürede biriken bildirimler tek özet mesajda gönderilir.
+"""
+
+import os
+import json
+import time
+import threading
+from core.logger import setup_logger
+
+logger = setup_logger("Outbox")
+
+NOTIFY_DIGEST_WINDOW = float(os.getenv('NOTIFY_DIGEST_WINDOW', 10))     # Özette toplanacak bildirimler için bekleme (sn)
+NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', 8))
+NOTIFY_BACKOFF_BASE = int(os.getenv('NOTIFY_BACKOFF_BASE', 30))         # İlk yeniden deneme gecikmesi (sn)
+NOTIFY_BACKOFF_MAX = int(os.getenv('NOTIFY_BACKOFF_MAX', 3600))         # En fazla bekleme (sn)
+NOTIFY_RETENTION = int(os.getenv('NOTIFY_RETENTION', 7 * 86400))        # Gönderilmiş/bırakılmış kayıtların saklanma süresi (sn)
+
+# Kuyruğa bildirim eklendiğinde dağıtıcıyı uyandırmak için süreç içi sinyal
+notification_available = threading.Event()
+
+def init_outbox_db(cursor):
+    """Bildirim kuyruğu tablosunu ve indekslerini oluşturur."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id TEXT,
+            channel TEXT,
+            urgent INTEGER NOT NULL DEFAULT 0,
+            payload TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            sent_at REAL
+        )
+    ''')
+    # Migration: yönlendirme kurallarıyla seçilen kanal
+    cursor.execute("PRAGMA table_info(notification_outbox)")
+    if 'channel' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE notification_outbox ADD COLUMN channel TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON notification_outbox(state, next_attempt_at)")
+
+def enqueue(conn, messages, chat_id=None, channel=None):
+    """
+    Bildirimleri kuyruğa ekler. messages: [{"title", "source", "link", "urgent", ...}] listesi.
+    channel yönlendirme kurallarındaki kanal adıdır; verilmezse bildirim chat_id (o da yoksa gönderim anındaki
+    TELEGRAM_CHAT_ID) sohbetine gider. Commit çağırana aittir.
+    """
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO notification_outbox (chat_id, channel, urgent, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        [(chat_id, channel, int(bool(m.get('urgent'))), json.dumps(m, ensure_ascii=False), now + NOTIFY_DIGEST_WINDOW, now)
+         for m in messages]
+    )
+    notification_available.set()
+
+def due(conn, limit):
+    """
+    Zamanı gelmiş bekleyen bildirimleri eklenme sırasıyla döner:
+    [{"id", "chat_id", "channel", "urgent", "attempts", ...payload}].
+    """
+    rows = conn.execute('''
+        SELECT id, chat_id, channel, urgent, attempts, payload FROM notification_outbox
+        WHERE state = 'pending' AND next_attempt_at <= ?
+        ORDER BY id
+        LIMIT ?
+    ''', (time.time(), limit)).fetchall()
+    return [{**json.loads(payload), "id": row_id, "chat_id": chat_id, "channel": channel, "urgent": bool(urgent),
+             "attempts": attempts}
+            for row_id, chat_id, channel, urgent, attempts, payload in rows]
+
+def mark_sent(conn, ids):
+    """Bildirimleri gönderildi olarak işaretler. Commit çağırana aittir."""
+    now = time.time()
+    conn.executemany("UPDATE notification_outbox SET state = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                     [(now, i) for i in ids])
+
+def backoff_delay(attempts):
+    """n. başarısız denemeden sonra beklenecek süreyi (sn) döner: BASE * 2^(n-1), en fazla NOTIFY_BACKOFF_MAX."""
+    return min(NOTIFY_BACKOFF_BASE * (2 ** max(attempts - 1, 0)), NOTIFY_BACKOFF_MAX)
+
+def fail(conn, ids, error, permanent=False):
+    """
+    Başarısız bildirimleri geri çekilme süresiyle yeniden planlar; deneme sınırını aşanları veya kalıcı
+    hataları (permanent=True) 'dead' yapar. Commit çağırana aittir.
+    """
+    now = time.time()
+    for row_id in ids:
+        row = conn.execute("SELECT attempts FROM notification_outbox WHERE id = ?", (row_id,)).fetchone()
+        attempts = (row[0] if row else 0) + 1
+        if permanent or attempts >= NOTIFY_MAX_ATTEMPTS:
+            state, next_attempt = 'dead', now
+            logger.warning(f"💀 Bildirim {attempts} denemeden sonra bırakıldı (ID: {row_id}): {error}")
+        else:
+            state, next_attempt = 'pending', now + backoff_delay(attempts)
+        conn.execute('''
+            UPDATE notification_outbox SET state = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+            WHERE id = ?
+        ''', (state, attempts, next_attempt, str(error)[:500], row_id))
+
+def defer(conn, ids, until):
+    """Verilen bekleyen bildirimleri en erken 'until' zamanına erteler (deneme sayılmaz). Commit çağırana aittir."""
+    conn.executemany("UPDATE notification_outbox SET next_attempt_at = MAX(next_attempt_at, ?) WHERE id = ? AND state = 'pending'",
+                     [(until, i) for i in ids])
+
+def prune(conn):
+    """Saklama süresi dolmuş gönderilmiş/bırakılmış kayıtları siler. Commit çağırana aittir."""
+    return conn.execute("DELETE FROM notification_outbox WHERE state IN ('sent', 'dead') AND created_at < ?",
+                        (time.time() - NOTIFY_RETENTION,)).rowcount
+
+def counts(conn):
+    """Kuyruktaki bildirimlerin duruma göre sayılarını döner."""
+    result = {"pending": 0, "sent": 0, "dead": 0}
+    for state, count in conn.execute("SELECT state, COUNT(*) FROM notification_outbox GROUP BY state").fetchall():
+        result[state] = count
+    return result
+
+def next_due_in(conn):
+    """Bir sonraki bekleyen bildirimin zamanı gelene kadar kalan süreyi (sn) döner; bekleyen yoksa None."""
+    row = conn.execute("SELECT MIN(next_attempt_at) FROM notification_outbox WHERE state = 'pending'").fetchone()
+    if not row or row[0] is None:
+        return None
+    return max(0.0, row[0] - time.time())
@@ -0,0 +1,325 @@
+"""
+Yerel ön sınıflandırıcı
+-----------------------
+AI ile etiketlenmiş haberlerden (news tablosu) eğitilen TF-IDF + softmax (çok sınıflı lojistik) regresyon
+modeli. Kategori ve tehdit seviyesini ağ çağrısı yapmadan, yalnızca CPU ile tahmin eder. Her iki tahminin
+güveni PRECLASSIFIER_THRESHOLD'u geçen haberler AI'a gönderilmeden kaydedilir; diğerleri kuyruktaki gibi
+AI'a gider. Haber önbellekte CVSS puanı bulunan bir CVE içeriyorsa tehdit seviyesi doğrudan puandan gelir.
+Yerel sonuçlarda AI özeti yoktur (summary boş kalır); arayüz ve bildirimler bunları ayrı gösterir, istenirse
+haber panelden AI ile yeniden analiz edilebilir.
+
+Model harici bağımlılık olmadan saf Python ile eğitilir ve JSON olarak saklanır; model dosyası yoksa
+sınıflandırıcı devre dışıdır.
+
+Kullanım:
+    python -m core.preclassifier train      # Modeli eğitir, doğrulama kümesindeki başarıyı raporlar ve kaydeder
+    python -m core.preclassifier evaluate   # Kayıtlı modeli doğrulama kümesindeki AI etiketleriyle karşılaştırır
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import random
+import argparse
+import threading
+from collections import Counter
+from core import db
+from core.cache import get_cache
+from core.classifier import fold
+from core.dedup import HTML_TAG_PATTERN, STOPWORDS
+from core.prompts import THREAT_LEVELS
+from core.logger import setup_logger
+
+logger = setup_logger("Preclassifier")
+
+DB_PATH = db.DB_PATH
+MODEL_PATH = os.getenv('PRECLASSIFIER_PATH', 'data/preclassifier.json')
+THRESHOLD = float(os.getenv('PRECLASSIFIER_THRESHOLD', 0.85))       # İki tahminin de aşması gereken güven
+MIN_TRAINING_ROWS = int(os.getenv('PRECLASSIFIER_MIN_ROWS', 200))   # Bundan az etiketli haberle eğitilmez
+MIN_DF = 2              # Sözlüğe girmek için bir kelimenin geçmesi gereken en az haber sayısı
+MAX_FEATURES = 20000
+EPOCHS = 15
+LEARNING_RATE = 0.5
+HOLDOUT_EVERY = 5       # id % 5 == 0 olan haberler doğrulama için ayrılır, eğitimde kullanılmaz
+CONTENT_CHARS = 2000
+
+TOKEN_PATTERN = re.compile(r"\w+(?:-\w+)*")
+CVE_PATTERN = re.compile(r"\bCVE-\d{4}-\d{4,}\b", re.IGNORECASE)
+# CVSS v3 nitel derecelendirmesi
+CVSS_LEVELS = [(9.0, "CRITICAL"), (7.0, "HIGH"), (4.0, "MEDIUM"), (0.1, "LOW")]
+
+def clean_text(text):
+    return re.sub(r"\s+", " ", HTML_TAG_PATTERN.sub(" ", text or "")).strip()
+
+def tokenize(title, content=""):
+    """Başlık ve içerikten kelime ve ikili kelime (bigram) özelliklerini çıkarır."""
+    text = fold(f"{title or ''} {clean_text(content)[:CONTENT_CHARS]}")
+    tokens = [t for t in TOKEN_PATTERN.findall(text) if len(t) > 2 and t not in STOPWORDS]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+def cvss_threat(title, content=""):
+    """Metindeki CVE'lerden önbellekte CVSS puanı olanların en yükseğine göre tehdit seviyesini döner."""
+    scores = []
+    for cve_id in {m.upper() for m in CVE_PATTERN.findall(f"{title or ''} {content or ''}")}:
+        cached = get_cache(f"cve_{cve_id}")
+        try:
+            scores.append(float(cached["cvss"]))
+        except (TypeError, KeyError, ValueError):
+            continue
+    if not scores:
+        return None, None
+    score = max(scores)
+    return next((level for limit, level in CVSS_LEVELS if score >= limit), None), score
+
+class SoftmaxModel:
+    """Seyrek özellikler ({özellik: ağırlık}) üzerinde çok sınıflı lojistik regresyon."""
+
+    def __init__(self, classes, weights=None, bias=None):
+        self.classes = list(classes)
+        self.weights = weights or {c: {} for c in self.classes}
+        self.bias = bias or {c: 0.0 for c in self.classes}
+
+    def probabilities(self, features):
+        scores = {c: self.bias[c] + sum(self.weights[c].get(f, 0.0) * v for f, v in features.items())
+                  for c in self.classes}
+        top = max(scores.values())
+        exps = {c: math.exp(s - top) for c, s in scores.items()}
+        total = sum(exps.values())
+        return {c: e / total for c, e in exps.items()}
+
+    def predict(self, features):
+        """(en olası sınıf, olasılığı) döner."""
+        probs = self.probabilities(features)
+        label = max(probs, key=probs.get)
+        return label, probs[label]
+
+    def fit(self, samples, labels, epochs=EPOCHS, learning_rate=LEARNING_RATE, seed=42):
+        """Stokastik gradyan inişiyle eğitir; öğrenme oranı her turda azalır."""
+        order = list(range(len(samples)))
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            rate = learning_rate / (1 + epoch)
+            for i in order:
+                features, target = samples[i], labels[i]
+                for c, p in self.probabilities(features).items():
+                    gradient = p - (1.0 if c == target else 0.0)
+                    if abs(gradient) < 1e-6:
+                        continue
+                    row = self.weights[c]
+                    for f, v in features.items():
+                        row[f] = row.get(f, 0.0) - rate * gradient * v
+                    self.bias[c] -= rate * gradient
+        return self
+
+    def to_dict(self):
+        # Etkisi olmayan ağırlıklar dosyaya yazılmaz
+        return {"classes": self.classes, "bias": self.bias,
+                "weights": {c: {f: round(w, 5) for f, w in row.items() if abs(w) >= 1e-4}
+                            for c, row in self.weights.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["classes"], data["weights"], data["bias"])
+
+class Preclassifier:
+    """TF-IDF özellik çıkarıcı ile kategori ve tehdit seviyesi modellerini bir arada tutar."""
+
+    def __init__(self, idf, category, threat_level, meta=None):
+        self.idf = idf
+        self.heads = {"category": category, "threat_level": threat_level}
+        self.meta = meta or {}
+
+    def features(self, title, content=""):
+        """L2 normalize edilmiş, alt doğrusal (1 + log tf) TF-IDF vektörü."""
+        counts = Counter(t for t in tokenize(title, content) if t in self.idf)
+        vector = {t: (1 + math.log(n)) * self.idf[t] for t, n in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {t: v / norm for t, v in vector.items()}
+
+    def predict(self, title, content=""):
+        """{"category": (etiket, güven), "threat_level": (etiket, güven)} döner."""
+        features = self.features(title, content)
+        return {name: head.predict(features) for name, head in self.heads.items()}
+
+    @classmethod
+    def train(cls, rows):
+        """rows: [(başlık, içerik, kategori, tehdit seviyesi)] listesi."""
+        documents = [set(tokenize(title, content)) for title, content, _, _ in rows]
+        df = Counter(t for doc in documents for t in doc)
+        vocabulary = [t for t, n in df.most_common(MAX_FEATURES) if n >= MIN_DF]
+        idf = {t: math.log((1 + len(rows)) / (1 + df[t])) + 1 for t in vocabulary}
+
+        model = cls(idf, None, None)
+        samples = [model.features(title, content) for title, content, _, _ in rows]
+        categories = [r[2] for r in rows]
+        threats = [r[3] for r in rows]
+        model.heads["category"] = SoftmaxModel(sorted(set(categories))).fit(samples, categories)
+        model.heads["threat_level"] = SoftmaxModel([t for t in THREAT_LEVELS if t in set(threats)]).fit(samples, threats)
+        model.meta = {"rows": len(rows), "features": len(idf)}
+        return model
+
+    def to_dict(self):
+        return {"idf": {t: round(v, 5) for t, v in self.idf.items()}, "meta": self.meta,
+                **{name: head.to_dict() for name, head in self.heads.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["idf"], SoftmaxModel.from_dict(data["category"]),
+                   SoftmaxModel.from_dict(data["threat_level"]), data.get("meta"))
+
+    def save(self, path=None):
+        path = path or MODEL_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or MODEL_PATH, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+# Süreç içinde paylaşılan model; dosya değişirse (yeniden eğitim) bir sonraki çağrıda yeniden okunur
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Kayıtlı modeli döner; model dosyası yoksa veya okunamıyorsa None."""
+    global _model, _model_mtime
+    try:
+        mtime = os.path.getmtime(MODEL_PATH)
+    except OSError:
+        return None
+    with _model_lock:
+        if mtime != _model_mtime:
+            try:
+                _model = Preclassifier.load(MODEL_PATH)
+                logger.info(f"🧮 Ön sınıflandırıcı modeli yüklendi ({_model.meta.get('rows', '?')} haberle eğitilmiş).")
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"❌ Ön sınıflandırıcı modeli okunamadı: {e}")
+                _model = None
+            _model_mtime = mtime
+        return _model
+
+def classify(model, title, content="", threshold=None):
+    """
+    Haberi yerel olarak sınıflandırır. Kategori ve tehdit seviyesi güveni eşiği geçerse
+    store_analysis ile kaydedilebilecek bir analiz, aksi halde None döner. Özet boştur; technical_details
+    sınıflandırıcı güvenini taşır.
+    """
+    threshold = THRESHOLD if threshold is None else threshold
+    prediction = model.predict(title, content)
+    category, category_conf = prediction["category"]
+    threat, threat_conf = prediction["threat_level"]
+    cvss_level, cvss = cvss_threat(title, content)
+    if cvss_level:
+        threat, threat_conf = cvss_level, 1.0
+    if category_conf < threshold or threat_conf < threshold:
+        return None
+
+    details = f"Yerel sınıflandırıcı: kategori güveni %{category_conf * 100:.0f}, tehdit güveni %{threat_conf * 100:.0f}"
+    if cvss is not None:
+        details += f" (CVSS {cvss})"
+    return {
+        "threat_level": threat,
+        "category": category,
+        "summary": "",
+        "technical_details": details,
+    }
+
+def classify_items(items, threshold=None):
+    """
+    Analiz kuyruğundaki haberlerden ({"id", "title", "content"}) yerel olarak etiketlenebilenlerin
+    analizlerini döner: {id: analiz}. Model yoksa boş sözlük döner.
+    """
+    model = get_model()
+    if model is None:
+        return {}
+    results = {}
+    for item in items:
+        result = classify(model, item['title'], item.get('content') or '', threshold)
+        if result:
+            results[item['id']] = result
+    return results
+
+def load_labelled_rows(conn, holdout=False):
+    """AI ile etiketlenmiş kök haberleri döner; holdout=True ise doğrulama kümesini, aksi halde eğitim kümesini."""
+    holdout_sql = "id % ? = 0" if holdout else "id % ? != 0"
+    return conn.execute(f"""
+        SELECT title, feed_summary, category, threat_level FROM news
+        WHERE threat_level IS NOT NULL AND category IS NOT NULL AND duplicate_of IS NULL
+          AND COALESCE(analysis_source, 'llm') = 'llm' AND {holdout_sql}
+    """, (HOLDOUT_EVERY,)).fetchall()
+
+def evaluate(model, rows, threshold=None):
+    """
+    Modeli AI etiketleriyle karşılaştırır: her başlığın doğruluğu, eşiği geçen haber oranı (AI'a gitmeyecek
+    kısım) ve bu haberlerdeki doğruluk.
+    """
+    threshold = THRESHOLD if threshold is None else threshold
+    category_hits = threat_hits = covered = covered_hits = 0
+    for title, content, category, threat in rows:
+        prediction = model.predict(title, content)
+        (p_category, c_conf), (p_threat, t_conf) = prediction["category"], prediction["threat_level"]
+        cvss_level, _ = cvss_threat(title, content)
+        if cvss_level:
+            p_threat, t_conf = cvss_level, 1.0
+        category_hits += p_category == category
+        threat_hits += p_threat == threat
+        if c_conf >= threshold and t_conf >= threshold:
+            covered += 1
+            covered_hits += p_category == category and p_threat == threat
+
+    total = len(rows) or 1
+    return {
+        "rows": len(rows),
+        "category_accuracy": round(category_hits / total, 3),
+        "threat_accuracy": round(threat_hits / total, 3),
+        "coverage": round(covered / total, 3),
+        "covered_accuracy": round(covered_hits / covered, 3) if covered else None,
+    }
+
+def _report(stats, threshold):
+    print(f"📊 Doğrulama: {stats['rows']} haber | Kategori doğruluğu: {stats['category_accuracy']:.1%} | "
+          f"Tehdit doğruluğu: {stats['threat_accuracy']:.1%}")
+    covered = f"{stats['covered_accuracy']:.1%}" if stats['covered_accuracy'] is not None else "-"
+    print(f"⚡ Eşik {threshold}: haberlerin {stats['coverage']:.1%} kadarı AI'a gönderilmeden etiketlenir "
+          f"(bu haberlerde doğruluk: {covered})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SentinelAi yerel ön sınıflandırıcı")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    from core.fetcher import init_db  # fetcher bu modülü içe aktarır; döngüsel import olmasın diye burada
+    init_db()
+    conn = db.get_connection(DB_PATH)
+    try:
+        if args.command == "train":
+            rows = load_labelled_rows(conn)
+            if len(rows) < MIN_TRAINING_ROWS:
+                print(f"⚠️ Eğitim için yeterli etiketli haber yok ({len(rows)} < {MIN_TRAINING_ROWS}).")
+                return 1
+            model = Preclassifier.train(rows)
+            model.save(args.model)
+            print(f"✅ Model {len(rows)} haber ve {len(model.idf)} özellikle eğitildi: {args.model}")
+        else:
+            try:
+                model = Preclassifier.load(args.model)
+            except OSError:
+                print(f"⚠️ Model bulunamadı: {args.model} (önce: python -m core.preclassifier train)")
+                return 1
+        _report(evaluate(model, load_labelled_rows(conn, holdout=True), args.threshold), args.threshold)
+        return 0
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
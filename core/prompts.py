@@ -2,6 +2,10 @@
 Centralized storage for all AI prompts used in SentinelAi.
 """
 
+# Valid values for the structured analysis fields
+THREAT_LEVELS = ["CRITICAL", "HIGH", "MEDIUM", "LOW"]
+VALID_CATEGORIES = ["Malware", "Phishing", "Ransomware", "Vulnerability", "Breach", "DDoS", "APT", "Data Leak", "General"]
+
 ANALYSIS_SYSTEM_PROMPT = """
 You are a cybersecurity expert AI. Your task is to analyze security news and provide structured intelligence.
 You must return your response in a valid JSON format. Do not add any markdown formatting (like ```json ... ```) outside the JSON block if possible, or strictly adhere to the requested format.
@@ -24,6 +28,14 @@ Rules:
 3. Be concise and professional.
 """
 
+BATCH_ANALYSIS_SYSTEM_PROMPT = ANALYSIS_SYSTEM_PROMPT + """
+Batch Mode:
+You will receive several news items, each starting with a line "ID: <id>".
+Analyze every item independently and return a JSON array (and nothing else) with exactly one object per item.
+Each object must contain the fields described above plus an "id" field copied verbatim from the item.
+Example: [{"id": "12", "threat_level": "HIGH", "category": "Malware", "summary": "...", "technical_details": "..."}]
+"""
+
 def generate_news_prompt(title, link, content=""):
     return f"""
     Analyze the following security news:
@@ -34,6 +46,18 @@ def generate_news_prompt(title, link, content=""):
     Return the JSON analysis.
     """
 
+def generate_batch_news_prompt(items):
+    """Builds a single prompt containing several news items keyed by their id."""
+    blocks = []
+    for item in items:
+        blocks.append(
+            f"ID: {item['id']}\n"
+            f"Title: {item['title']}\n"
+            f"Link: {item.get('link', '')}\n"
+            f"Content Snippet: {(item.get('content') or '')[:500]}"
+        )
+    return "Analyze the following security news items:\n\n" + "\n\n---\n\n".join(blocks) + "\n\nReturn the JSON array."
+
 def generate_cve_prompt(cve_id, summary, cvss):
     return f"""
     Analyze the following CVE:
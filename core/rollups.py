@@ -0,0 +1,143 @@
+"""
+Özet (rollup) tabloları
+-----------------------
+Panel istatistikleri ve sayfalama toplamları 'news' tablosunu GROUP BY ile taramadan okunabilsin
+diye news_rollups tablosunda tutulur. Tablo, haber eklenirken, analiz yazılırken (güncelleme)
+ve silinirken tetikleyicilerle (trigger) artımlı olarak güncellenir.
+
+Boyutlar: 'all' (toplam), 'source', 'category', 'day' (eklenme günü), 'threat' (tehdit seviyesi).
+"""
+
+import hashlib
+import json
+from core.logger import setup_logger
+
+logger = setup_logger("Rollups")
+
+DIMENSIONS = ("all", "source", "category", "day", "threat")
+ROLLUP_TRIGGERS = ("news_rollups_insert", "news_rollups_delete", "news_rollups_update")
+PENDING_THREAT = "PENDING"
+INTENSITY_DAYS = 7
+
+def _bucket_exprs(row):
+    """Bir satırın her boyuttaki kova (bucket) değerini veren SQL ifadeleri."""
+    return {
+        "all": "''",
+        "source": f"COALESCE({row}.source, '')",
+        "category": f"COALESCE({row}.category, '')",
+        "day": f"date(COALESCE({row}.created_at, CURRENT_TIMESTAMP))",
+        # Analizi olmayan haberler PENDING kovasında sayılır
+        "threat": f"COALESCE({row}.threat_level, '{PENDING_THREAT}')",
+    }
+
+def _apply(row, dimensions, delta):
+    """Satırın kovalarına delta ekleyen UPSERT ifadesi."""
+    exprs = _bucket_exprs(row)
+    values = ", ".join(f"('{d}', {exprs[d]}, {delta})" for d in dimensions)
+    return (f"INSERT INTO news_rollups (dimension, bucket, total) VALUES {values} "
+            "ON CONFLICT(dimension, bucket) DO UPDATE SET total = total + excluded.total;")
+
+def init_rollups_db(cursor):
+    """Özet tablosunu ve tetikleyicilerini oluşturur; ilk kurulumda mevcut haberlerden doldurur."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='news_rollups'")
+    is_new = cursor.fetchone() is None
+
+    # Eski tek boyutlu sayaç tablosu news_rollups'a taşındı
+    for trigger in ("news_counts_insert", "news_counts_delete", "news_counts_update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute("DROP TABLE IF EXISTS news_counts")
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS news_rollups (
+            dimension TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, bucket)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS news_rollups_insert AFTER INSERT ON news BEGIN
+            {_apply("new", DIMENSIONS, 1)}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS news_rollups_delete AFTER DELETE ON news BEGIN
+            {_apply("old", DIMENSIONS, -1)}
+        END
+    ''')
+    # Analiz yazıldığında kategori ve tehdit seviyesi kovaları değişir
+    changed = ("source", "category", "threat")
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS news_rollups_update AFTER UPDATE OF source, category, threat_level ON news BEGIN
+            {_apply("old", changed, -1)}
+            {_apply("new", changed, 1)}
+        END
+    ''')
+
+    if is_new:
+        rebuild_rollups(cursor)
+
+def drop_rollups_db(cursor):
+    """Özet tablosunu ve tetikleyicileri kaldırır (şema değişikliğinde init_rollups_db yeniden oluşturur)."""
+    for trigger in ROLLUP_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute("DROP TABLE IF EXISTS news_rollups")
+
+def rebuild_rollups(cursor):
+    """Özet tablosunu 'news' tablosundan baştan hesaplar (tek seferlik geçiş veya onarım için)."""
+    cursor.execute("DELETE FROM news_rollups")
+    for dimension, expr in _bucket_exprs("news").items():
+        cursor.execute(f'''
+            INSERT INTO news_rollups (dimension, bucket, total)
+            SELECT '{dimension}', {expr} AS bucket, COUNT(*) FROM news GROUP BY bucket
+        ''')
+    cursor.execute("DELETE FROM news_rollups WHERE total = 0")
+    cursor.execute("SELECT total FROM news_rollups WHERE dimension = 'all'")
+    row = cursor.fetchone()
+    if row and row[0]:
+        logger.info(f"🛠️ İstatistik özetleri oluşturuldu: {row[0]} haber.")
+
+def news_count(cursor, category=None):
+    """Toplam (veya kategorideki) haber sayısını özet tablosundan O(1) okur."""
+    return bucket_count(cursor, "category", category) if category else bucket_count(cursor, "all", "")
+
+def bucket_count(cursor, dimension, bucket):
+    """Tek bir boyut kovasındaki haber sayısını döner."""
+    cursor.execute("SELECT total FROM news_rollups WHERE dimension = ? AND bucket = ?", (dimension, bucket))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def _buckets(cursor, dimension, extra="", params=(), order="total DESC"):
+    cursor.execute(f'''
+        SELECT bucket, total FROM news_rollups
+        WHERE dimension = ? AND total > 0 {extra}
+        ORDER BY {order}
+    ''', (dimension,) + tuple(params))
+    return cursor.fetchall()
+
+def source_stats(cursor):
+    return [{"source": b, "count": t} for b, t in _buckets(cursor, "source")]
+
+def category_stats(cursor):
+    # Sadece kısa ve anlamlı kategorileri getir (AI hatalı parse etmişse temizle)
+    return [{"category": b, "count": t}
+            for b, t in _buckets(cursor, "category", "AND bucket != '' AND length(bucket) < 25")]
+
+def intensity_stats(cursor, days=INTENSITY_DAYS):
+    rows = _buckets(cursor, "day", "AND bucket >= date('now', ?)", (f"-{days} days",), order="bucket ASC")
+    return [{"date": b, "count": t} for b, t in rows]
+
+def threat_stats(cursor):
+    return [{"threat_level": b, "count": t} for b, t in _buckets(cursor, "threat")]
+
+def dashboard(cursor):
+    """Panelin tüm istatistiklerini tek seferde ve bir sürüm özetiyle (ETag için) döner."""
+    data = {
+        "total": news_count(cursor),
+        "sources": source_stats(cursor),
+        "categories": category_stats(cursor),
+        "intensity": intensity_stats(cursor),
+        "threat_levels": threat_stats(cursor),
+    }
+    version = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    return data, version
@@ -0,0 +1,169 @@
+"""
+Bildirim yönlendirme kuralları
+------------------------------
+Analizi tamamlanan haberlerin hangi kanallara (Telegram sohbetleri, webhook, yerel dosya) bildirileceğini
+routing_rules.json dosyasındaki kurallara göre belirler. Kurallar dosya değiştiğinde bir kez derlenir:
+
+- Tüm kuralların anahtar kelimeleri tek bir sınıflandırıcıda (core.classifier) birleşir; metin kural
+  sayısından bağımsız olarak tek geçişte taranır.
+- Kategori, tehdit seviyesi ve kaynak filtreleri küme üyeliğiyle, düzenli ifadeler yalnızca diğer
+  filtreleri geçen kurallar için denenir.
+
+Bir kuralın tüm filtreleri sağlanmalıdır (VE); bir filtredeki değerlerden biri yeterlidir (VEYA). Kurallar
+sırayla değerlendirilir, "stop": true olan kural eşleşirse sonrakilere bakılmaz. Hiçbir kural eşleşmezse
+"default" kanallarına gönderilir. Örnek: routing_rules.example.json
+
+Kuralları doğrulamak ve değerlendirme süresini ölçmek için: python -m core.routing
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from core import classifier
+from core.prompts import THREAT_LEVELS
+from core.logger import setup_logger
+
+logger = setup_logger("Routing")
+
+ROUTING_RULES_PATH = os.getenv('ROUTING_RULES_PATH', 'routing_rules.json')
+CHANNEL_TYPES = {"telegram": (), "webhook": ("url",), "file": ("path",)}
+RULE_FIELDS = {"name", "keywords", "regex", "categories", "threat_levels", "min_threat_level", "sources",
+               "channels", "stop"}
+
+class Rule:
+    """Derlenmiş tek bir yönlendirme kuralı."""
+
+    def __init__(self, index, spec, channels):
+        self.name = spec.get('name') or f"rule-{index + 1}"
+        unknown = set(spec) - RULE_FIELDS
+        if unknown:
+            raise ValueError(f"{self.name}: bilinmeyen alan(lar) {sorted(unknown)}")
+
+        self.channels = list(spec.get('channels') or [])
+        if not self.channels:
+            raise ValueError(f"{self.name}: en az bir kanal gerekli")
+        missing = [c for c in self.channels if c not in channels]
+        if missing:
+            raise ValueError(f"{self.name}: tanımsız kanal(lar) {missing}")
+
+        self.keywords = [k for k in spec.get('keywords') or [] if k.strip()]
+        self.regex = re.compile(spec['regex'], re.IGNORECASE) if spec.get('regex') else None
+        self.categories = frozenset(classifier.fold(c) for c in spec.get('categories') or [])
+        self.sources = frozenset(classifier.fold(s) for s in spec.get('sources') or [])
+
+        levels = [level.upper() for level in spec.get('threat_levels') or []]
+        if spec.get('min_threat_level'):
+            minimum = spec['min_threat_level'].upper()
+            if minimum not in THREAT_LEVELS:
+                raise ValueError(f"{self.name}: geçersiz min_threat_level '{minimum}'")
+            # THREAT_LEVELS en kritikten başlar
+            levels += THREAT_LEVELS[:THREAT_LEVELS.index(minimum) + 1]
+        invalid = [level for level in levels if level not in THREAT_LEVELS]
+        if invalid:
+            raise ValueError(f"{self.name}: geçersiz tehdit seviyesi {invalid}")
+        self.threat_levels = frozenset(levels)
+        self.stop = bool(spec.get('stop'))
+
+class RuleSet:
+    """Kanal tanımları ve sırayla değerlendirilen derlenmiş kurallar."""
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.channels = {}
+        for name, channel in (config.get('channels') or {}).items():
+            kind = channel.get('type')
+            if kind not in CHANNEL_TYPES:
+                raise ValueError(f"{name}: geçersiz kanal türü '{kind}'")
+            missing = [field for field in CHANNEL_TYPES[kind] if not channel.get(field)]
+            if missing:
+                raise ValueError(f"{name}: eksik alan(lar) {missing}")
+            self.channels[name] = channel
+
+        self.rules = [Rule(i, spec, self.channels) for i, spec in enumerate(config.get('rules') or [])]
+        self.default = list(config.get('default') or [])
+        missing = [c for c in self.default if c not in self.channels]
+        if missing:
+            raise ValueError(f"default: tanımsız kanal(lar) {missing}")
+
+        # Etiket olarak kural sırası kullanılır; metin bir kez taranıp tüm kuralların kelime eşleşmeleri bulunur
+        keyword_sets = {i: rule.keywords for i, rule in enumerate(self.rules) if rule.keywords}
+        self._keywords = classifier.KeywordClassifier(keyword_sets) if keyword_sets else None
+
+    def __bool__(self):
+        return bool(self.rules or self.default)
+
+    def match(self, article):
+        """
+        Haberin gönderileceği kanal adlarını (sıralı, tekrarsız) döner.
+        article: {"title", "summary", "source", "category", "threat_level"}
+        """
+        text = f"{article.get('title') or ''} {article.get('summary') or ''}"
+        hits = self._keywords.scan(text) if self._keywords else {}
+        category = classifier.fold(article.get('category'))
+        level = (article.get('threat_level') or "").upper()
+        source = classifier.fold(article.get('source'))
+
+        channels = {}
+        for i, rule in enumerate(self.rules):
+            if ((rule.categories and category not in rule.categories)
+                    or (rule.threat_levels and level not in rule.threat_levels)
+                    or (rule.sources and source not in rule.sources)
+                    or (rule.keywords and i not in hits)
+                    or (rule.regex and not rule.regex.search(text))):
+                continue
+            channels.update(dict.fromkeys(rule.channels))
+            if rule.stop:
+                break
+        return list(channels) if channels else list(self.default)
+
+def load_rules(path):
+    """Kural dosyasını okuyup derler; hatalı kurallar ValueError fırlatır."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return RuleSet(json.load(f))
+
+_rules = RuleSet()
+_rules_mtime = None
+_rules_lock = threading.Lock()
+
+def get_rules():
+    """
+    Derlenmiş kuralları döner; dosya değiştiyse yeniden derler. Dosya yoksa boş kural kümesi döner.
+    Hatalı bir dosya kaydedilirse önceki kurallar kullanılmaya devam eder.
+    """
+    global _rules, _rules_mtime
+    try:
+        mtime = os.path.getmtime(ROUTING_RULES_PATH)
+    except OSError:
+        mtime = None
+    with _rules_lock:
+        if mtime != _rules_mtime:
+            if mtime is None:
+                _rules = RuleSet()
+            else:
+                try:
+                    _rules = load_rules(ROUTING_RULES_PATH)
+                    logger.info(f"🧭 {len(_rules.rules)} yönlendirme kuralı yüklendi ({len(_rules.channels)} kanal).")
+                except (OSError, ValueError, re.error, AttributeError, TypeError) as e:
+                    logger.error(f"❌ Yönlendirme kuralları okunamadı, önceki kurallar kullanılıyor: {e}")
+            _rules_mtime = mtime
+        return _rules
+
+def channel_config(name):
+    """Kanal tanımını döner; kanal artık tanımlı değilse None."""
+    return get_rules().channels.get(name)
+
+def benchmark(rules, articles, rounds=20):
+    """Kuralların haber başına ortalama değerlendirme süresini (µs) döner."""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for article in articles:
+            rules.match(article)
+    return round((time.perf_counter() - started) * 1e6 / (rounds * len(articles)), 2)
+
+if __name__ == "__main__":
+    rules = load_rules(ROUTING_RULES_PATH)
+    samples = [{"title": text, "summary": "", "source": "The Hacker News", "category": "Vulnerability",
+                "threat_level": "HIGH"} for text in classifier.SAMPLE_TEXTS]
+    print(f"{len(rules.rules)} kural, {len(rules.channels)} kanal | Haber başına: {benchmark(rules, samples)} µs")
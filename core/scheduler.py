@@ -0,0 +1,122 @@
+"""
+Arka plan görevleri
+-------------------
+RSS taraması, önbellek temizliği, analiz worker'ı ve bildirim dağıtıcısı. Aynı veritabanını kullanan birden fazla süreç
+(örn. gunicorn worker'ları) olduğunda görevleri yalnızca lider kilidini tutan süreç çalıştırır;
+diğerleri beklemede kalır ve lider düşerse (kilit süresi dolarsa) görevleri devralır.
+
+Görevleri web sunucusundan ayrı bir süreçte çalıştırmak için: python worker.py
+"""
+
+import os
+import time
+import atexit
+import threading
+from apscheduler.schedulers.background import BackgroundScheduler
+from core import db, fetcher, leader, outbox
+from core.cache import sweep_expired, CACHE_SWEEP_INTERVAL
+from core.worker import analysis_worker
+from core.notifier import notification_dispatcher
+from core.logger import setup_logger
+
+logger = setup_logger("Scheduler")
+
+FETCH_INTERVAL = int(os.getenv('FETCH_INTERVAL', 15))  # RSS tarama aralığı (dakika)
+LOCK_NAME = "background_jobs"
+
+class BackgroundJobs:
+    """Lider seçimine göre zamanlanmış görevleri ve analiz worker'ını başlatıp durduran thread."""
+
+    def __init__(self):
+        self.owner = None
+        self.active = False
+        self._scheduler = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._exit_registered = False
+        self._lease_expires = 0.0
+
+    def start(self):
+        """Lider seçimine katılır (zaten çalışıyorsa bir şey yapmaz)."""
+        if self._thread and self._thread.is_alive():
+            return
+        # Sahip kimliği süreç başladıktan sonra (fork sonrası pid ile) üretilir
+        self.owner = leader.new_owner_id()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="background-jobs", daemon=True)
+        self._thread.start()
+        if not self._exit_registered:
+            atexit.register(self.stop)
+            self._exit_registered = True
+
+    def stop(self):
+        """Görevleri durdurur ve lider kilidini bırakır."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def status(self):
+        conn = db.get_connection(fetcher.DB_PATH)
+        try:
+            current = leader.holder(conn, LOCK_NAME)
+            notifications = outbox.counts(conn)
+        finally:
+            conn.close()
+        return {"leader": current, "owner": self.owner, "active": self.active, "notifications": notifications}
+
+    def _activate(self):
+        self._scheduler = BackgroundScheduler()
+        self._scheduler.add_job(func=fetcher.fetch_rss, trigger="interval", minutes=FETCH_INTERVAL)
+        self._scheduler.add_job(func=sweep_expired, trigger="interval", minutes=CACHE_SWEEP_INTERVAL)
+        self._scheduler.start()
+        analysis_worker.start()
+        notification_dispatcher.start()
+        self.active = True
+        logger.info(f"👑 Arka plan görevleri bu süreçte çalışıyor ({self.owner}).")
+
+    def _deactivate(self):
+        self._scheduler.shutdown(wait=False)
+        self._scheduler = None
+        analysis_worker.stop()
+        notification_dispatcher.stop()
+        self.active = False
+        logger.info(f"⏸️ Arka plan görevleri durduruldu ({self.owner}).")
+
+    def _try_lead(self, renew_interval):
+        started = time.time()
+        conn = db.get_connection(fetcher.DB_PATH)
+        try:
+            is_leader = leader.acquire(conn, LOCK_NAME, self.owner)
+            if is_leader:
+                self._lease_expires = started + leader.LEADER_LEASE
+            return is_leader
+        except Exception as e:
+            # Geçici bir hata (ör. meşgul veritabanı) liderliği hemen bırakmaz; kilit bir sonraki yenileme
+            # denemesinden önce dolacaksa görevler bırakılır, böylece ikinci bir lider oluşmaz
+            keep = self.active and started + renew_interval < self._lease_expires
+            logger.error(f"❌ Lider kilidi yenilenemedi: {e}" + (" (kilit süresi dolana kadar görevler sürüyor)" if keep else ""))
+            return keep
+        finally:
+            conn.close()
+
+    def _run(self):
+        renew_interval = max(1.0, leader.LEADER_LEASE / 3)
+        while True:
+            is_leader = self._try_lead(renew_interval)
+            if is_leader and not self.active:
+                self._activate()
+            elif not is_leader and self.active:
+                self._deactivate()
+            if self._stop.wait(renew_interval):
+                break
+
+        if self.active:
+            self._deactivate()
+        conn = db.get_connection(fetcher.DB_PATH)
+        try:
+            leader.release(conn, LOCK_NAME, self.owner)
+        finally:
+            conn.close()
+        db.close_thread_connections()
+
+background_jobs = BackgroundJobs()
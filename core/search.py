@@ -0,0 +1,102 @@
+"""
+Tam metin arama (FTS5)
+----------------------
+'news' tablosu için harici içerikli (external content) bir FTS5 indeksi tutar. İndeks
+tetikleyicilerle (trigger) senkron kalır; böylece aramalar tablo taraması yerine indeks
+üzerinden bm25 sıralamasıyla yapılır. Kullanıcı sorguları build_match_query() ile güvenli
+FTS5 ifadelerine çevrilir: "çift tırnak" ifade (phrase), sonda * önek (prefix) araması yapar.
+"""
+
+import re
+from core.logger import setup_logger
+
+logger = setup_logger("Search")
+
+# bm25 sütun ağırlıkları: başlık, AI özeti, teknik detay, kategori
+BM25_WEIGHTS = (10.0, 2.0, 1.0, 2.0)
+FTS_COLUMNS = "title, summary, technical_details, category"
+SEARCH_TRIGGERS = ("news_fts_insert", "news_fts_delete", "news_fts_update")
+HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE = "<mark>", "</mark>"
+SNIPPET_TOKENS = 16
+
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+def init_search_db(cursor):
+    """FTS5 tablosunu ve senkronizasyon tetikleyicilerini oluşturur; ilk kurulumda mevcut haberleri indeksler."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='news_fts'")
+    is_new = cursor.fetchone() is None
+
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+            title, summary, technical_details, category,
+            content='news', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON news BEGIN
+            INSERT INTO news_fts(rowid, {FTS_COLUMNS})
+            VALUES (new.id, new.title, new.summary, new.technical_details, new.category);
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON news BEGIN
+            INSERT INTO news_fts(news_fts, rowid, {FTS_COLUMNS})
+            VALUES ('delete', old.id, old.title, old.summary, old.technical_details, old.category);
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS news_fts_update AFTER UPDATE OF {FTS_COLUMNS} ON news BEGIN
+            INSERT INTO news_fts(news_fts, rowid, {FTS_COLUMNS})
+            VALUES ('delete', old.id, old.title, old.summary, old.technical_details, old.category);
+            INSERT INTO news_fts(rowid, {FTS_COLUMNS})
+            VALUES (new.id, new.title, new.summary, new.technical_details, new.category);
+        END
+    ''')
+
+    if is_new:
+        rebuild_search_index(cursor)
+
+def drop_search_db(cursor):
+    """İndeksi ve tetikleyicileri kaldırır (şema değişikliğinde init_search_db yeniden oluşturur)."""
+    for trigger in SEARCH_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute("DROP TABLE IF EXISTS news_fts")
+
+def rebuild_search_index(cursor):
+    """İndeksi 'news' tablosundan baştan oluşturur (tek seferlik geçiş veya onarım için)."""
+    cursor.execute("INSERT INTO news_fts(news_fts) VALUES ('rebuild')")
+    cursor.execute("SELECT COUNT(*) FROM news")
+    count = cursor.fetchone()[0]
+    if count:
+        logger.info(f"🛠️ Arama indeksi oluşturuldu: {count} haber indekslendi.")
+
+def build_match_query(text):
+    """
+    Kullanıcı arama metnini güvenli bir FTS5 MATCH ifadesine çevirir; anlamlı terim yoksa None döner.
+    Her terim tırnak içine alınır (FTS5 operatörleri ve noktalama sorgu hatasına yol açmaz),
+    terimler AND ile birleşir. Örnek: 'lockbit "data leak" ransom*'
+    """
+    terms = []
+    for phrase, word in QUERY_PATTERN.findall(text or ""):
+        if phrase.strip():
+            terms.append(f'"{phrase.strip()}"')
+        elif word:
+            prefix = word.endswith("*")
+            word = word.replace('"', "").rstrip("*")
+            if re.search(r"\w", word):
+                terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms) if terms else None
+
+def search_clause():
+    """
+    Aramalı haber sorgusunun seçim ve birleştirme parçalarını döner. Sonuçlara vurgulanmış başlık
+    (title_highlight) ve AI özetinden eşleşen kısa bir bölüm (snippet) eklenir.
+    """
+    select = (
+        f"news.*, highlight(news_fts, 0, '{HIGHLIGHT_OPEN}', '{HIGHLIGHT_CLOSE}') AS title_highlight, "
+        f"snippet(news_fts, 1, '{HIGHLIGHT_OPEN}', '{HIGHLIGHT_CLOSE}', '…', {SNIPPET_TOKENS}) AS snippet"
+    )
+    source = "news_fts JOIN news ON news.id = news_fts.rowid"
+    order = "bm25(news_fts, {}, {}, {}, {})".format(*BM25_WEIGHTS)
+    return select, source, order
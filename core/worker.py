@@ -0,0 +1,74 @@
+"""
+Analiz worker'ı
+---------------
+Analiz kuyruğunu (analysis_jobs) arka planda sürekli boşaltan tek bir thread.
+Kuyruğa iş eklendiğinde (job_queue.job_available) anında uyanır; bekleyen işler geri çekilme
+süresindeyse bir sonraki iş zamanına kadar, hiç iş yoksa IDLE_POLL süresi kadar uyur.
+"""
+
+import os
+import threading
+from core import db, job_queue
+from core import fetcher
+from core.logger import setup_logger
+
+logger = setup_logger("Worker")
+
+IDLE_POLL = int(os.getenv('WORKER_IDLE_POLL', 60))  # İş yokken kontrol aralığı (sn)
+
+class AnalysisWorker:
+    """Analiz kuyruğunu sürekli boşaltan arka plan thread'i."""
+
+    def __init__(self):
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Worker thread'ini başlatır (zaten çalışıyorsa bir şey yapmaz)."""
+        if self._thread and self._thread.is_alive():
+            if not self._stop.is_set():
+                return
+            # Önceki durdurma henüz tamamlanmadı (stop() zaman aşımı); eski thread'in bitmesi beklenir
+            self._thread.join()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="analysis-worker", daemon=True)
+        self._thread.start()
+        logger.info("⚙️ Analiz worker'ı başlatıldı.")
+
+    def stop(self):
+        """Worker'ı durdurur ve mevcut turun bitmesini kısa süre bekler."""
+        self._stop.set()
+        job_queue.job_available.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def wake(self):
+        """Worker'ı bir sonraki bekleme süresini beklemeden uyandırır."""
+        job_queue.job_available.set()
+
+    def _seconds_until_next_job(self):
+        conn = db.get_connection(fetcher.DB_PATH)
+        try:
+            due = job_queue.next_due_in(conn)
+        finally:
+            conn.close()
+        return IDLE_POLL if due is None else min(max(due, 1.0), IDLE_POLL)
+
+    def _run(self):
+        # İlk turda hemen çalışmak yerine bir sinyal veya bekleme süresi beklenir;
+        # böylece uygulama açılışı AI çağrılarıyla yavaşlamaz.
+        timeout = IDLE_POLL
+        while not self._stop.is_set():
+            job_queue.job_available.wait(timeout)
+            job_queue.job_available.clear()
+            if self._stop.is_set():
+                break
+            try:
+                fetcher.process_missing_analysis(drain=True, stop=self._stop)
+                timeout = self._seconds_until_next_job()
+            except Exception as e:
+                logger.error(f"❌ Analiz worker hatası: {e}")
+                timeout = IDLE_POLL
+        db.close_thread_connections()
+
+analysis_worker = AnalysisWorker()
@@ -1,6 +1,6 @@
-import sqlite3
+from core import db
 
-conn = sqlite3.connect('data/sentinel.db')
+conn = db.get_connection()
 cursor = conn.cursor()
 
 valid_categories = ['Malware', 'Phishing', 'Ransomware', 'Vulnerability', 'Breach', 'DDoS', 'APT', 'Data Leak', 'General']
@@ -1,8 +1,13 @@
 let currentPage = 1;
+let currentCategory = '';
+let nextCursor = null;
 let sourceChart = null;
 let barChart = null;
 let categoryChart = null;
-let lastPendingCount = -1; // İlk yüklemede tetiklenmemesi için -1
+let aiProviders = {};
+let pendingAnalysis = 0;
+let liveRefreshTimer = null;
+let lastDashboardEtag = null; // İstatistikler değişmediyse grafikler yeniden çizilmez
 
 // Merkezi Renk Paleti
 const CATEGORY_COLORS = {
@@ -21,111 +26,159 @@ const CATEGORY_COLORS = {
 document.addEventListener('DOMContentLoaded', () => {
     fetchNews(1);
     updateStats();
-    updateAIStatus();
 
-    // Polling düzenekleri
-    setInterval(updateAIStatus, 15000);   // AI durumunu ve kuyruğu 15sn'de bir çek
-    setInterval(() => {
-        // Eğer ilk sayfadaysak yeni haberleri kontrol et
-        if (typeof currentPage !== 'undefined' && currentPage === 1) {
-            fetchNews(1);
-        }
-        updateStats(); // Grafikleri güncelle
-    }, 60000); // 1 dakikada bir veri yenile
+    if (window.EventSource) {
+        startLiveStream();
+    } else {
+        startPolling();
+    }
 });
 
-async function updateSystemHealth() {
-    try {
-        const res = await fetch('/api/system/health');
-        const data = await res.json();
-        const cpuElem = document.getElementById('cpu-val');
-        const ramElem = document.getElementById('ram-val');
+// Canlı akışı desteklemeyen tarayıcılar veya akış kapasitesi dolu olduğunda eski yoklama düzeni
+function startPolling() {
+    updateAIStatus();
+    setInterval(updateAIStatus, 15000);
+    setInterval(refreshLiveData, 60000);
+}
 
-        if (cpuElem) {
-            cpuElem.innerText = `${data.cpu}%`;
-            cpuElem.style.color = data.cpu > 80 ? '#ef4444' : '#3b82f6';
-        }
-        if (ramElem) {
-            ramElem.innerText = `${data.ram}%`;
-            ramElem.style.color = data.ram > 80 ? '#ef4444' : '#3b82f6';
-        }
+// Sunucudan gelen canlı olaylar (SSE): yeni haber, analiz, kuyruk, AI durumu ve sistem sağlığı.
+// EventSource koptuğunda kendisi yeniden bağlanır ve kaçırılan olayları Last-Event-ID ile alır.
+function startLiveStream() {
+    const source = new EventSource('/api/stream');
+    const parse = (handler) => (e) => handler(JSON.parse(e.data));
+
+    source.addEventListener('news', parse(() => scheduleLiveRefresh()));
+    source.addEventListener('analysis', parse(() => scheduleLiveRefresh()));
+    source.addEventListener('queue', parse(data => {
+        pendingAnalysis = data.pending;
+        renderAIStatus();
+    }));
+    source.addEventListener('ai_status', parse(data => {
+        aiProviders = data;
+        renderAIStatus();
+    }));
+    source.addEventListener('health', parse(renderSystemHealth));
+    // Sunucu akışı reddederse (503: kapasite dolu) EventSource yeniden bağlanmaz; yoklamaya geçilir
+    source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) startPolling();
+    };
+}
 
-    } catch (e) { console.error("Sistem sağlık hatası:", e); }
+// Art arda gelen olaylarda haber ve grafikleri tek seferde yeniler
+function scheduleLiveRefresh() {
+    clearTimeout(liveRefreshTimer);
+    liveRefreshTimer = setTimeout(refreshLiveData, 300);
 }
 
+function refreshLiveData() {
+    // Kullanıcı daha fazla sayfa yüklediyse listesini bozmamak için sadece ilk sayfada yenilenir
+    if (currentPage === 1) fetchNews(1);
+    updateStats();
+}
+
+function renderSystemHealth(data) {
+    const cpuElem = document.getElementById('cpu-val');
+    const ramElem = document.getElementById('ram-val');
+    if (cpuElem) {
+        cpuElem.innerText = `${data.cpu}%`;
+        cpuElem.style.color = data.cpu > 80 ? '#ef4444' : '#3b82f6';
+    }
+    if (ramElem) {
+        ramElem.innerText = `${data.ram}%`;
+        ramElem.style.color = data.ram > 80 ? '#ef4444' : '#3b82f6';
+    }
+}
 
 async function updateAIStatus() {
     try {
         const res = await fetch('/api/ai_status');
         const data = await res.json();
-        const bar = document.getElementById('ai-status-bar');
-        if (!bar) return;
-
-        let html = '<div style="display:flex; align-items:center; gap:12px; font-size:0.85rem; color:#90949a;"><b>AI ENGINE STATUS:</b>';
-        for (const [provider, status] of Object.entries(data)) {
-            if (provider === 'pending_analysis') continue;
-            const isOnline = status === 'aktif' || status === 'active';
-            const color = isOnline ? '#10b981' : '#f59e0b';
-            html += `<span style="display:flex; align-items:center; gap:6px;">
-                        <span style="width:8px; height:8px; border-radius:50%; background:${color}; box-shadow:0 0 8px ${color}"></span>
-                        ${provider.toUpperCase()}
-                     </span>`;
-        }
-        html += '</div>';
-
-        // Kuyruk Durumu
-        if (data.pending_analysis > 0) {
-            html += `<div class="ai-badge pending" style="margin-left:auto; border: 1px solid #ef4444; background: rgba(239,68,68,0.1); padding: 2px 12px; border-radius: 20px; font-size: 0.8rem; color:#ef4444; font-weight:bold;">
-                        ⏳ ${data.pending_analysis} News in Queue
-                     </div>`;
-        } else {
-            html += `<div style="margin-left:auto; color: #3b82f6; font-size: 0.8rem; font-weight:500;">✨ All feeds analyzed</div>`;
-        }
-
-        // OTOMATİK GÜNCELLEME TETİKLEYİCİ: 
-        // Eğer bekleyen sayısı azaldıysa (bir haber analiz edildiyse) sayfayı yenile
-        if (lastPendingCount !== -1 && data.pending_analysis < lastPendingCount) {
-            console.log("⚡ AI analizi tamamlandı, sayfa güncelleniyor...");
-            if (currentPage === 1) fetchNews(1); // İlk sayfadaysak haberleri çek
-            updateStats(); // Grafikleri güncelle
-        }
-        lastPendingCount = data.pending_analysis;
-
-        bar.innerHTML = html;
-        bar.style.display = 'flex';
-        bar.style.alignItems = 'center';
-        bar.style.width = '100%';
+        const previous = pendingAnalysis;
+        pendingAnalysis = data.pending_analysis;
+        delete data.pending_analysis;
+        aiProviders = data;
+        renderAIStatus();
+        // Yoklama modunda: bekleyen sayısı azaldıysa (bir haber analiz edildiyse) verileri yenile
+        if (pendingAnalysis < previous) refreshLiveData();
     } catch (e) { }
 }
 
+function renderAIStatus() {
+    const bar = document.getElementById('ai-status-bar');
+    if (!bar) return;
+
+    let html = '<div style="display:flex; align-items:center; gap:12px; font-size:0.85rem; color:#90949a;"><b>AI ENGINE STATUS:</b>';
+    for (const [provider, status] of Object.entries(aiProviders)) {
+        const isOnline = status === 'aktif' || status === 'active';
+        const color = isOnline ? '#10b981' : '#f59e0b';
+        html += `<span style="display:flex; align-items:center; gap:6px;">
+                    <span style="width:8px; height:8px; border-radius:50%; background:${color}; box-shadow:0 0 8px ${color}"></span>
+                    ${provider.toUpperCase()}
+                 </span>`;
+    }
+    html += '</div>';
+
+    // Kuyruk Durumu
+    if (pendingAnalysis > 0) {
+        html += `<div class="ai-badge pending" style="margin-left:auto; border: 1px solid #ef4444; background: rgba(239,68,68,0.1); padding: 2px 12px; border-radius: 20px; font-size: 0.8rem; color:#ef4444; font-weight:bold;">
+                    ⏳ ${pendingAnalysis} News in Queue
+                 </div>`;
+    } else {
+        html += `<div style="margin-left:auto; color: #3b82f6; font-size: 0.8rem; font-weight:500;">✨ All feeds analyzed</div>`;
+    }
 
+    bar.innerHTML = html;
+    bar.style.display = 'flex';
+    bar.style.alignItems = 'center';
+    bar.style.width = '100%';
+}
 
-async function fetchNews(page = 1) {
-    currentPage = page;
+// Aktif arama ve kategori filtresiyle haber API sorgusunu oluşturur
+function newsQuery(cursor = null) {
     const searchInput = document.getElementById('search-input');
-    const search = searchInput ? searchInput.value : '';
+    const params = new URLSearchParams({ search: searchInput ? searchInput.value : '' });
+    if (currentCategory) params.set('category', currentCategory);
+    if (cursor) params.set('cursor', cursor);
+    return `/api/news?${params.toString()}`;
+}
 
+// Akışın ilk sayfasını yükler (imleçli sayfalama: sonraki sayfalar loadMoreNews ile eklenir)
+async function fetchNews(page = 1) {
+    currentPage = 1;
     try {
-        const res = await fetch(`/api/news?page=${page}&search=${encodeURIComponent(search)}`);
+        const res = await fetch(newsQuery());
         const data = await res.json();
         renderNews(data.news);
-        renderPagination(data.total, data.per_page, data.current_page);
+        renderPagination(data.next_cursor);
+        return data;
+    } catch (e) { console.error("Haber hatası:", e); }
+}
+
+async function loadMoreNews() {
+    if (!nextCursor) return;
+    try {
+        const res = await fetch(newsQuery(nextCursor));
+        const data = await res.json();
+        currentPage += 1;
+        renderNews(data.news, true);
+        renderPagination(data.next_cursor);
     } catch (e) { console.error("Haber hatası:", e); }
 }
 
-function renderNews(newsItems) {
+function renderNews(newsItems, append = false) {
     const feed = document.getElementById('news-feed');
     if (!feed) return;
-    feed.innerHTML = '';
+    if (!append) feed.innerHTML = '';
 
-    if (!newsItems || newsItems.length === 0) {
+    if (!append && (!newsItems || newsItems.length === 0)) {
         feed.innerHTML = '<div style="grid-column: 1/-1; text-align: center; padding: 40px; color: #90949a;">📭 Henüz haber bulunamadı veya kriterlere uygun sonuç yok.</div>';
         return;
     }
 
     newsItems.forEach(item => {
-        let level = (item.ai_analysis || "").includes('KRITIK') ? 'critical' :
-            (item.ai_analysis || "").includes('ORTA') ? 'medium' : 'low';
+        const threat = item.threat_level || '';
+        let level = (threat === 'CRITICAL' || threat === 'HIGH') ? 'critical' :
+            threat === 'MEDIUM' ? 'medium' : 'low';
 
         // Güvenli tırnak kaçırma
         const safeTitle = (item.title || "").replace(/'/g, "\\'").replace(/"/g, "&quot;");
@@ -143,11 +196,12 @@ function renderNews(newsItems) {
                 </span>
                 <small>${item.source}</small>
             </div>
-            <h3>${item.title}</h3>
+            <h3>${item.title_highlight || item.title}</h3>
+            ${item.snippet ? `<p class="search-snippet">${item.snippet}</p>` : ''}
             <div class="card-actions">
                 <a href="${item.link}" target="_blank" class="btn-link">🌐 Git</a>
                 <button class="btn-analyze" onclick="analyzeNews('${safeTitle}', '${item.link}')">
-                    ${item.ai_analysis ? '🧠 Ai Analizi' : '🧠 Analiz'}
+                    ${item.analysis_source === 'local' ? '🧮 Yerel Etiket' : (item.ai_analysis ? '🧠 Ai Analizi' : '🧠 Analiz')}
                 </button>
             </div>`;
         feed.appendChild(card);
@@ -165,27 +219,30 @@ function searchNews(event) {
     fetchNews(1);
 }
 
-function renderPagination(total, perPage, current) {
+function renderPagination(cursor) {
     const container = document.getElementById('pagination-container');
     if (!container) return;
     container.innerHTML = '';
-    const totalPages = Math.ceil(total / perPage);
-
-    // Sadece 5 sayfa göster (veya hepsi)
-    for (let i = 1; i <= Math.min(totalPages, 10); i++) {
-        const btn = document.createElement('button');
-        btn.innerText = i;
-        btn.className = i === current ? 'active' : '';
-        btn.onclick = () => fetchNews(i);
-        container.appendChild(btn);
-    }
+    nextCursor = cursor;
+    if (!cursor) return;
+
+    const btn = document.createElement('button');
+    btn.innerText = 'Daha fazla yükle';
+    btn.className = 'btn-load-more';
+    btn.onclick = loadMoreNews;
+    container.appendChild(btn);
 }
 
 async function updateStats() {
     try {
+        // Tüm istatistikler tek istekte; tarayıcı ETag ile yeniden doğrular (değişiklik yoksa 304)
+        const resDash = await fetch('/api/dashboard');
+        const etag = resDash.headers.get('ETag');
+        if (etag && etag === lastDashboardEtag) return;
+        const statsData = await resDash.json();
+        lastDashboardEtag = etag;
+
         // 1. Kaynak Dağılımı (Doughnut Chart)
-        const resStats = await fetch('/api/stats');
-        const statsData = await resStats.json();
         const srcLabels = statsData.sources.map(s => s.source);
         const srcCounts = statsData.sources.map(s => s.count);
 
@@ -215,8 +272,7 @@ async function updateStats() {
         });
 
         // 2. Haber Yoğunluğu (Bar Chart)
-        const resInt = await fetch('/api/intensity');
-        const intData = await resInt.json();
+        const intData = statsData;
         const intLabels = intData.intensity.map(i => i.date);
         const intCounts = intData.intensity.map(i => i.count);
 
@@ -247,8 +303,7 @@ async function updateStats() {
         });
 
         // 3. Tehdit Kategorileri (Horizontal Bar Chart)
-        const resCat = await fetch('/api/stats/categories');
-        const catData = await resCat.json();
+        const catData = statsData;
         const catLabels = catData.categories.map(c => c.category);
         const catCounts = catData.categories.map(c => c.count);
 
@@ -342,13 +397,11 @@ async function filterNewsByCategory(category) {
             🔍 <b>${category}</b> kategorisi yükleniyor...
         </div>`;
 
-        // API'den kategori bazlı haberleri çek
-        const res = await fetch(`/api/news?category=${encodeURIComponent(category)}&page=1`);
-        const data = await res.json();
+        // API'den kategori bazlı haberleri çek (sonraki sayfalar imleçle yüklenir)
+        currentCategory = category;
+        const data = await fetchNews(1);
 
-        if (data.news && data.news.length > 0) {
-            renderNews(data.news);
-            renderPagination(data.total, 10, 1);
+        if (data && data.news && data.news.length > 0) {
 
             // Sayfayı haber akışına kaydır
             const feedElem = document.getElementById('feed');
@@ -389,6 +442,10 @@ async function queryDNS() {
                             <h5>🌐 A Kayıtları (IP)</h5>
                             <ul>${data.records.A.length ? data.records.A.map(r => `<li>${r}</li>`).join('') : '<li>Kayıt yok</li>'}</ul>
                         </div>
+                        <div class="dns-section">
+                            <h5>🌐 AAAA Kayıtları (IPv6)</h5>
+                            <ul>${data.records.AAAA.length ? data.records.AAAA.map(r => `<li>${r}</li>`).join('') : '<li>Kayıt yok</li>'}</ul>
+                        </div>
                         <div class="dns-section">
                             <h5>📧 MX Kayıtları (Mail)</h5>
                             <ul>${data.records.MX.length ? data.records.MX.map(r => `<li>${r}</li>`).join('') : '<li>Kayıt yok</li>'}</ul>
@@ -401,6 +458,10 @@ async function queryDNS() {
                             <h5>📝 TXT Kayıtları</h5>
                             <ul>${data.records.TXT.length ? data.records.TXT.map(r => `<li>${r}</li>`).join('') : '<li>Kayıt yok</li>'}</ul>
                         </div>
+                        <div class="dns-section">
+                            <h5>🔒 CAA Kayıtları (Sertifika Yetkisi)</h5>
+                            <ul>${data.records.CAA.length ? data.records.CAA.map(r => `<li>${r}</li>`).join('') : '<li>Kayıt yok</li>'}</ul>
+                        </div>
                         <div class="dns-section">
                             <h5>🔀 Name Server (NS)</h5>
                             <ul>${data.records.NS.length ? data.records.NS.map(r => `<li>${r}</li>`).join('') : '<li>Kayıt yok</li>'}</ul>
@@ -477,7 +538,7 @@ async function analyzeNews(title, link) {
             display.appendChild(downloadBtn);
         }
 
-        fetchNews(currentPage);
+        if (currentPage === 1) fetchNews(1);
 
     } catch (e) { if (display) display.innerText = "Hata oluştu."; }
 }
@@ -553,7 +614,8 @@ function closeAnalysis() {
 
 function searchNews(e, page = 1) {
     if (e && e.type === 'keyup' && e.key !== 'Enter') return;
-    fetchNews(page);
+    currentCategory = '';
+    fetchNews(1);
 }
 
 async function analyzeAll() {
@@ -601,17 +663,7 @@ async function querySubdomains() {
 async function updateSystemHealth() {
     try {
         const res = await fetch('/api/system/health');
-        const data = await res.json();
-        const cpuElem = document.getElementById('cpu-val');
-        const ramElem = document.getElementById('ram-val');
-        if (cpuElem) {
-            cpuElem.innerText = `${data.cpu}%`;
-            cpuElem.style.color = data.cpu > 80 ? '#ef4444' : '#3b82f6';
-        }
-        if (ramElem) {
-            ramElem.innerText = `${data.ram}%`;
-            ramElem.style.color = data.ram > 80 ? '#ef4444' : '#3b82f6';
-        }
+        renderSystemHealth(await res.json());
     } catch (e) { }
 }
 
@@ -0,0 +1,29 @@
+import os
+import sys
+import pytest
+
+# Testlerde scheduler ve analiz worker'ı gibi arka plan görevleri çalışmasın
+os.environ.setdefault('SENTINEL_BACKGROUND_JOBS', '0')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """AI yanıt önbelleği, ön sınıflandırıcı modeli ve yönlendirme kuralları testler arasında (ve gerçek veriyle) paylaşılmasın."""
+    import core.cache
+    import core.preclassifier
+    import core.routing
+    monkeypatch.setattr(core.cache, "DB_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(core.preclassifier, "MODEL_PATH", str(tmp_path / "preclassifier.json"))
+    monkeypatch.setattr(core.routing, "ROUTING_RULES_PATH", str(tmp_path / "routing_rules.json"))
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Geçici veritabanına bağlı Flask test istemcisi."""
+    import app as app_module
+    import core.fetcher as fetcher
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(app_module, "DB_PATH", fetcher.DB_PATH)
+    fetcher.init_db()
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
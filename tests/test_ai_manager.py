@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.fetcher as fetcher
+from core import job_queue
+from core.ai_manager import AIManager
+
+def batch_reply(*elements):
+    """Modelin markdown içine sardığı JSON dizisi yanıtını taklit eder."""
+    return "```json\n" + json.dumps(list(elements)) + "\n```"
+
+def analysis(item_id, **overrides):
+    data = {"id": item_id, "threat_level": "HIGH", "category": "Malware",
+            "summary": f"Summary {item_id}", "technical_details": "N/A"}
+    data.update(overrides)
+    return data
+
+def test_analyze_json_batch_validates_each_element():
+    """Toplu analizde her elemanın doğrulandığını ve sadece hatalı olanların başarısız döndüğünü test eder."""
+    ai = AIManager()
+    items = [{"id": i, "title": f"News {i}", "link": f"https://x/{i}"} for i in (1, 2, 3, 4)]
+    reply = batch_reply(
+        analysis("1"),                              # id metin olarak dönebilir
+        analysis(2, category="ransomware"),        # kategori normalize edilir
+        analysis(3, threat_level="SEVERE"),         # geçersiz tehdit seviyesi
+    )
+    with patch.object(ai, 'analyze', return_value=reply) as mock_analyze:
+        results, failed = ai.analyze_json_batch(items)
+
+    mock_analyze.assert_called_once()
+    assert "ID: 4" in mock_analyze.call_args.args[0]
+    assert set(results) == {1, 2}
+    assert results[2]['category'] == "Ransomware"
+    assert failed == [3, 4]
+
+def test_analyze_json_batch_all_failed_on_service_error():
+    """AI servisi hata döndürdüğünde tüm haberlerin yeniden kuyruğa alınacağını test eder."""
+    ai = AIManager()
+    with patch.object(ai, 'analyze', return_value="HATA: servis yok"):
+        results, failed = ai.analyze_json_batch([{"id": 7, "title": "News 7"}])
+    assert results == {} and failed == [7]
+
+def test_process_missing_analysis_requeues_only_failed(tmp_path, monkeypatch):
+    """Sadece başarısız haberlerin geri çekilme süresiyle yeniden planlandığını test eder."""
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(fetcher, "AI_BATCH_SIZE", 3)
+    fetcher.init_db()
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    conn.executemany("INSERT INTO news (title, link) VALUES (?, ?)", [(f"News {i}", f"https://x/{i}") for i in range(3)])
+    job_queue.enqueue(conn, [1, 2, 3])
+    conn.commit()
+
+    calls = []
+    def fake_batch(self, items):
+        calls.append([i['id'] for i in items])
+        ok = {i['id']: AIManager.validate_analysis(analysis(i['id'])) for i in items if len(calls) > 1 or i['id'] != 2}
+        return ok, [i['id'] for i in items if i['id'] not in ok]
+
+    with patch.object(AIManager, 'analyze_json_batch', fake_batch), \
+         patch("time.sleep", side_effect=AssertionError("bekleme olmamalı")):
+        fetcher.process_missing_analysis(drain=True)
+        # Başarısız iş geri çekilme süresinde olduğu için hemen tekrar alınmaz
+        assert calls == [[1, 2, 3]]
+        state, attempts, next_attempt = conn.execute(
+            "SELECT state, attempts, next_attempt_at FROM analysis_jobs WHERE news_id = 2").fetchone()
+        assert (state, attempts) == ("pending", 1) and next_attempt > time.time()
+
+        conn.execute("UPDATE analysis_jobs SET next_attempt_at = 0 WHERE news_id = 2")
+        conn.commit()
+        fetcher.process_missing_analysis()
+
+    assert calls == [[1, 2, 3], [2]]
+    assert job_queue.counts(conn)["done"] == 3
+    rows = conn.execute("SELECT threat_level, ai_analysis FROM news").fetchall()
+    conn.close()
+    assert all(r[0] == "HIGH" and r[1] is None for r in rows)
+
+def test_job_queue_backoff_and_dead_letter(tmp_path, monkeypatch):
+    """Başarısız işlerin üstel geri çekilmeyle planlandığını ve sınırda 'dead' olduğunu test eder."""
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    fetcher.init_db()
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    conn.execute("INSERT INTO news (title, link) VALUES ('News', 'https://x/1')")
+    job_queue.enqueue(conn, [1])
+    conn.commit()
+
+    assert job_queue.backoff_delay(1) == job_queue.BACKOFF_BASE
+    assert job_queue.backoff_delay(3) == job_queue.BACKOFF_BASE * 4
+    for _ in range(job_queue.MAX_ATTEMPTS):
+        conn.execute("UPDATE analysis_jobs SET next_attempt_at = 0")
+        assert job_queue.claim(conn, 10) == [1]
+        job_queue.fail(conn, {1: "timeout"})
+        conn.commit()
+
+    assert job_queue.counts(conn)["dead"] == 1
+    assert job_queue.claim(conn, 10) == []
+    assert job_queue.requeue_all(conn) == 1
+    assert job_queue.claim(conn, 10) == [1]
+    conn.close()
+
+@pytest.fixture
+def fresh_providers(monkeypatch):
+    """Sağlayıcı slotlarını ve soğuma durumlarını sıfırlar; sadece Gemini ve Groq anahtarlı kabul edilir."""
+    monkeypatch.setattr(AIManager, "_slots", {})
+    monkeypatch.setattr(AIManager, "_shared_cooldowns", {})
+    monkeypatch.setattr(AIManager, "_shared_failures", {})
+    monkeypatch.setattr(AIManager, "_clients", {})
+    for service in ("GEMINI", "GROQ"):
+        monkeypatch.setenv(f"{service}_API_KEY", "test")
+        monkeypatch.setenv(f"AI_{service}_CONCURRENCY", "1")
+    for service in ("MISTRAL", "OPENROUTER"):
+        monkeypatch.delenv(f"{service}_API_KEY", raising=False)
+    monkeypatch.setenv("AI_HUGGINGFACE_RPM", "0")
+
+def test_analyze_spreads_concurrent_calls_across_providers(fresh_providers):
+    """Eşzamanlı çağrıların sabit bekleme olmadan farklı sağlayıcılara aynı anda dağıtıldığını test eder."""
+    from concurrent.futures import ThreadPoolExecutor
+    ai = AIManager()
+    used = []
+    def fake_call(service, prompt):
+        used.append(service)
+        time.sleep(0.3)
+        return f"ok from {service}"
+
+    with patch.object(ai, '_call_service', side_effect=fake_call):
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(ai.analyze, ["a", "b"]))
+        elapsed = time.monotonic() - started
+
+    assert sorted(used) == ["gemini", "groq"]
+    assert all(r.startswith("ok from") for r in results)
+    assert elapsed < 0.55
+
+def test_analyze_respects_rpm_bucket_and_fails_over(fresh_providers, monkeypatch):
+    """Dakikalık istek kotası dolan sağlayıcının atlandığını ve hatalı sağlayıcının soğumaya alındığını test eder."""
+    monkeypatch.setenv("AI_GEMINI_RPM", "1")
+    ai = AIManager()
+    calls = []
+    def fake_call(service, prompt):
+        calls.append(service)
+        return "HATA: 500" if service == "groq" and len(calls) == 3 else "ok"
+
+    with patch.object(ai, '_call_service', side_effect=fake_call):
+        assert ai.analyze("first") == "ok"       # gemini (kotası bitti)
+        assert ai.analyze("second") == "ok"      # groq
+        assert ai.analyze("third").startswith("HATA:")  # groq hata verir, gemini kotası yok
+
+    assert calls == ["gemini", "groq", "groq"]
+    assert ai.get_status()["groq"] == "cooldown"
+    assert ai.get_provider_stats()["gemini"]["rpm_remaining"] == 0
+
+def test_hedged_analyze_returns_first_valid_answer(fresh_providers, monkeypatch):
+    """İlk sağlayıcı bütçeyi aşınca ikincisinin paralel başlatıldığını ve hızlı yanıtın kazandığını test eder."""
+    import core.ai_manager as ai_manager_module
+    monkeypatch.setattr(ai_manager_module, "AI_HEDGE_BUDGET", 0.2)
+    ai = AIManager()
+    def fake_call(service, prompt):
+        if service == "gemini":
+            time.sleep(1.0)
+            return "slow gemini"
+        return "fast groq"
+
+    with patch.object(ai, '_call_service', side_effect=fake_call):
+        started = time.monotonic()
+        assert ai.analyze("prompt", hedge=True) == "fast groq"
+        assert time.monotonic() - started < 0.6
+
+        # Arka plan işleri sıralı politikayı korur: ilk sağlayıcının yanıtı beklenir
+        time.sleep(1.0)
+        assert ai.analyze("prompt") == "slow gemini"
+
+def test_sdk_clients_and_http_session_are_reused(fresh_providers):
+    """SDK istemcilerinin ve HTTP oturumunun çağrılar arasında yeniden kullanıldığını test eder."""
+    from core.http_client import get_session
+    ai = AIManager()
+    with patch("core.ai_manager.Groq") as mock_groq:
+        mock_groq.return_value.chat.completions.create.return_value.choices = [MagicMock(message=MagicMock(content="ok"))]
+        assert ai._call_groq("a") == "ok"
+        assert AIManager()._call_groq("b") == "ok"
+    assert mock_groq.call_count == 1
+    assert ai.session is get_session() is AIManager().session
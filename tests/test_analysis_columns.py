@@ -0,0 +1,68 @@
+import os
+import sys
+import sqlite3
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.fetcher as fetcher
+
+OLD_TEXT = ("❌ TEHDIT SEVIYESI: [HIGH]\n📂 KATEGORI: [Ransomware]\n\n"
+            "📝 Özet: LockBit hits a hospital network.\n\n⚙️ Teknik Detay: Citrix Bleed used for access.")
+
+def analysis(level):
+    return {"threat_level": level, "category": "Malware", "summary": f"{level} summary", "technical_details": "N/A"}
+
+def test_init_db_backfills_structured_columns(tmp_path, monkeypatch):
+    """Eski biçimli analiz metinlerinin sütunlara aktarıldığını, arama ve özetlerin yeniden kurulduğunu test eder."""
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "old.db"))
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    conn.execute('''CREATE TABLE news (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, link TEXT UNIQUE,
+                    published TEXT, source TEXT, ai_analysis TEXT, category TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    conn.executemany("INSERT INTO news (title, link, ai_analysis, category) VALUES (?, ?, ?, ?)", [
+        ("Hospital attack", "https://x/1", OLD_TEXT, "Ransomware"),
+        ("Odd item", "https://x/2", "Eski serbest metin", "General"),
+        ("Pending item", "https://x/3", None, None),
+    ])
+    conn.commit()
+    conn.close()
+
+    fetcher.init_db()
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    rows = conn.execute("SELECT threat_level, category, summary, technical_details, ai_analysis FROM news ORDER BY id").fetchall()
+    assert rows[0] == ("HIGH", "Ransomware", "LockBit hits a hospital network.", "Citrix Bleed used for access.", None)
+    assert rows[1] == (None, "General", None, None, "Eski serbest metin")
+    assert conn.execute("SELECT rowid FROM news_fts WHERE news_fts MATCH 'citrix'").fetchall() == [(1,)]
+    assert conn.execute("SELECT total FROM news_rollups WHERE dimension = 'threat' AND bucket = 'HIGH'").fetchone() == (1,)
+    conn.close()
+
+    # Görüntü metni istek anında eski biçimle aynı üretilir
+    row = {"threat_level": "HIGH", "category": "Ransomware", "summary": rows[0][2], "technical_details": rows[0][3]}
+    assert fetcher.render_analysis(row) == OLD_TEXT
+    assert fetcher.parse_analysis_text(OLD_TEXT) == {k: v for k, v in row.items()}
+
+def test_news_threat_filter_and_sort(client):
+    """Tehdit seviyesi filtresinin, sayacının ve tehdide göre imleçli sıralamanın doğru çalıştığını test eder."""
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    conn.executemany("INSERT INTO news (title, link) VALUES (?, ?)", [(f"News {i}", f"https://x/{i}") for i in range(8)])
+    levels = ["LOW", "CRITICAL", "MEDIUM", "HIGH", "CRITICAL", "LOW", "HIGH"]
+    fetcher.store_analysis(conn, {i + 1: analysis(level) for i, level in enumerate(levels)})
+    conn.commit()
+    conn.close()
+
+    data = client.get('/api/news?threat_level=critical').get_json()
+    assert [n['id'] for n in data['news']] == [5, 2] and data['total'] == 2
+    assert data['news'][0]['ai_analysis'].startswith("❌ TEHDIT SEVIYESI: [CRITICAL]")
+    data = client.get('/api/news?threat_level=HIGH,CRITICAL&count=1').get_json()
+    assert [n['id'] for n in data['news']] == [7, 5, 4, 2] and data['total'] == 4
+    assert client.get('/api/news?threat_level=SEVERE').status_code == 400
+
+    seen, cursor = [], None
+    while True:
+        data = client.get('/api/news?sort=threat&per_page=3' + (f'&cursor={cursor}' if cursor else '')).get_json()
+        seen.extend(n['id'] for n in data['news'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert seen == [5, 2, 7, 4, 3, 6, 1, 8]
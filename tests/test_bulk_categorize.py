@@ -0,0 +1,85 @@
+import os
+import sys
+import sqlite3
+from unittest.mock import MagicMock
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bulk_categorize
+import core.fetcher as fetcher
+
+NEWS = [
+    ("Best deal on a new TV", None, None),                                # Alakasız -> silinir
+    ("New ransomware strain hits hospitals", None, None),                 # Anahtar kelimeyle Ransomware
+    ("Hackers target cyber insurance firms", None, None),                 # AI analizine gider
+    ("Phishing kit sold on forums", None, "Phishing"),                    # Zaten kategorili
+    ("Cyber attack on water utility", None, "General"),                   # AI analizine gider
+    ("Gift guide for gamers", None, None),                                # Alakasız -> silinir
+]
+
+def fake_ai_manager():
+    ai = MagicMock()
+    ai.total_concurrency.return_value = 2
+    ai.analyze_json_batch.side_effect = lambda batch: ({
+        item['id']: {"threat_level": "HIGH", "category": "APT", "summary": "s", "technical_details": "d"} for item in batch
+    }, [])
+    return ai
+
+def setup_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "bulk.db"))
+    monkeypatch.setattr(bulk_categorize, "DB_PATH", fetcher.DB_PATH)
+    fetcher.init_db()
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    conn.executemany("INSERT INTO news (title, link, ai_analysis, category) VALUES (?, ?, ?, ?)",
+                     [(title, f"https://x/{i}", analysis, category) for i, (title, analysis, category) in enumerate(NEWS)])
+    conn.commit()
+    return conn
+
+def snapshot(conn):
+    return conn.execute("SELECT id, category, threat_level FROM news ORDER BY id").fetchall()
+
+def test_dry_run_writes_nothing(tmp_path, monkeypatch):
+    """Deneme modunun veritabanını değiştirmeden yapılacakları raporladığını test eder."""
+    conn = setup_db(tmp_path, monkeypatch)
+    before = snapshot(conn)
+    ai = fake_ai_manager()
+    stats = bulk_categorize.categorize_all_news(dry_run=True, chunk_size=4, ai_manager=ai)
+    assert (stats["processed"], stats["deleted"], stats["updated"], stats["analyzed"]) == (6, 2, 1, 2)
+    assert snapshot(conn) == before
+    assert not ai.analyze_json_batch.called
+
+def test_chunked_run_and_resume(tmp_path, monkeypatch):
+    """Parçalı çalışmanın sonuçlarını, kontrol noktasından devam etmeyi ve tamamlanınca noktanın silinmesini test eder."""
+    conn = setup_db(tmp_path, monkeypatch)
+    bulk_categorize.init_checkpoint_db(conn)
+    bulk_categorize.save_checkpoint(conn, 4)  # 4 ve üzeri id'ler önceki çalışmada işlenmiş sayılır
+    conn.commit()
+
+    stats = bulk_categorize.categorize_all_news(chunk_size=2, ai_manager=fake_ai_manager())
+    assert stats["processed"] == 3
+    assert snapshot(conn) == [(2, "Ransomware", None), (3, "APT", "HIGH"), (4, "Phishing", None),
+                              (5, "General", None), (6, None, None)]
+    assert bulk_categorize.load_checkpoint(conn) is None
+    # Analiz edilen haberin işi tamamlanır; worker tekrar analiz etmez
+    assert conn.execute("SELECT news_id, state FROM analysis_jobs").fetchall() == [(3, "done")]
+    assert conn.execute("SELECT COUNT(*) FROM events WHERE kind = 'analysis'").fetchone()[0] == 1
+
+    stats = bulk_categorize.categorize_all_news(chunk_size=2, ai_manager=fake_ai_manager())
+    assert (stats["processed"], stats["deleted"], stats["analyzed"]) == (5, 1, 1)
+    assert [row[0] for row in snapshot(conn)] == [2, 3, 4, 5]
+    conn.close()
+
+def test_skips_jobs_running_in_worker(tmp_path, monkeypatch):
+    """Analiz worker'ının üzerinde çalıştığı haberlerin ikinci kez AI'a gönderilmediğini test eder."""
+    conn = setup_db(tmp_path, monkeypatch)
+    bulk_categorize.job_queue.enqueue(conn, [3, 5])
+    conn.commit()
+    assert bulk_categorize.job_queue.claim_ids(conn, [5]) == [5]
+
+    ai = fake_ai_manager()
+    stats = bulk_categorize.categorize_all_news(chunk_size=10, ai_manager=ai)
+    assert stats["analyzed"] == 1
+    assert [item['id'] for call in ai.analyze_json_batch.call_args_list for item in call.args[0]] == [3]
+    assert dict(conn.execute("SELECT news_id, state FROM analysis_jobs").fetchall()) == {3: "done", 5: "running"}
+    conn.close()
@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import sqlite3
+import pytest
+from unittest.mock import patch
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.cache as cache
+
+def test_memory_tier_serves_hits_without_sqlite():
+    """İkinci okumanın bellek katmanından, SQLite'a gitmeden döndüğünü test eder."""
+    cache.set_cache("cve_CVE-2024-1", {"id": "CVE-2024-1"})
+    cache._cache._memory.clear()
+    before = cache.get_cache_stats()
+
+    assert cache.get_cache("cve_CVE-2024-1") == {"id": "CVE-2024-1"}
+    with patch.object(cache.json, "loads", side_effect=AssertionError("bellekten gelmeli")):
+        assert cache.get_cache("cve_CVE-2024-1") == {"id": "CVE-2024-1"}
+
+    stats = cache.get_cache_stats()
+    assert stats["disk_hits"] - before["disk_hits"] == 1
+    assert stats["memory_hits"] - before["memory_hits"] == 1
+
+def test_lru_eviction_and_sweep(monkeypatch):
+    """Bellek katmanının sınırlı kaldığını ve süresi dolanların temizlendiğini test eder."""
+    monkeypatch.setattr(cache._cache, "max_entries", 2)
+    for i in range(3):
+        cache.set_cache(f"k{i}", i)
+    assert list(cache._cache._memory) == ["k1", "k2"]
+    # Bellekten düşen anahtar hâlâ SQLite'tan okunabilir
+    assert cache.get_cache("k0") == 0
+
+    cache.set_cache("old", "x", duration=-1)
+    assert cache.get_cache("old") is None
+    assert cache.sweep_expired() == 1
+    conn = sqlite3.connect(cache.DB_PATH)
+    assert conn.execute("SELECT COUNT(*) FROM intelligence_cache WHERE key = 'old'").fetchone()[0] == 0
+    conn.close()
+
+def test_negative_cache():
+    """'Bulunamadı' yanıtlarının negatif kayıt olarak önbelleğe alındığını test eder."""
+    cache.set_negative_cache("ip_10.0.0.1", "IP bulunamadı")
+    entry = cache.get_cache("ip_10.0.0.1")
+    assert cache.is_negative(entry) and entry["error"] == "IP bulunamadı"
+    assert not cache.is_negative({"ip": "10.0.0.1"})
+    assert cache.get_cache_stats()["negative_hits"] >= 1
+
+def test_single_flight_coalesces_concurrent_lookups():
+    """Aynı anahtar için eşzamanlı sorguların tek bir dış çağrıyı paylaştığını test eder."""
+    import threading
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {"id": "CVE-2024-2"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.cached_lookup("cve_CVE-2024-2", fetch, 60)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"id": "CVE-2024-2"}] * 8
+
+def test_cached_lookup_negative_and_stale_refresh():
+    """404 hatalarının negatif önbelleğe alındığını ve eskiyen kaydın arka planda yenilendiğini test eder."""
+    def not_found():
+        raise cache.LookupFailed("IP bulunamadı", 404)
+
+    with pytest.raises(cache.LookupFailed):
+        cache.cached_lookup("ip_192.0.2.1", not_found, 60)
+    # İkinci sorgu dış servise gitmeden negatif kayıttan cevaplanır
+    with pytest.raises(cache.LookupFailed) as err:
+        cache.cached_lookup("ip_192.0.2.1", lambda: pytest.fail("dış servis çağrılmamalı"), 60)
+    assert err.value.status == 404
+
+    # Ömrünün %80'inden fazlası geçmiş kayıt: eski veri hemen dönülür, yenisi arka planda yazılır
+    cache.set_cache("whois_example.com", {"registrar": "old"}, duration=10)
+    refreshed = []
+    assert cache.cached_lookup("whois_example.com", lambda: refreshed.append(1) or {"registrar": "new"}, 100) == {"registrar": "old"}
+    deadline = time.time() + 2
+    while cache.get_cache("whois_example.com") != {"registrar": "new"} and time.time() < deadline:
+        time.sleep(0.02)
+    assert refreshed == [1]
+    assert cache.get_cache("whois_example.com") == {"registrar": "new"}
@@ -0,0 +1,37 @@
+import os
+import sys
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import classifier
+
+def test_scan_returns_all_matches_in_one_pass():
+    """Tüm kelime kümelerinin tek taramada, iç içe ve örtüşen eşleşmeleriyle bulunduğunu test eder."""
+    matches = classifier.scan("LockBit ransomware attack: data leak site lists CVE-2023-4966 exploit")
+    assert matches["feed"] == {"ransomware", "attack", "leak", "cve", "exploit"}
+    assert matches["category:Ransomware"] == {"ransomware", "ransom"}
+    assert matches["category:Breach"] == {"data leak", "leak"}
+    assert matches["category:Vulnerability"] == {"cve-", "exploit"}
+    assert matches["urgent"] == {"cve", "exploit"}
+    # Bir eşleşmenin içinden başlayan daha uzun kelime de bulunur
+    assert classifier.scan("Galaxy security update")["security"] == {"security"}
+
+def test_turkish_folding_and_word_boundaries():
+    """Türkçe büyük/küçük harf katlamasını ve sözcük sınırlarını test eder."""
+    assert classifier.fold("VAKIFBANK İSTANBUL ılık") == "vakifbank istanbul ilik"
+    assert classifier.is_urgent("VAKIFBANK müşterilerine yönelik kampanya")
+    assert classifier.is_security_related("BÜYÜK SALDIRI", None)
+    assert classifier.is_feed_relevant("Hackers breached the network")
+    # Kısa kelimeler tam sözcük olmalı: "pirate" içinde "rat", "capture" içinde "apt" yok
+    assert classifier.extract_category("pirate capture", "") == "General"
+    assert classifier.extract_category("new RAT spreads", "") == "Malware"
+    assert not classifier.is_feed_relevant("Quarterly earnings report")
+
+def test_matches_legacy_loops_and_benchmark():
+    """Örnek metinlerde sonuçların eski döngülerle aynı olduğunu ve ölçümün çalıştığını test eder."""
+    for text in set(classifier.SAMPLE_TEXTS):
+        assert classifier.is_security_related(text, "") == classifier._legacy_is_security_related(text, "")
+        assert classifier.extract_category("", text) == classifier._legacy_extract_category("", text)
+    result = classifier.benchmark(classifier.SAMPLE_TEXTS[:12], rounds=2)
+    assert result["legacy"] > 0 and result["compiled"] > 0
@@ -0,0 +1,48 @@
+import os
+import sys
+import sqlite3
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.fetcher as fetcher
+from core import rollups
+
+def rollup_table(conn):
+    return sorted(conn.execute("SELECT dimension, bucket, total FROM news_rollups WHERE total > 0").fetchall())
+
+def test_rollups_follow_inserts_analysis_and_deletes(client):
+    """Özet tablosunun ekleme, analiz ve silmede tam taramayla aynı sonucu verdiğini test eder."""
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    conn.executemany("INSERT INTO news (title, link, source, category) VALUES (?, ?, ?, 'General')",
+                     [(f"News {i}", f"https://x/{i}", "BleepingComputer" if i % 3 else "TheHackerNews") for i in range(9)])
+    fetcher.store_analysis(conn, {
+        1: {"threat_level": "CRITICAL", "category": "Ransomware", "summary": "s", "technical_details": "t"},
+        2: {"threat_level": "LOW", "category": "Phishing", "summary": "s", "technical_details": "t"},
+    })
+    conn.execute("DELETE FROM news WHERE id = 3")
+    conn.commit()
+
+    live = rollup_table(conn)
+    rollups.rebuild_rollups(conn.cursor())
+    assert live == rollup_table(conn)
+    assert ("threat", "CRITICAL", 1) in live and ("threat", "PENDING", 6) in live
+    assert ("category", "General", 6) in live and ("all", "", 8) in live
+    conn.close()
+
+    stats = client.get('/api/stats').get_json()['sources']
+    assert stats[0] == {"source": "BleepingComputer", "count": 5}
+    assert client.get('/api/intensity').get_json()['intensity'][0]['count'] == 8
+
+def test_dashboard_etag_returns_304_until_data_changes(client):
+    """Veri değişmedikçe panel uç noktasının 304 döndüğünü test eder."""
+    first = client.get('/api/dashboard')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and set(first.get_json()) >= {"sources", "categories", "intensity", "threat_levels"}
+    assert client.get('/api/dashboard', headers={"If-None-Match": etag}).status_code == 304
+
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    conn.execute("INSERT INTO news (title, link, source) VALUES ('x', 'https://x/new', 'src')")
+    conn.commit()
+    conn.close()
+    assert client.get('/api/dashboard', headers={"If-None-Match": etag}).status_code == 200
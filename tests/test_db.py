@@ -0,0 +1,64 @@
+import os
+import sys
+import threading
+import pytest
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import db
+
+def test_connection_reused_per_thread_with_pragmas(tmp_path):
+    """Aynı thread'in bağlantıyı yeniden kullandığını, farklı thread'lerin ayrı bağlantı aldığını test eder."""
+    path = str(tmp_path / "pool.db")
+    conn = db.get_connection(path)
+    conn.close()
+    assert db.get_connection(path) is conn
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.get_connection(path)))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+def test_release_rolls_back_only_when_last_user_leaves(tmp_path):
+    """İç içe kullanımda içteki close()'un dıştaki işlemi geri almadığını test eder."""
+    path = str(tmp_path / "tx.db")
+    outer = db.get_connection(path)
+    outer.execute("CREATE TABLE t (x INTEGER)")
+    outer.execute("INSERT INTO t VALUES (1)")
+
+    inner = db.get_connection(path)
+    inner.close()
+    assert outer.in_transaction
+
+    outer.close()
+    assert db.get_connection(path).execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+def test_connection_context_releases_and_rolls_back_on_error(tmp_path):
+    """with db.connection() bloğunda hata olursa işlemin geri alındığını ve bağlantının bırakıldığını test eder."""
+    path = str(tmp_path / "ctx.db")
+    with db.connection(path) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+
+    with pytest.raises(RuntimeError):
+        with db.connection(path) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("rota hatası")
+    assert conn.users == 0 and not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+def test_query_timing_stats(tmp_path):
+    """Sorguların normalize edilmiş metinleriyle sayılıp zamanlandığını test eder."""
+    db.reset_stats()
+    conn = db.get_connection(str(tmp_path / "stats.db"))
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    for i in range(3):
+        conn.cursor().execute("SELECT   x FROM t\n WHERE x = ?", (i,))
+    stats = {row["sql"]: row for row in db.query_stats()}
+    assert stats["SELECT x FROM t WHERE x = ?"]["count"] == 3
+    conn.close()
@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import sqlite3
+import feedparser
+from unittest.mock import patch
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.fetcher as fetcher
+from core.ai_manager import AIManager
+from core.dedup import DuplicateIndex, fingerprint
+
+BACKGROUND = [
+    ("Chrome zero-day exploited in the wild, update now", "Google released an emergency patch"),
+    ("LockBit ransomware gang claims attack on hospital", "Patient data was stolen"),
+    ("Ivanti Connect Secure flaw under active exploitation", "CISA added the bug to KEV"),
+]
+
+def build_index(*items):
+    return DuplicateIndex((i, fingerprint(title, summary)) for i, (title, summary) in enumerate(items))
+
+def test_near_duplicate_headlines_are_matched():
+    """Farklı kaynakların aynı olayı farklı başlıklarla vermesinin kopya olarak yakalandığını test eder."""
+    index = build_index(*BACKGROUND, ("Okta says hackers breached its support system and stole customer files", ""))
+    assert index.find(fingerprint("Hackers breached Okta support system, stole customer files", "")) == 3
+    assert index.find(fingerprint("Fortinet FortiOS flaw under active exploitation", "")) is None
+
+def test_different_cves_are_never_duplicates():
+    """Aynı kalıptaki ama farklı CVE numaralı haberlerin ayrı tutulduğunu test eder."""
+    index = build_index(("Critical CVE-2024-1234 flaw in Apache exploited", ""))
+    assert index.find(fingerprint("Critical CVE-2024-9999 flaw in Apache exploited", "")) is None
+    assert index.find(fingerprint("Apache critical CVE-2024-1234 flaw exploited", "")) == 0
+
+RSS = """<?xml version="1.0"?><rss version="2.0"><channel><title>{name}</title>
+<item><title>{title}</title><link>https://{name}.example/story</link><description>security breach</description></item>
+</channel></rss>"""
+
+def test_fetch_links_duplicates_and_shares_analysis(tmp_path, monkeypatch):
+    """Aynı taramadaki kopyaların köke bağlandığını, tek iş kuyruğa alındığını ve analizin paylaşıldığını test eder."""
+    titles = {"a": "Okta says hackers breached its support system and stole customer files",
+              "b": "Hackers breached Okta support system, stole customer files"}
+    sources_path = tmp_path / "sources.json"
+    sources_path.write_text(json.dumps({"sources": [{"name": n, "url": f"https://{n}.example/rss"} for n in titles]}))
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(fetcher, "SOURCES_PATH", str(sources_path))
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test-token")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "42")
+
+    def download(source, state=None):
+        body = RSS.format(name=source['name'], title=titles[source['name']]).encode()
+        return {"status": 200, "feed": feedparser.parse(body), "bytes": len(body),
+                "etag": None, "last_modified": None, "entry_hash": None}
+
+    with patch.object(fetcher, "_download_feed", side_effect=download):
+        assert fetcher.fetch_rss() == 2
+
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    rows = conn.execute("SELECT id, duplicate_of FROM news ORDER BY id").fetchall()
+    root_id = next(r[0] for r in rows if r[1] is None)
+    assert sorted(r[1] for r in rows if r[1] is not None) == [root_id]
+    # Bildirim haberle aynı işlemde kuyruğa alınır; kopya için ayrı bildirim yok
+    assert conn.execute("SELECT COUNT(*) FROM notification_outbox").fetchone()[0] == 1
+    assert conn.execute("SELECT news_id FROM analysis_jobs").fetchall() == [(root_id,)]
+
+    result = {"threat_level": "HIGH", "category": "Data Breach", "summary": "s", "technical_details": "t"}
+    fetcher.store_analysis(conn, {root_id: result})
+    conn.commit()
+    assert {r[0] for r in conn.execute("SELECT category FROM news")} == {"Data Breach"}
+    conn.close()
+
+def test_analysis_response_cache_skips_llm():
+    """Aynı (normalize edilmiş) prompt için ikinci kez AI çağrısı yapılmadığını test eder."""
+    ai = AIManager()
+    reply = '{"threat_level": "LOW", "category": "Malware", "summary": "s", "technical_details": "t"}'
+    with patch.object(ai, 'analyze', return_value=reply) as mock_analyze:
+        first = ai.analyze_json("Başlık:  Yeni Zararlı", system_prompt="sys")
+        second = ai.analyze_json("başlık: yeni zararlı ", system_prompt="sys")
+    assert first == second and mock_analyze.call_count == 1
+
+    # Tekil analizde önbelleğe giren haber, toplu analizde AI'a tekrar gönderilmez
+    from core.prompts import ANALYSIS_SYSTEM_PROMPT, generate_news_prompt
+    with patch.object(ai, 'analyze', return_value=reply):
+        ai.analyze_json(generate_news_prompt("News 1", "https://x/1"), system_prompt=ANALYSIS_SYSTEM_PROMPT)
+    with patch.object(ai, 'analyze', side_effect=AssertionError("önbellekten gelmeli")):
+        results, failed = ai.analyze_json_batch([{"id": 1, "title": "News 1", "link": "https://x/1"}])
+    assert results[1]['category'] == "Malware" and failed == []
@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import socket
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import lookups
+
+ZONE = {
+    ("example.test.", "A"): (1, ["192.0.2.10", "192.0.2.11"]),
+    ("example.test.", "AAAA"): (300, ["2001:db8::10"]),
+    ("example.test.", "MX"): (300, ["10 mail.example.test."]),
+    ("example.test.", "NS"): (300, ["ns1.example.test."]),
+    ("example.test.", "TXT"): (300, ['"v=spf1 -all"']),
+    ("example.test.", "CAA"): (300, ['0 issue "letsencrypt.org"']),
+    ("example.test.", "SOA"): (300, ["ns1.example.test. admin.example.test. 1 3600 600 86400 60"]),
+    ("other.test.", "A"): (300, ["192.0.2.20"]),
+}
+
+class StubDNSServer(threading.Thread):
+    """ZONE sözlüğünden yanıt veren, her yanıtı DELAY kadar geciktiren yerel UDP DNS sunucusu."""
+    DELAY = 0.3
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.queries = []
+
+    def run(self):
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            threading.Thread(target=self.answer, args=(data, addr), daemon=True).start()
+
+    def answer(self, data, addr):
+        query = dns.message.from_wire(data)
+        question = query.question[0]
+        key = (question.name.to_text().lower(), dns.rdatatype.to_text(question.rdtype))
+        self.queries.append(key)
+        response = dns.message.make_response(query)
+        if key in ZONE:
+            ttl, values = ZONE[key]
+            response.answer.append(dns.rrset.from_text(question.name, ttl, "IN", key[1], *values))
+        elif not any(name == key[0] for name, _ in ZONE):
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        time.sleep(self.DELAY)
+        try:
+            self.sock.sendto(response.to_wire(), addr)
+        except OSError:
+            pass
+
+    def count(self, name, rtype):
+        return self.queries.count((name, rtype))
+
+@pytest.fixture
+def stub_dns(monkeypatch):
+    server = StubDNSServer()
+    server.start()
+    monkeypatch.setattr(lookups, "_resolver", lookups.build_resolver(["127.0.0.1"], server.port))
+    yield server
+    server.sock.close()
+
+def test_dns_types_resolve_concurrently_with_ttl_cache(stub_dns):
+    """Kayıt türlerinin paralel çözüldüğünü ve sonuçların kaydın TTL'i kadar önbellekte kaldığını test eder."""
+    started = time.monotonic()
+    result = lookups.lookup_dns("example.test")
+    # 8 kayıt türü x 0.3sn sıralı olsaydı ~2.4sn sürerdi
+    assert time.monotonic() - started < 1.2
+    assert result["records"]["A"] == ["192.0.2.10", "192.0.2.11"]
+    assert result["records"]["AAAA"] == ["2001:db8::10"]
+    assert result["records"]["CAA"] == ['0 issue "letsencrypt.org"']
+    assert result["records"]["SOA"][0].startswith("ns1.example.test.")
+    assert result["records"]["CNAME"] == [] and result["ttl"]["MX"] == 300
+
+    time.sleep(1.1)  # A kaydının TTL'i (1sn) doldu, MX hâlâ geçerli
+    lookups.lookup_dns("example.test")
+    assert stub_dns.count("example.test.", "A") == 2
+    assert stub_dns.count("example.test.", "MX") == 1
+
+def test_dns_bulk_and_routes(stub_dns, client):
+    """Toplu sorgunun her domain için sonuç döndüğünü ve uç noktaların hata kodlarını test eder."""
+    res = client.post('/api/dns/bulk', json={"domains": ["Other.test", "missing.test", "other.test", "x"]})
+    results = {r["domain"]: r for r in res.get_json()["results"]}
+    assert list(results) == ["other.test", "missing.test", "x"]
+    assert results["other.test"]["records"]["A"] == ["192.0.2.20"]
+    assert results["missing.test"]["errors"]["A"] == "NXDOMAIN"
+    assert results["x"]["error"] == "Geçersiz domain adı"
+
+    assert client.get('/api/dns?domain=example.test').get_json()["records"]["NS"] == ["ns1.example.test."]
+    assert client.get('/api/dns?domain=missing.test').status_code == 404
+    assert client.post('/api/dns/bulk', json={"domains": []}).status_code == 400
+
+def test_single_lookup_does_not_wait_behind_bulk(stub_dns, monkeypatch):
+    """Tekil sorgunun toplu sorguların arkasında beklemediğini ve toplu sorgunun süre sınırına uyduğunu test eder."""
+    bulk_pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(lookups, "_dns_bulk_pool", bulk_pool)
+    monkeypatch.setattr(lookups, "DNS_BULK_DEADLINE", 0.8)
+    bulk = {}
+    # 3 domain x 8 tür, 2 thread ile ~3.6sn sürerdi
+    worker = threading.Thread(target=lambda: bulk.update(
+        started=time.monotonic(), results=lookups.lookup_dns_bulk(["a.test", "b.test", "other.test"]),
+        finished=time.monotonic()))
+    worker.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    assert lookups.lookup_dns("example.test")["records"]["NS"] == ["ns1.example.test."]
+    assert time.monotonic() - started < 1.2
+
+    worker.join(3)
+    assert bulk["finished"] - bulk["started"] < 1.5
+    assert bulk["results"][2]["errors"]["A"] == "timeout"
+    bulk_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+from unittest.mock import patch, MagicMock
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import enrich, lookups
+
+def batch_response(ips):
+    """ip-api.com /batch yanıtını taklit eder; 10.0.0.x adresleri bulunamaz."""
+    res = MagicMock(status_code=200)
+    res.json.return_value = [
+        {"status": "fail", "message": "private range", "query": ip} if ip.startswith("10.") else
+        {"status": "success", "query": ip, "city": "Ankara", "country": "Türkiye", "isp": "ISP", "org": "Org", "as": "AS1"}
+        for ip in ips
+    ]
+    return res
+
+def read_lines(res):
+    return [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+
+def test_classify():
+    """IOC türlerinin tanınıp normalize edildiğini test eder."""
+    assert enrich.classify(" 8.8.8.8 ") == ("ip", "8.8.8.8")
+    assert enrich.classify("2001:DB8::1") == ("ip", "2001:db8::1")
+    assert enrich.classify("cve-2024-3094") == ("cve", "CVE-2024-3094")
+    assert enrich.classify("Example.COM.") == ("domain", "example.com")
+    assert enrich.classify("not an ioc")[0] is None
+
+def test_bulk_enrichment_batches_ips_and_uses_cache(client):
+    """IP'lerin 100'erli gruplarla sorgulandığını, tekrarların elendiğini ve ikinci istekte önbellekten döndüğünü test eder."""
+    ips = [f"192.0.2.{i}" for i in range(1, 141)] + [f"10.0.0.{i}" for i in range(1, 11)]
+    iocs = ips + ips[:5] + ["CVE-2024-3094", "example.com", "???"]
+    session = MagicMock()
+    session.post.side_effect = lambda url, json, timeout: batch_response(json)
+    cve = {"id": "CVE-2024-3094", "summary": "xz", "cvss": 10.0}
+    dns = [{"domain": "example.com", "records": {"A": ["192.0.2.1"]}, "ttl": {"A": 60}, "errors": {}}]
+
+    with patch("core.lookups.get_session", return_value=session), \
+         patch.object(lookups, "lookup_cve_details", return_value=cve) as lookup_cve, \
+         patch.object(lookups, "lookup_dns_bulk", return_value=dns):
+        res = client.post('/api/enrich/bulk', json={"iocs": iocs})
+        assert res.mimetype == 'application/x-ndjson'
+        lines = read_lines(res)
+
+        assert session.post.call_count == 2
+        assert sorted(len(call.kwargs["json"]) for call in session.post.call_args_list) == [50, 100]
+        results = {line["ioc"]: line for line in lines[:-1]}
+        assert len(lines) - 1 == len(results) == 153
+        assert results["192.0.2.7"]["data"]["location"] == "Ankara, Türkiye"
+        assert results["10.0.0.1"]["status"] == 404
+        assert results["CVE-2024-3094"]["data"] == cve
+        assert results["example.com"]["data"]["dns"]["records"]["A"] == ["192.0.2.1"]
+        assert results["???"]["status"] == 400
+        assert lines[-1]["summary"] == {**lines[-1]["summary"], "total": 153, "fetched": 142, "failed": 10, "invalid": 1}
+
+        # İkinci istekte IP'ler (bulunamayanlar dahil) önbellekten gelir
+        lines = read_lines(client.post('/api/enrich/bulk', json={"iocs": ips}))
+        assert session.post.call_count == 2
+        assert lines[-1]["summary"]["cached"] == 140 and lines[-1]["summary"]["failed"] == 10
+        assert lookup_cve.call_count == 1
+
+    assert client.post('/api/enrich/bulk', json={"iocs": []}).status_code == 400
+
+def test_cve_ai_comment_is_opt_in():
+    """Toplu zenginleştirmede CVE başına LLM çağrısının yalnızca istenince yapıldığını ve önbelleğe alındığını test eder."""
+    session = MagicMock()
+    session.get.return_value = MagicMock(status_code=200)
+    session.get.return_value.json.return_value = {"summary": "Uzaktan kod çalıştırma", "cvss": 9.8}
+    ai = MagicMock()
+    ai.analyze.return_value = "Acil yama gerekli"
+
+    def run(**kwargs):
+        return {line["ioc"]: line for line in list(enrich.enrich_iocs(["CVE-2031-0001"], ai, **kwargs))[:-1]}
+
+    with patch("core.lookups.get_session", return_value=session):
+        line = run()["CVE-2031-0001"]
+        assert line["data"]["cvss"] == 9.8 and "ai_comment" not in line["data"]
+        assert not ai.analyze.called
+
+        # Detaylar önbellekten gelir, yalnızca AI yorumu için LLM çağrılır
+        assert run(include_ai=True)["CVE-2031-0001"]["data"]["ai_comment"] == "Acil yama gerekli"
+        line = run(include_ai=True)["CVE-2031-0001"]
+        assert line["source"] == "cache" and line["data"]["ai_comment"] == "Acil yama gerekli"
+        assert session.get.call_count == 1 and ai.analyze.call_count == 1
+
+def test_cve_ai_failure_is_not_cached():
+    """Tüm sağlayıcılar hata verdiğinde hata mesajının AI yorumu olarak önbelleğe alınmadığını test eder."""
+    session = MagicMock()
+    session.get.return_value = MagicMock(status_code=200)
+    session.get.return_value.json.return_value = {"summary": "Yetki yükseltme", "cvss": 7.8}
+    ai = MagicMock()
+    ai.analyze.side_effect = ["HATA: Tüm AI servisleri şu an ulaşılamaz durumda.", "Yamayı uygulayın"]
+
+    with patch("core.lookups.get_session", return_value=session):
+        assert lookups.lookup_cve("CVE-2031-0002", ai)["ai_comment"].startswith("HATA:")
+        assert lookups.lookup_cve("CVE-2031-0002", ai)["ai_comment"] == "Yamayı uygulayın"
+        assert lookups.lookup_cve("CVE-2031-0002", ai)["ai_comment"] == "Yamayı uygulayın"
+    assert ai.analyze.call_count == 2 and session.get.call_count == 1
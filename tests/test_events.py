@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import sqlite3
+import threading
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.fetcher as fetcher
+from core import events
+
+def test_publish_wakes_waiters_and_prunes(tmp_path, monkeypatch):
+    """Yayınlanan olayın bekleyeni hemen uyandırdığını ve eski olayların budandığını test eder."""
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(events, "EVENT_RETENTION", 3)
+    fetcher.init_db()
+    conn = sqlite3.connect(fetcher.DB_PATH, check_same_thread=False)
+
+    seen = events.version()
+    timer = threading.Timer(0.1, lambda: events.publish(conn, "queue", {"pending": 1}))
+    started = time.monotonic()
+    timer.start()
+    events.wait(seen, timeout=5)
+    assert time.monotonic() - started < 1
+    timer.join()
+
+    for i in range(4):
+        events.publish(conn, "queue", {"pending": i + 2})
+    conn.commit()
+    assert [e[0] for e in events.read_since(conn, 0)] == [3, 4, 5]
+    assert events.read_since(conn, 4) == [(5, "queue", {"pending": 5})]
+    conn.close()
+
+def test_stream_sends_snapshot_and_missed_events(client, monkeypatch):
+    """Canlı akışın ilk durumu ve Last-Event-ID sonrasındaki olayları SSE biçiminde gönderdiğini test eder."""
+    import app as app_module
+    monkeypatch.setattr(app_module, "STREAM_MAX_DURATION", 0.3)
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    events.publish(conn, "news", {"count": 1, "items": []})
+    fetcher.publish_analysis(conn, {7: {"threat_level": "HIGH", "category": "Malware"}})
+    conn.commit()
+    conn.close()
+
+    res = client.get('/api/stream', headers={"Last-Event-ID": "1"})
+    body = res.get_data(as_text=True)
+    assert res.mimetype == 'text/event-stream'
+    assert "event: ai_status" in body and "event: queue" in body
+    assert "event: news" not in body
+    assert 'id: 2\nevent: analysis\ndata: {"items": [{"id": 7, "threat_level": "HIGH", "category": "Malware"}]}' in body
+    assert client.get('/api/stream?last_event_id=x').status_code == 400
+
+def test_stream_capacity_is_limited_per_process(client, monkeypatch):
+    """Açık akış sayısı sınırına ulaşıldığında 503 döndüğünü ve akış kapanınca yerin bırakıldığını test eder."""
+    import app as app_module
+    monkeypatch.setattr(app_module, "STREAM_MAX_DURATION", 0.3)
+    monkeypatch.setattr(app_module, "_stream_slots", threading.BoundedSemaphore(1))
+
+    first = client.get('/api/stream', buffered=False)
+    busy = client.get('/api/stream')
+    assert busy.status_code == 503 and busy.headers['Retry-After']
+    first.close()
+    assert client.get('/api/stream').status_code == 200
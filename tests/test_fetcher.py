@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import feedparser
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.fetcher as fetcher
+
+RSS_TEMPLATE = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>{name}</title>
+<item><title>{name} ransomware attack hits hospitals</title><link>https://example.com/{name}/1</link><description>Security incident</description></item>
+<item><title>{name} new phone review</title><link>https://example.com/{name}/2</link><description>Gadgets</description></item>
+</channel></rss>"""
+
+def parsed_result(source):
+    """_download_feed'in başarılı (200) sonuç sözlüğünü taklit eder."""
+    body = RSS_TEMPLATE.format(name=source['name']).encode()
+    return {"status": 200, "feed": feedparser.parse(body), "bytes": len(body),
+            "etag": None, "last_modified": None, "entry_hash": fetcher._top_entry_hash(body)}
+
+class FakeResponse:
+    """requests.get(stream=True) yanıtını taklit eden basit nesne."""
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        yield self.body
+
+def fake_session(response):
+    """Paylaşılan HTTP oturumunu, verilen yanıtı dönen bir mock ile değiştirir."""
+    return MagicMock(get=MagicMock(return_value=response))
+
+@pytest.fixture
+def feed_env(tmp_path, monkeypatch):
+    """Geçici veritabanı ve kaynak listesi ile izole bir tarama ortamı hazırlar."""
+    sources = {"sources": [{"name": f"src{i}", "url": f"https://feeds.example/{i}", "active": True} for i in range(6)]}
+    sources_path = tmp_path / "sources.json"
+    sources_path.write_text(json.dumps(sources))
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(fetcher, "SOURCES_PATH", str(sources_path))
+    monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
+    return tmp_path
+
+def test_fetch_rss_parallel_batch_insert(feed_env):
+    """Kaynakların paralel indirildiğini ve AI çağrısı yapılmadan toplu kayıt yapıldığını test eder."""
+    def slow_download(source, state=None):
+        time.sleep(0.3)
+        return parsed_result(source)
+
+    with patch.object(fetcher, "_download_feed", side_effect=slow_download), \
+         patch("core.ai_manager.AIManager.analyze_json", side_effect=AssertionError("AI tarama yolunda çağrılmamalı")):
+        started = time.monotonic()
+        inserted = fetcher.fetch_rss()
+        elapsed = time.monotonic() - started
+
+    assert inserted == 6
+    # 6 kaynak x 0.3sn seri olsaydı ~1.8sn sürerdi
+    assert elapsed < 1.2
+
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    rows = conn.execute("SELECT title, ai_analysis, feed_summary FROM news").fetchall()
+    conn.close()
+    assert len(rows) == 6
+    assert all(r[1] is None and r[2] == "Security incident" for r in rows)
+
+def test_fetch_rss_skips_failed_and_existing(feed_env):
+    """Hatalı kaynakların döngüyü durdurmadığını ve mevcut linklerin tekrar eklenmediğini test eder."""
+    def flaky_download(source, state=None):
+        if source['name'] == "src0":
+            raise TimeoutError("yavaş kaynak")
+        return parsed_result(source)
+
+    with patch.object(fetcher, "_download_feed", side_effect=flaky_download):
+        assert fetcher.fetch_rss() == 5
+        assert fetcher.fetch_rss() == 0
+
+def test_conditional_fetch_uses_feed_state(feed_env):
+    """ETag ile koşullu istek gönderildiğini ve 304 yanıtında parse adımının atlandığını test eder."""
+    source = {"name": "src0", "url": "https://feeds.example/0"}
+    body = RSS_TEMPLATE.format(name="src0").encode()
+
+    with patch.object(fetcher, "get_session", return_value=fake_session(FakeResponse(200, body, {"ETag": '"v1"'}))):
+        first = fetcher._download_feed(source)
+    assert first['feed'] is not None and first['etag'] == '"v1"'
+    state = fetcher._next_feed_state(source, None, first)
+
+    session = fake_session(FakeResponse(304))
+    with patch.object(fetcher, "get_session", return_value=session):
+        second = fetcher._download_feed(source, state)
+    assert session.get.call_args.kwargs['headers']['If-None-Match'] == '"v1"'
+    assert second['feed'] is None
+
+    # Sunucu 200 dönse bile en üst girdi aynıysa parse edilmez
+    with patch.object(fetcher, "get_session", return_value=fake_session(FakeResponse(200, body))):
+        third = fetcher._download_feed(source, state)
+    assert third['feed'] is None
+
+    state = fetcher._next_feed_state(source, state, second)
+    assert state['skip_count'] == 1 and state['fetch_count'] == 2
+    assert state['bytes_fetched'] == len(body)
@@ -0,0 +1,37 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.http_client import get_session, get_pool_stats
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_session_reuses_connections():
+    """Paylaşılan oturumun aynı host'a yapılan isteklerde bağlantıyı yeniden kullandığını test eder."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+    try:
+        for _ in range(5):
+            assert get_session().get(url, timeout=5).text == "ok"
+    finally:
+        server.shutdown()
+
+    host = next(h for h in get_pool_stats()["hosts"] if h["host"].endswith(f":{server.server_port}"))
+    assert host["requests"] == 5
+    assert host["connections"] == 1
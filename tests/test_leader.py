@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import sqlite3
+import threading
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.fetcher as fetcher
+from core import job_queue, leader
+from core.scheduler import BackgroundJobs
+from core.worker import AnalysisWorker
+
+def test_leader_lock_lease(tmp_path, monkeypatch):
+    """Kilidin sahibince yenilendiğini, süresi dolunca ve bırakılınca devralındığını test eder."""
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    fetcher.init_db()
+    conn = sqlite3.connect(fetcher.DB_PATH)
+
+    assert leader.acquire(conn, "jobs", "a", lease=60)
+    assert not leader.acquire(conn, "jobs", "b", lease=60)
+    assert leader.acquire(conn, "jobs", "a", lease=60)
+    assert leader.holder(conn, "jobs")["owner"] == "a"
+
+    conn.execute("UPDATE leader_locks SET expires_at = 0")
+    conn.commit()
+    assert leader.holder(conn, "jobs") is None
+    assert leader.acquire(conn, "jobs", "b", lease=60)
+
+    leader.release(conn, "jobs", "a")  # Sahibi olmayan bırakamaz
+    assert not leader.acquire(conn, "jobs", "a", lease=60)
+    leader.release(conn, "jobs", "b")
+    assert leader.acquire(conn, "jobs", "a", lease=60)
+    conn.close()
+
+def test_only_one_process_runs_background_jobs(client, monkeypatch):
+    """Aynı veritabanındaki iki süreçten yalnızca birinin görevleri çalıştırdığını, liderin çıkışında diğerinin devraldığını test eder."""
+    monkeypatch.setattr(leader, "LEADER_LEASE", 3)
+    monkeypatch.setattr(BackgroundJobs, "_activate", lambda self: setattr(self, "active", True))
+    monkeypatch.setattr(BackgroundJobs, "_deactivate", lambda self: setattr(self, "active", False))
+    first, second = BackgroundJobs(), BackgroundJobs()
+    first.start()
+    time.sleep(0.2)
+    second.start()
+    time.sleep(0.2)
+    assert first.active and not second.active
+    assert client.get('/api/system/jobs').get_json()['leader']['owner'] == first.owner
+
+    first.stop()
+    deadline = time.monotonic() + 3
+    while not second.active and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert second.active
+    second.stop()
+
+def test_transient_renew_error_keeps_leadership(tmp_path, monkeypatch):
+    """Tek bir yenileme hatasında kilit süresi dolmadan görevlerin bırakılmadığını test eder."""
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    fetcher.init_db()
+    jobs = BackgroundJobs()
+    jobs.owner = "a"
+    assert jobs._try_lead(renew_interval=20)
+    jobs.active = True
+
+    def busy(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(leader, "acquire", busy)
+    assert jobs._try_lead(renew_interval=20)
+    # Bir sonraki denemeden önce kilit dolacaksa liderlik bırakılır
+    jobs._lease_expires = time.time() + 10
+    assert not jobs._try_lead(renew_interval=20)
+
+def test_worker_restarts_after_slow_stop(monkeypatch):
+    """Durdurma zaman aşımına uğrasa bile yeniden başlatılan worker'ın çalışmaya devam ettiğini test eder."""
+    release = threading.Event()
+    calls = []
+
+    def drain(drain=False, stop=None):
+        calls.append(stop)
+        release.wait(2)
+    monkeypatch.setattr(fetcher, "process_missing_analysis", drain)
+    monkeypatch.setattr(AnalysisWorker, "_seconds_until_next_job", lambda self: 0.05)
+
+    worker = AnalysisWorker()
+    worker.start()
+    worker.wake()
+    time.sleep(0.1)
+    worker._stop.set()  # stop() zaman aşımına uğramış gibi: thread hâlâ drain içinde
+    job_queue.job_available.set()
+    threading.Timer(0.2, release.set).start()
+    worker.start()
+    assert worker._thread.is_alive() and not worker._stop.is_set()
+    assert calls[0] is worker._stop
+    worker.stop()
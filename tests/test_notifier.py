@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import threading
+import sqlite3
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import fetcher, notifier, outbox
+
+class MockTelegram(BaseHTTPRequestHandler):
+    """Gelen mesajları kaydeden ve sıradaki yanıt kodlarını dönen sahte Telegram Bot API'si."""
+    messages = []
+    responses = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        status = self.responses.pop(0) if self.responses else 200
+        if status == 200:
+            self.messages.append(body)
+            reply = {"ok": True}
+        elif status == 429:
+            reply = {"ok": False, "error_code": 429, "parameters": {"retry_after": 7}}
+        else:
+            reply = {"ok": False, "error_code": status, "description": "Internal Server Error"}
+        data = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def telegram(tmp_path, monkeypatch):
+    """Yerel sahte Telegram sunucusu ve geçici bildirim kuyruğu hazırlar."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockTelegram)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    MockTelegram.messages, MockTelegram.responses = [], []
+    monkeypatch.setattr(notifier, "TELEGRAM_API_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(notifier, "NOTIFY_SEND_INTERVAL", 0)
+    monkeypatch.setattr(notifier, "_paused_until", {})
+    monkeypatch.setattr(outbox, "NOTIFY_DIGEST_WINDOW", 0)
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test-token")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "42")
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    fetcher.init_db()
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    yield conn
+    conn.close()
+    server.shutdown()
+
+def news(n, urgent=False):
+    return {"news_id": n, "title": f"Haber_{n}", "source": "src", "link": f"https://example.com/{n}", "urgent": urgent}
+
+def test_burst_is_coalesced_into_digest(telegram):
+    """Aynı anda gelen çok sayıda bildirimin tek özet mesajda, kritikler önce gönderildiğini test eder."""
+    outbox.enqueue(telegram, [news(i, urgent=(i == 29)) for i in range(30)])
+    telegram.commit()
+    assert notifier.dispatch_pending(telegram) == 2
+
+    first, second = MockTelegram.messages
+    assert first["chat_id"] == "42"
+    assert first["text"].startswith("🚨 *20 YENİ HABER (1 KRİTİK)*")
+    assert "Haber\\_29" in first["text"].splitlines()[2]
+    assert second["text"].startswith("📰 *10 YENİ HABER*")
+    assert outbox.counts(telegram) == {"pending": 0, "sent": 30, "dead": 0}
+
+def test_retry_after_pauses_and_server_errors_back_off(telegram):
+    """429'da retry_after süresinin uygulandığını, 5xx hatasında geri çekilmeyle yeniden denendiğini test eder."""
+    outbox.enqueue(telegram, [news(1)])
+    telegram.commit()
+
+    MockTelegram.responses = [429]
+    assert notifier.dispatch_pending(telegram) == 0
+    assert 6 < notifier.paused_for("42") <= 7
+    assert 6 < outbox.next_due_in(telegram) <= 7
+    # Bekleme süresi dolmadan yeni deneme yapılmaz
+    assert notifier.dispatch_pending(telegram) == 0 and MockTelegram.messages == []
+
+    notifier._paused_until.clear()
+    telegram.execute("UPDATE notification_outbox SET next_attempt_at = 0")
+    MockTelegram.responses = [500]
+    assert notifier.dispatch_pending(telegram) == 0
+    attempts, error = telegram.execute("SELECT attempts, last_error FROM notification_outbox").fetchone()
+    assert attempts == 1 and error == "Internal Server Error"
+    assert outbox.next_due_in(telegram) > outbox.NOTIFY_BACKOFF_BASE - 1
+
+    telegram.execute("UPDATE notification_outbox SET next_attempt_at = 0")
+    assert notifier.dispatch_pending(telegram) == 1
+    assert MockTelegram.messages[0]["text"].startswith("📰 *YENİ HABER*")
+    assert outbox.counts(telegram)["sent"] == 1
+
+def test_rate_limit_pauses_only_that_chat(telegram, tmp_path):
+    """Bir sohbetin 429 beklemesinin diğer sohbetleri ve dosya kanalını durdurmadığını test eder."""
+    sink = tmp_path / "alerts.ndjson"
+    (tmp_path / "routing_rules.json").write_text(json.dumps({
+        "channels": {"archive": {"type": "file", "path": str(sink)}, "team": {"type": "telegram", "chat_id": "7"}},
+        "rules": [{"channels": ["archive"]}],
+    }))
+    outbox.enqueue(telegram, [news(1)])
+    outbox.enqueue(telegram, [news(2)], channel="team")
+    outbox.enqueue(telegram, [news(3)], channel="archive")
+    telegram.commit()
+
+    MockTelegram.responses = [429]
+    assert notifier.dispatch_pending(telegram) == 2
+    assert [m["chat_id"] for m in MockTelegram.messages] == ["7"]
+    assert len(sink.read_text().splitlines()) == 1
+    assert notifier.paused_for("42") > 6 and not notifier.paused_for("7")
+    assert outbox.counts(telegram) == {"pending": 1, "sent": 2, "dead": 0}
+
+    # Bekleme sürerken aynı sohbete gelen bildirim de ertelenir
+    outbox.enqueue(telegram, [news(4)])
+    telegram.commit()
+    assert notifier.dispatch_pending(telegram) == 0
+    assert outbox.next_due_in(telegram) > 6
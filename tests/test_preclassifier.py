@@ -0,0 +1,87 @@
+import os
+import sys
+import random
+import sqlite3
+from unittest.mock import patch
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.fetcher as fetcher
+from core import job_queue, notifier, preclassifier
+from core.ai_manager import AIManager
+from core.cache import set_cache
+
+TOPICS = [
+    ("Ransomware", "HIGH", ["ransomware gang encrypts hospital servers", "lockbit affiliate demands ransom payment",
+                            "ransomware operators leak stolen files after extortion"]),
+    ("Phishing", "MEDIUM", ["phishing campaign spoofs microsoft login page", "credential harvesting emails target bank customers",
+                            "phishing kit abuses fake invoice attachments"]),
+    ("Vulnerability", "CRITICAL", ["critical remote code execution flaw patched in firewall",
+                                   "unauthenticated rce vulnerability exploited in vpn appliance",
+                                   "vendor releases emergency patch for zero-day flaw"]),
+]
+
+def labelled_rows(count=240, seed=1):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        category, threat, titles = TOPICS[i % len(TOPICS)]
+        rows.append((f"{rng.choice(titles)} report {i}", rng.choice(titles), category, threat))
+    return rows
+
+def test_train_and_evaluate_against_llm_labels(tmp_path):
+    """Modelin etiketli haberlerden eğitildiğini, kaydedilip yüklendiğini ve doğrulamada isabetli olduğunu test eder."""
+    model = preclassifier.Preclassifier.train(labelled_rows())
+    model.save(str(tmp_path / "model.json"))
+    model = preclassifier.Preclassifier.load(str(tmp_path / "model.json"))
+
+    stats = preclassifier.evaluate(model, labelled_rows(60, seed=2), threshold=0.6)
+    assert stats["category_accuracy"] == 1.0 and stats["threat_accuracy"] == 1.0
+    assert stats["coverage"] > 0.8 and stats["covered_accuracy"] == 1.0
+
+    category, confidence = model.predict("Quarterly earnings call scheduled")["category"]
+    assert confidence < 0.6
+
+def test_confident_items_skip_the_llm(tmp_path, monkeypatch):
+    """Yüksek güvenli haberlerin AI'a gönderilmeden kaydedildiğini, CVSS puanının tehdit seviyesini belirlediğini test eder."""
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(preclassifier, "THRESHOLD", 0.6)
+    fetcher.init_db()
+    preclassifier.Preclassifier.train(labelled_rows()).save()
+    set_cache("cve_CVE-2024-3400", {"id": "CVE-2024-3400", "cvss": 7.5})
+
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    conn.executemany("INSERT INTO news (title, link, feed_summary) VALUES (?, ?, ?)", [
+        ("Ransomware gang encrypts hospital servers again", "https://x/1", "<p>LockBit affiliate demands ransom payment</p>"),
+        ("Unauthenticated RCE vulnerability exploited in VPN appliance", "https://x/2", "CVE-2024-3400 under attack"),
+        ("Quarterly earnings call scheduled", "https://x/3", ""),
+    ])
+    job_queue.enqueue(conn, [1, 2, 3])
+    conn.commit()
+
+    sent = []
+    def fake_batch(self, items):
+        sent.extend(i['id'] for i in items)
+        return {i['id']: AIManager.validate_analysis({"threat_level": "LOW", "category": "General", "summary": "s"})
+                for i in items}, []
+
+    with patch.object(AIManager, 'analyze_json_batch', fake_batch):
+        fetcher.process_missing_analysis(drain=True)
+
+    assert sent == [3]
+    rows = conn.execute("SELECT category, threat_level, analysis_source, summary FROM news ORDER BY id").fetchall()
+    conn.close()
+    # Yerel sonuçlar AI özeti taşımaz; RSS metni özet gibi gösterilmez
+    assert rows[0] == ("Ransomware", "HIGH", "local", "")
+    assert rows[1][:3] == ("Vulnerability", "HIGH", "local")  # Model CRITICAL der, önbellekteki CVSS 7.5 -> HIGH
+    assert rows[2][:3] == ("General", "LOW", "llm")
+
+def test_local_results_are_not_rendered_as_ai_analysis():
+    """Yerel sonuçların AI analizi gibi değil, ayrı bir biçimde gösterildiğini test eder."""
+    row = {"threat_level": "HIGH", "category": "Ransomware", "summary": "", "ai_analysis": None,
+           "technical_details": "Yerel sınıflandırıcı: kategori güveni %97", "analysis_source": "local"}
+    text = fetcher.render_analysis(row)
+    assert text.startswith("🧮 YEREL SINIFLANDIRMA: [HIGH]") and "Özet" not in text
+    message = notifier.render_single({**row, "title": "t", "source": "s", "link": "l"})
+    assert "*Yerel sınıflandırma:* [HIGH] Ransomware" in message and "*AI:*" not in message
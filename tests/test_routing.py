@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import sqlite3
+import pytest
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import fetcher, notifier, outbox, routing
+
+CHANNELS = {"soc": {"type": "telegram", "chat_id": "1"}, "vendor": {"type": "telegram", "chat_id": "2"},
+            "siem": {"type": "webhook", "url": "http://siem.local/hook"}, "archive": {"type": "file", "path": "x"}}
+
+def article(title, level="MEDIUM", category="General", source="The Hacker News", summary=""):
+    return {"title": title, "summary": summary, "source": source, "category": category, "threat_level": level}
+
+def test_rule_filters_order_and_default():
+    """Kural filtrelerinin VE, filtre değerlerinin VEYA ile birleştiğini, stop ve default davranışını test eder."""
+    rules = routing.RuleSet({"channels": CHANNELS, "default": ["archive"], "rules": [
+        {"name": "vendor", "keywords": ["crowdstrike", "palo alto"], "min_threat_level": "MEDIUM",
+         "channels": ["vendor", "soc"], "stop": True},
+        {"name": "high", "min_threat_level": "HIGH", "channels": ["soc", "siem"]},
+        {"name": "usom", "sources": ["usom duyurular"], "regex": r"CVE-\d{4}-\d+", "channels": ["siem"]},
+        {"name": "ransom", "categories": ["Ransomware"], "channels": ["soc"]},
+    ]})
+    assert rules.match(article("CrowdStrike sensor flaw", level="CRITICAL")) == ["vendor", "soc"]
+    assert rules.match(article("CrowdStrike earnings", level="LOW")) == ["archive"]
+    assert rules.match(article("Generic RCE", level="HIGH", category="Ransomware")) == ["soc", "siem"]
+    assert rules.match(article("Yeni duyuru", source="USOM Duyurular", summary="cve-2024-1234 yaması")) == ["siem"]
+    assert rules.match(article("Yeni duyuru", source="USOM Duyurular")) == ["archive"]
+
+    with pytest.raises(ValueError):
+        routing.RuleSet({"channels": CHANNELS, "rules": [{"name": "bad", "channels": ["missing"]}]})
+    with pytest.raises(ValueError):
+        routing.RuleSet({"channels": CHANNELS, "rules": [{"min_threat_level": "SEVERE", "channels": ["soc"]}]})
+
+def test_hundreds_of_rules_evaluate_in_microseconds():
+    """Yüzlerce kuralın tek kelime taramasıyla hızlı değerlendirildiğini test eder."""
+    specs = [{"name": f"r{i}", "keywords": [f"vendor{i}", f"product {i}"], "min_threat_level": "HIGH",
+              "channels": ["soc"]} for i in range(300)]
+    specs.append({"keywords": ["vendor299"], "channels": ["siem"]})
+    rules = routing.RuleSet({"channels": CHANNELS, "rules": specs})
+    assert rules.match(article("Critical bug in Vendor299 appliance", level="HIGH")) == ["soc", "siem"]
+    assert rules.match(article("Critical bug in Vendor299 appliance", level="LOW")) == ["siem"]
+    assert routing.benchmark(rules, [article("Critical bug in Vendor42 appliance exploited", level="HIGH")]) < 1000
+
+def test_analysis_is_routed_to_channels(tmp_path, monkeypatch):
+    """Analiz tamamlandığında kurallara göre kanallara kuyruklandığını ve dosya kanalına yazıldığını test eder."""
+    sink = tmp_path / "alerts.ndjson"
+    (tmp_path / "routing_rules.json").write_text(json.dumps({
+        "channels": {"archive": {"type": "file", "path": str(sink)}, "gone": {"type": "webhook", "url": "http://x"}},
+        "rules": [{"min_threat_level": "HIGH", "channels": ["archive"]}],
+    }))
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(outbox, "NOTIFY_DIGEST_WINDOW", 0)
+    monkeypatch.setattr(notifier, "_paused_until", {})
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test-token")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "42")
+    fetcher.init_db()
+
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    # Kurallar tanımlıyken tarama anında bildirim gönderilmez
+    fetcher._notify_new_items(conn, [{"id": 1, "title": "t", "source": "s", "link": "l"}])
+    conn.executemany("INSERT INTO news (id, title, link, source) VALUES (?, ?, ?, ?)",
+                     [(1, "Exploited RCE in Citrix", "https://e/1", "src"), (2, "Minor bug", "https://e/2", "src")])
+    results = {1: {"threat_level": "CRITICAL", "category": "Vulnerability", "summary": "RCE", "technical_details": ""},
+               2: {"threat_level": "LOW", "category": "General", "summary": "bug", "technical_details": ""}}
+    fetcher.store_analysis(conn, results)
+    fetcher.publish_analysis(conn, results)
+    outbox.enqueue(conn, [{"title": "orphan", "source": "s", "link": "l"}], channel="removed")
+    conn.commit()
+    assert conn.execute("SELECT channel FROM notification_outbox ORDER BY id").fetchall() == [("archive",), ("removed",)]
+
+    assert notifier.dispatch_pending(conn) == 1
+    written = [json.loads(line) for line in sink.read_text().splitlines()]
+    assert written == [{"news_id": 1, "title": "Exploited RCE in Citrix", "source": "src", "link": "https://e/1",
+                        "threat_level": "CRITICAL", "category": "Vulnerability", "summary": "RCE", "analysis_source": "llm",
+                        "urgent": True}]
+    assert outbox.counts(conn) == {"pending": 0, "sent": 1, "dead": 1}
+    conn.close()
@@ -0,0 +1,87 @@
+import os
+import sys
+import sqlite3
+
+# Proje kök dizinini ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.fetcher as fetcher
+from core.search import build_match_query
+
+def insert(rows):
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    conn.executemany("INSERT INTO news (title, link, summary, category) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+def test_build_match_query_escapes_operators():
+    """Kullanıcı girdisinin güvenli FTS5 ifadesine çevrildiğini test eder."""
+    assert build_match_query('lockbit "data leak" ransom*') == '"lockbit" "data leak" "ransom"*'
+    assert build_match_query('CVE-2024-1234 OR NEAR(') == '"CVE-2024-1234" "OR" "NEAR("'
+    assert build_match_query('  " * ') is None
+
+def test_news_search_uses_fts_ranking_and_triggers(client):
+    """Aramanın başlık ağırlıklı sıralandığını, vurgulandığını ve güncellemelerin indekse yansıdığını test eder."""
+    conn = insert([
+        ("Patch Tuesday fixes Exchange bugs", "https://x/1", "Özet: ransomware operators exploit Exchange", "Vulnerability"),
+        ("Ransomware gang hits hospital", "https://x/2", None, "General"),
+        ("Chrome update released", "https://x/3", None, "General"),
+    ])
+
+    data = client.get('/api/news?search=ransom*&count=1').get_json()
+    assert [n['link'] for n in data['news']] == ["https://x/2", "https://x/1"]
+    assert data['total'] == 2
+    assert data['news'][0]['title_highlight'] == "<mark>Ransomware</mark> gang hits hospital"
+
+    # Tetikleyiciler: güncellenen ve silinen haberler indekse yansır
+    conn.execute("UPDATE news SET summary = 'Ransomware loader' WHERE id = 3")
+    conn.execute("DELETE FROM news WHERE id = 2")
+    conn.commit()
+    conn.close()
+    data = client.get('/api/news?search="ransomware loader"').get_json()
+    assert [n['link'] for n in data['news']] == ["https://x/3"]
+    assert client.get('/api/news?search=hospital&count=1').get_json()['total'] == 0
+
+def test_init_db_backfills_existing_rows(tmp_path, monkeypatch):
+    """FTS tablosu olmayan mevcut veritabanında indeksin bir kerede doldurulduğunu test eder."""
+    monkeypatch.setattr(fetcher, "DB_PATH", str(tmp_path / "old.db"))
+    fetcher.init_db()
+    conn = insert([("Okta breach disclosed", "https://x/9", None, "General")])
+    conn.executescript("DROP TABLE news_fts; DROP TRIGGER news_fts_insert; DROP TRIGGER news_fts_delete; DROP TRIGGER news_fts_update;")
+    conn.close()
+
+    fetcher.init_db()
+    conn = sqlite3.connect(fetcher.DB_PATH)
+    assert conn.execute("SELECT rowid FROM news_fts WHERE news_fts MATCH 'okta'").fetchall() == [(1,)]
+    conn.close()
+
+def test_cursor_pagination_and_cached_counts(client):
+    """İmleçle sayfalamanın tüm haberleri tekrarsız gezdiğini ve sayaçların tetikleyicilerle güncellendiğini test eder."""
+    conn = insert([(f"Malware news {i}", f"https://x/{i}", None, "Malware" if i % 2 else "General") for i in range(25)])
+
+    seen, cursor = [], None
+    while True:
+        data = client.get('/api/news?per_page=10' + (f'&cursor={cursor}' if cursor else '')).get_json()
+        seen.extend(n['id'] for n in data['news'])
+        assert data['total'] == 25
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert seen == list(range(25, 0, -1))
+
+    data = client.get('/api/news?category=Malware&before_id=10').get_json()
+    assert [n['id'] for n in data['news']] == [8, 6, 4, 2] and data['total'] == 12
+
+    # Arama sonuçlarında imleç ofset taşır, toplam sadece istenirse hesaplanır
+    first = client.get('/api/news?search=malware&per_page=20').get_json()
+    second = client.get(f"/api/news?search=malware&per_page=20&cursor={first['next_cursor']}").get_json()
+    assert first['total'] is None and len(first['news']) + len(second['news']) == 25
+    assert second['next_cursor'] is None
+
+    conn.execute("UPDATE news SET category = 'General' WHERE id = 2")
+    conn.execute("DELETE FROM news WHERE id = 4")
+    conn.commit()
+    conn.close()
+    assert client.get('/api/news?category=Malware').get_json()['total'] == 10
+    assert client.get('/api/news').get_json()['total'] == 24
+    assert client.get('/api/news?cursor=!!bozuk').status_code == 400
@@ -0,0 +1,39 @@
+import os
+import re
+import sys
+import subprocess
+
+# Proje kök dizinini ekle
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import bootstrap
+
+# 'import app' için izin verilen toplam süre (ms); eskiden pip kurulumu ve SDK'larla birlikte 4sn'yi aşıyordu
+STARTUP_IMPORT_BUDGET_MS = int(os.getenv('STARTUP_IMPORT_BUDGET_MS', 1500))
+LAZY_MODULES = ("google.genai", "groq", "mistralai")
+
+def test_app_import_is_fast_and_lazy(tmp_path):
+    """Uygulama importunun pip çalıştırmadığını, SDK'ları yüklemediğini ve süre bütçesi içinde kaldığını test eder."""
+    env = dict(os.environ, SENTINEL_BACKGROUND_JOBS="0", SENTINEL_DB_PATH=str(tmp_path / "startup.db"))
+    code = ("import sys, subprocess\n"
+            "def forbidden(*args, **kwargs): raise SystemExit('import sırasında alt süreç çalıştırıldı')\n"
+            "subprocess.Popen = forbidden\n"
+            "import app\n"
+            f"print([m for m in {LAZY_MODULES!r} if m in sys.modules])")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+    cumulative = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| app$", result.stderr, re.MULTILINE)
+    assert cumulative, "importtime çıktısında 'app' bulunamadı"
+    assert int(cumulative.group(1)) / 1000 < STARTUP_IMPORT_BUDGET_MS
+
+def test_bootstrap_reports_missing_requirements(tmp_path, capsys):
+    """Bağımlılık kontrolünün kurulu paketleri tanıdığını ve eksikleri raporladığını test eder."""
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("# yorum\nFlask>=2.0\npython_dotenv\nsentinel-olmayan-paket==1.0\n")
+    assert bootstrap.missing_requirements(bootstrap.read_requirements(str(requirements))) == ["sentinel-olmayan-paket==1.0"]
+    assert bootstrap.main(["--requirements", str(requirements)]) == 1
+    assert "sentinel-olmayan-paket" in capsys.readouterr().out
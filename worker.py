@@ -0,0 +1,35 @@
+"""
+SentinelAi arka plan worker'ı
+-----------------------------
+RSS taraması, önbellek temizliği ve AI analiz kuyruğunu web sunucusundan ayrı bir süreçte çalıştırır.
+Üretim kurulumu (web katmanı çekirdek sayısı kadar ölçeklenir, görevler tek süreçte kalır):
+
+    SENTINEL_BACKGROUND_JOBS=0 gunicorn -w 4 -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:app
+    python worker.py
+
+Birden fazla worker.py çalıştırılırsa lider kilidi nedeniyle görevleri yalnızca biri yürütür.
+"""
+
+import signal
+import threading
+from core.fetcher import init_db
+from core.logger import setup_logger
+from core.scheduler import background_jobs
+
+logger = setup_logger("Worker")
+
+def main():
+    init_db()
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    logger.info("🚀 SentinelAi arka plan worker'ı başlatıldı.")
+    background_jobs.start()
+    while not stop.wait(1):
+        pass
+    logger.info("🛑 Worker kapatılıyor...")
+    background_jobs.stop()
+
+if __name__ == "__main__":
+    main()
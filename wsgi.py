@@ -0,0 +1,8 @@
+"""
+Üretim WSGI giriş noktası: gunicorn -w 4 -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:app
+
+Gunicorn --preload ile çalıştırılmamalıdır: SQLite bağlantıları ve arka plan thread'leri
+fork sırasında worker'lara taşınamaz. Her worker uygulamayı kendisi oluşturur.
+"""
+
+from app import app  # noqa: F401